@@ -0,0 +1,138 @@
+"""Synthetic labeled report texts for similarity and correlation benchmarks.
+
+Each incident is a (place, activity, vehicle) triple rendered through
+several source-specific templates, so reports about the same incident
+share facts but not phrasing, the way an Iceout entry, a Bluesky post and
+a news blurb about the same event do.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+PLACES = [
+    "Lake Street and Chicago Ave", "the Mercado Central", "Cedar-Riverside",
+    "East Lake Street", "the Midtown Global Market", "Powderhorn Park",
+    "Central Ave NE", "University Ave", "the Hennepin County courthouse",
+    "Phillips West", "the Whittier Clinic", "Franklin Ave station",
+    "Nicollet Mall", "Bloomington Ave", "the Karmel Mall", "Hiawatha Ave",
+    "Minnehaha Ave", "West Broadway", "Dinkytown", "Seward Co-op",
+]
+
+ACTIVITIES = [
+    ("detaining", "detained", "a detention"),
+    ("arresting", "arrested", "an arrest"),
+    ("questioning", "questioned", "a stop"),
+    ("raiding", "raided", "a raid"),
+    ("following", "followed", "surveillance"),
+]
+
+TARGETS = [
+    "a man", "two workers", "a family", "a woman", "several people",
+    "a delivery driver", "construction workers", "a street vendor",
+]
+
+VEHICLES = [
+    "unmarked white van", "black SUVs", "gray Dodge Durango",
+    "unmarked sedan", "two tinted Tahoes", "white pickup with no plates",
+]
+
+# {place} {ing} {ed} {noun} {target} {vehicle}
+TEMPLATES = {
+    "iceout": [
+        "ICE {noun} reported at {place}. Agents {ed} {target}. {vehicle} on scene.",
+        "Confirmed ICE activity near {place} - {target} {ed}, {vehicle}",
+    ],
+    "stopice": [
+        "ALERT: ICE agents {ing} {target} at {place}. Vehicle: {vehicle}.",
+        "StopICE alert {place}: agents {ing} {target}, {vehicle} seen",
+    ],
+    "bluesky": [
+        "ice agents {ing} {target} right now at {place}!! {vehicle} parked outside #icewatch",
+        "PSA avoid {place}, ICE just {ed} {target}. saw a {vehicle}",
+        "happening now near {place}: feds in a {vehicle} {ing} {target}, please share",
+    ],
+    "twitter": [
+        "ICE at {place} {ing} {target}. {vehicle}. Rapid response is on the way",
+        "Reports of ICE {noun} near {place}, {target} {ed}. Look for {vehicle}",
+    ],
+    "reddit": [
+        "Anyone else see ICE at {place}? Looked like they {ed} {target}, {vehicle} blocking the lane",
+        "Just drove past {place}, agents with a {vehicle} {ing} {target}",
+    ],
+    "rss": [
+        "Witnesses say federal immigration agents {ed} {target} near {place} on Tuesday, arriving in a {vehicle}.",
+    ],
+}
+
+SOURCES = tuple(TEMPLATES)
+
+
+@dataclass(frozen=True)
+class Incident:
+    """Ground-truth facts shared by every report about one incident."""
+    label: int
+    place: str
+    activity: tuple[str, str, str]
+    target: str
+    vehicle: str
+
+
+def make_incident(label: int, rng: random.Random) -> Incident:
+    return Incident(
+        label=label,
+        place=rng.choice(PLACES),
+        activity=rng.choice(ACTIVITIES),
+        target=rng.choice(TARGETS),
+        vehicle=rng.choice(VEHICLES),
+    )
+
+
+def _typo(text: str, rng: random.Random, rate: float) -> str:
+    """Drop or double random letters to mimic hurried typing."""
+    if rate <= 0:
+        return text
+    out = []
+    for ch in text:
+        roll = rng.random()
+        if ch.isalpha() and roll < rate / 2:
+            continue
+        out.append(ch)
+        if ch.isalpha() and roll > 1 - rate / 2:
+            out.append(ch)
+    return "".join(out)
+
+
+def render(
+    incident: Incident,
+    source: str,
+    rng: random.Random,
+    typo_rate: float = 0.02,
+) -> str:
+    """Render one report about ``incident`` in the style of ``source``."""
+    ing, ed, noun = incident.activity
+    template = rng.choice(TEMPLATES[source])
+    text = template.format(
+        place=incident.place, ing=ing, ed=ed, noun=noun,
+        target=incident.target, vehicle=incident.vehicle,
+    )
+    return _typo(text, rng, typo_rate)
+
+
+def labeled_texts(
+    n_incidents: int = 40,
+    reports_per_incident: int = 4,
+    seed: int = 7,
+    typo_rate: float = 0.02,
+) -> tuple[list[str], list[int]]:
+    """Return report texts and the incident label of each."""
+    rng = random.Random(seed)
+    texts: list[str] = []
+    labels: list[int] = []
+    for label in range(n_incidents):
+        incident = make_incident(label, rng)
+        for source in rng.sample(SOURCES, k=min(reports_per_incident, len(SOURCES))):
+            texts.append(render(incident, source, rng, typo_rate))
+            labels.append(label)
+    return texts, labels
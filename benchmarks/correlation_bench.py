@@ -0,0 +1,268 @@
+"""End-to-end correlator benchmark on a synthetic report stream.
+
+Replays a ``benchmarks.workload`` stream into an in-memory Database one
+check interval at a time, running ``Correlator.run_cycle`` on a simulated
+clock and marking new clusters notified the way main.py does. Reports
+cycle latency percentiles, event-loop lag during cycles, peak traced
+memory and cluster quality against the ground-truth incident labels, for
+each window / per-city budget combination given.
+
+Usage:
+    python -m benchmarks.correlation_bench
+    python -m benchmarks.correlation_bench --engines linkage density
+    python -m benchmarks.correlation_bench --fts-candidates 0 10 30
+    python -m benchmarks.correlation_bench --cities minneapolis chicago houston \\
+        --incidents 60 --windows 3600 10800 --budgets 100 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+
+import numpy as np
+
+from benchmarks.workload import CITY_CENTERS, NOISE, LabeledReport, WorkloadConfig, generate
+from config import Config
+from correlation.correlator import CLUSTERING_ENGINES, Correlator
+from storage.database import Database
+from storage.models import RawReport
+
+
+class LoopLagProbe:
+    """Samples event-loop lag: how late a short sleep wakes up."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def replay(
+    workload: list[LabeledReport],
+    config: Config,
+    trace_memory: bool = False,
+) -> dict:
+    """Feed ``workload`` through a fresh Correlator; return raw results."""
+    db = Database(config)
+    await db.connect()
+    now = workload[0].report.collected_at if workload else datetime.now(timezone.utc)
+    correlator = Correlator(config, db, clock=lambda: now)
+    step = timedelta(seconds=config.correlation_check_interval)
+    end = workload[-1].report.collected_at + step if workload else now
+
+    labels: dict[int, int] = {}
+    clusters: dict[int, int] = {}
+    latencies: list[float] = []
+    lag: list[float] = []
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        pending = iter(workload)
+        item = next(pending, None)
+        while now <= end:
+            now += step
+            while item is not None and item.report.collected_at <= now:
+                r = item.report
+                row_id = await db.insert_raw_report(RawReport(
+                    source_type=r.source_type,
+                    source_id=r.source_id,
+                    source_url=r.source_url,
+                    author=r.author,
+                    text=r.original_text,
+                    timestamp=r.timestamp,
+                    collected_at=r.collected_at,
+                ))
+                await db.update_report_processing(
+                    report_id=row_id,
+                    cleaned_text=r.cleaned_text,
+                    is_relevant=True,
+                    primary_neighborhood=r.primary_neighborhood,
+                    latitude=r.latitude,
+                    longitude=r.longitude,
+                    keywords_matched=r.keywords_matched,
+                    city=r.city,
+                )
+                labels[row_id] = item.label
+                item = next(pending, None)
+
+            # Lag is sampled only while the cycle runs
+            probe = LoopLagProbe()
+            probe.start()
+            start = time.perf_counter()
+            incidents = await correlator.run_cycle()
+            latencies.append(time.perf_counter() - start)
+            await probe.stop()
+            lag.extend(probe.samples)
+            for incident in incidents:
+                for r in incident.new_reports or incident.reports:
+                    clusters[r.id] = incident.cluster_id
+                if incident.notification_type == "new":
+                    await db.mark_cluster_notified(incident.cluster_id)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        correlator.close()
+        await db.close()
+
+    return {
+        "labels": labels,
+        "clusters": clusters,
+        "latencies": latencies,
+        "loop_lag": lag,
+        "traces": correlator.traces.snapshot(),
+        "peak_bytes": peak,
+    }
+
+
+def cluster_quality(labels: dict[int, int], clusters: dict[int, int]) -> dict:
+    """Pairwise precision/recall of clustering plus incident-level rates.
+
+    Pairs are counted over all reports: a true pair shares an incident
+    label, a predicted pair shares a cluster. Incident recall is the share
+    of incidents with at least one alerted report; a false alert is a
+    cluster made only of background chatter.
+    """
+    members: dict[int, list[int]] = {}
+    for report_id, cluster_id in clusters.items():
+        members.setdefault(cluster_id, []).append(labels[report_id])
+
+    predicted_pairs = true_positive = 0
+    for cluster_labels in members.values():
+        for a, b in combinations(cluster_labels, 2):
+            predicted_pairs += 1
+            true_positive += a == b and a != NOISE
+    sizes = Counter(label for label in labels.values() if label != NOISE)
+    true_pairs = sum(n * (n - 1) // 2 for n in sizes.values())
+
+    alerted = {labels[r] for r in clusters} - {NOISE}
+    false_alerts = sum(
+        all(label == NOISE for label in cluster_labels)
+        for cluster_labels in members.values()
+    )
+    return {
+        "pair_precision": true_positive / predicted_pairs if predicted_pairs else 0.0,
+        "pair_recall": true_positive / true_pairs if true_pairs else 0.0,
+        "incident_recall": len(alerted) / len(sizes) if sizes else 0.0,
+        "clusters": len(members),
+        "false_alerts": false_alerts,
+    }
+
+
+def summarize(result: dict) -> dict:
+    latencies = np.asarray(result["latencies"]) * 1000
+    lag = np.asarray(result["loop_lag"] or [0.0]) * 1000
+    busy = [t for t in result["traces"] if t["reports_fetched"]]
+    return {
+        "cycles": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "lag_p99_ms": float(np.percentile(lag, 99)),
+        "lag_max_ms": float(lag.max()),
+        "max_window": max((t["window_size"] for t in result["traces"]), default=0),
+        "pairs_kept": sum(t["pairs_kept"] for t in busy),
+        "pairs_evaluated": sum(t["pairs_evaluated"] for t in busy),
+        **cluster_quality(result["labels"], result["clusters"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cities", nargs="*", default=["minneapolis", "chicago"],
+        choices=sorted(CITY_CENTERS),
+    )
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--incidents", type=int, default=15, help="per city")
+    parser.add_argument("--noise", type=int, default=30, help="chatter reports per city")
+    parser.add_argument("--near-duplicates", type=float, default=0.15)
+    parser.add_argument("--jitter-km", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=60, help="check interval, seconds")
+    parser.add_argument("--windows", type=int, nargs="*", default=[10800])
+    parser.add_argument("--budgets", type=int, nargs="*", default=[500])
+    parser.add_argument("--backend", default="tfidf")
+    parser.add_argument("--workers", type=int, default=0, help="scoring processes")
+    parser.add_argument("--engines", nargs="*", default=["linkage"],
+                        choices=list(CLUSTERING_ENGINES))
+    parser.add_argument("--fts-candidates", type=int, nargs="*", default=[0],
+                        help="BM25 matches scored per new report (0 = whole window)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    workload = generate(WorkloadConfig(
+        cities=tuple(args.cities),
+        duration_seconds=args.hours * 3600,
+        incidents_per_city=args.incidents,
+        noise_per_city=args.noise,
+        near_duplicate_rate=args.near_duplicates,
+        jitter_km=args.jitter_km,
+        seed=args.seed,
+    ))
+    print(
+        f"{len(workload)} reports, {len(args.cities)} cities, "
+        f"{len({lr.label for lr in workload} - {NOISE})} incidents over {args.hours:g}h\n"
+    )
+    header = (
+        f"{'engine':<8} {'fts':>4} {'window':>7} {'budget':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+        f"{'max ms':>7} {'lag p99':>7} {'lag max':>7} {'peak KiB':>9} {'window n':>8} {'precision':>9} "
+        f"{'recall':>7} {'incidents':>9} {'false':>5}"
+    )
+    print(header)
+    print("-" * len(header))
+    base = Config(db_path=":memory:", correlation_check_interval=args.interval,
+                  similarity_backend=args.backend, correlation_workers=args.workers)
+    grid = [
+        (e, k, w, b)
+        for e in args.engines for k in args.fts_candidates
+        for w in args.windows for b in args.budgets
+    ]
+    for engine, fts, window, budget in grid:
+        config = replace(
+            base,
+            clustering_engine=engine,
+            correlation_fts_candidates=fts,
+            correlation_window_seconds=window,
+            correlation_city_budget=budget,
+        )
+        s = summarize(asyncio.run(replay(workload, config)))
+        peak = 0
+        if not args.no_memory:
+            peak = asyncio.run(replay(workload, config, trace_memory=True))["peak_bytes"]
+        print(
+            f"{engine:<8} {fts:>4} {window:>7} {budget:>6} {s['p50_ms']:>7.1f} {s['p95_ms']:>7.1f} "
+            f"{s['p99_ms']:>7.1f} {s['max_ms']:>7.1f} {s['lag_p99_ms']:>7.1f} "
+            f"{s['lag_max_ms']:>7.1f} {peak / 1024:>9.0f} "
+            f"{s['max_window']:>8} {s['pair_precision']:>9.3f} "
+            f"{s['pair_recall']:>7.3f} {s['incident_recall']:>9.3f} "
+            f"{s['false_alerts']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
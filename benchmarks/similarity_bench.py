@@ -0,0 +1,105 @@
+"""Accuracy / throughput comparison of the content similarity backends.
+
+Scores every pair of a labeled synthetic corpus with each backend and
+reports precision and recall of "same incident" at the correlator's 0.40
+threshold, next to cost per 1k pairs and peak memory.
+
+Usage:
+    python -m benchmarks.similarity_bench
+    python -m benchmarks.similarity_bench --incidents 200 --threshold 0.35
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.corpus import labeled_texts
+from processing.similarity import SIMILARITY_BACKENDS, SimilarityEngine
+
+# Combined-score threshold used by Correlator._score_pairs
+CORRELATOR_THRESHOLD = 0.40
+
+
+def evaluate(
+    backend: str,
+    texts: list[str],
+    labels: list[int],
+    threshold: float,
+    repeats: int = 3,
+) -> dict:
+    """Return accuracy and cost figures for one backend."""
+    engine = SimilarityEngine(backend)
+    n = len(texts)
+    n_pairs = n * (n - 1) // 2
+
+    # Throughput: best of N full vectorize + pairwise runs
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        sim = engine.compute_sparse(texts)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    engine.compute_sparse(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Accuracy over every pair: positive = same incident
+    label_arr = np.asarray(labels)
+    rows, cols = np.triu_indices(n, k=1)
+    truth = label_arr[rows] == label_arr[cols]
+    scores = np.asarray(sim[rows, cols]).ravel()
+    predicted = scores >= threshold
+
+    tp = int(np.sum(predicted & truth))
+    fp = int(np.sum(predicted & ~truth))
+    fn = int(np.sum(~predicted & truth))
+    return {
+        "backend": backend,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "ms_per_1k_pairs": min(timings) * 1000 / n_pairs * 1000,
+        "peak_kib": peak / 1024,
+        "stored_pairs": sim.nnz,
+        "total_pairs": n_pairs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--incidents", type=int, default=60)
+    parser.add_argument("--per-incident", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=CORRELATOR_THRESHOLD)
+    parser.add_argument("--typo-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--backends", nargs="*", default=sorted(SIMILARITY_BACKENDS),
+        choices=sorted(SIMILARITY_BACKENDS),
+    )
+    args = parser.parse_args()
+
+    texts, labels = labeled_texts(
+        args.incidents, args.per_incident, seed=args.seed, typo_rate=args.typo_rate
+    )
+    print(
+        f"{len(texts)} reports, {len(set(labels))} incidents, "
+        f"threshold {args.threshold:.2f}\n"
+    )
+    header = f"{'backend':<10} {'precision':>9} {'recall':>7} {'ms/1k pairs':>12} {'peak KiB':>9} {'stored':>8}"
+    print(header)
+    print("-" * len(header))
+    for backend in args.backends:
+        r = evaluate(backend, texts, labels, args.threshold)
+        print(
+            f"{r['backend']:<10} {r['precision']:>9.3f} {r['recall']:>7.3f} "
+            f"{r['ms_per_1k_pairs']:>12.3f} {r['peak_kib']:>9.0f} "
+            f"{r['stored_pairs']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
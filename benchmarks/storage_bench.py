@@ -0,0 +1,435 @@
+"""Storage latency benchmark at realistic table sizes.
+
+Fills a scratch database with synthetic reports spread over the hot
+window, a small backlog of older ones not archived yet, and clusters and
+notifications in proportion: every 20th relevant report of a city starts
+a notified three-report cluster. Then, while producer tasks keep
+inserting and processing reports through the writer the way the
+processor does, times every public ``Database`` method and reports
+p50 / p99 latency, the ingest rate sustained alongside, and the size of
+the database, WAL and archive files. Methods that change the stored
+state wholesale (expiry scans, archiving, purging) run once, last.
+
+Run it before and after a schema, PRAGMA or index change.
+
+Usage:
+    python -m benchmarks.storage_bench
+    python -m benchmarks.storage_bench --sizes 10000 100000
+    python -m benchmarks.storage_bench --sizes 1000000 --repeats 50 --producers 8 --ingest-rate 0
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.corpus import PLACES, SOURCES, make_incident, render
+from benchmarks.workload import CITY_CENTERS
+from config import Config
+from storage.database import Database
+from storage.models import CorrelationWrites, NewCluster, RawReport
+
+CITIES = tuple(CITY_CENTERS)
+
+# Every CLUSTER_EVERY-th relevant report of a city starts a cluster of
+# CLUSTER_SIZE consecutive relevant reports from that city
+CLUSTER_EVERY = 20
+CLUSTER_SIZE = 3
+
+SEARCH_QUERIES = ['"lake street"', "raid", "detain*", '"white van"', "courthouse OR checkpoint"]
+
+REPORT_COLUMNS = (
+    "source_type, source_id, source_url, author, original_text, cleaned_text, "
+    "timestamp, collected_at, raw_metadata, is_relevant, primary_neighborhood, "
+    "latitude, longitude, keywords_matched, cluster_id, notified, expired, city, "
+    "created_at, timestamp_ms, collected_at_ms, created_at_ms"
+)
+
+FILL_BATCH = 10_000
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat()
+
+
+def _text_pool(rng: random.Random, size: int = 2000) -> list[str]:
+    """Report texts to draw from; repeats are fine at these table sizes."""
+    return [
+        render(make_incident(n, rng), rng.choice(SOURCES), rng, typo_rate=0.0)
+        for n in range(size)
+    ]
+
+
+def _located(city: str, rng: random.Random) -> tuple[str | None, float | None, float | None]:
+    """Neighborhood and coordinates, missing for a fifth of reports."""
+    if rng.random() < 0.2:
+        return None, None, None
+    lat, lon = CITY_CENTERS[city]
+    return rng.choice(PLACES), lat + rng.uniform(-0.05, 0.05), lon + rng.uniform(-0.05, 0.05)
+
+
+def fill(
+    path: str,
+    n_reports: int,
+    config: Config,
+    now: datetime,
+    relevant_rate: float = 0.3,
+    cold_rate: float = 0.05,
+    seed: int = 7,
+) -> dict:
+    """Bulk-load synthetic rows into the database at ``path``; returns row counts.
+
+    The schema must exist (connect and close a ``Database`` first). Rows
+    go in through a plain connection in batches, so the full-text
+    triggers index them the same way live writes are indexed.
+    """
+    rng = random.Random(seed)
+    texts = _text_pool(rng)
+    now_ms = round(now.timestamp() * 1000)
+    hot_ms = round(config.db_hot_hours * 3_600_000)
+    window_ms = config.correlation_window_seconds * 1000
+    n_cold = round(n_reports * cold_rate)
+    n_hot = n_reports - n_cold
+    # Cold reports fill the day before the hot window, hot ones the window
+    times = [now_ms - hot_ms - 86_400_000 + i * 86_400_000 // max(n_cold, 1)
+             for i in range(n_cold)]
+    times += [now_ms - hot_ms + i * hot_ms // max(n_hot, 1) for i in range(n_hot)]
+
+    relevant_seen = dict.fromkeys(CITIES, 0)
+    open_cluster: dict[str, int] = {}
+    clusters: dict[int, dict] = {}
+
+    conn = sqlite3.connect(path)
+    try:
+        for start in range(0, n_reports, FILL_BATCH):
+            rows = []
+            for i in range(start, min(start + FILL_BATCH, n_reports)):
+                collected_ms = times[i]
+                source = rng.choice(SOURCES)
+                text = rng.choice(texts)
+                relevant = rng.random() < relevant_rate
+                city = rng.choice(CITIES) if relevant else ""
+                neighborhood, lat, lon = _located(city, rng) if relevant else (None, None, None)
+                cluster_id = None
+                if relevant:
+                    seen = relevant_seen[city]
+                    relevant_seen[city] += 1
+                    if seen % CLUSTER_EVERY == 0:
+                        open_cluster[city] = len(clusters) + 1
+                        clusters[open_cluster[city]] = {
+                            "city": city, "location": neighborhood, "lat": lat, "lon": lon,
+                            "earliest": collected_ms, "types": set(),
+                        }
+                    if seen % CLUSTER_EVERY < CLUSTER_SIZE:
+                        cluster_id = open_cluster[city]
+                        cluster = clusters[cluster_id]
+                        cluster["latest"] = collected_ms
+                        cluster["types"].add(source)
+                notified = cluster_id is not None
+                expired = not notified and collected_ms < now_ms - window_ms
+                posted_ms = collected_ms - rng.randrange(600_000)
+                rows.append((
+                    source, f"bench-{i}", f"https://example.com/{source}/{i}",
+                    f"{source}-user{rng.randrange(500)}", text, text.lower(),
+                    _iso(posted_ms), _iso(collected_ms), "{}", int(relevant), neighborhood,
+                    lat, lon, json.dumps(["ice agents"] if relevant else []),
+                    cluster_id, int(notified), int(expired), city,
+                    _iso(collected_ms), posted_ms, collected_ms, collected_ms,
+                ))
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO raw_reports ({REPORT_COLUMNS}) "
+                    f"VALUES ({', '.join('?' * 22)})",
+                    rows,
+                )
+
+        with conn:
+            conn.executemany(
+                """INSERT INTO clusters
+                   (id, primary_location, latitude, longitude, confidence_score,
+                    source_count, unique_source_types, earliest_report, latest_report,
+                    notified, notified_at, city, created_at, latest_report_ms, created_at_ms)
+                   VALUES (?, ?, ?, ?, 0.7, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)""",
+                [
+                    (
+                        cluster_id, c["location"], c["lat"], c["lon"], len(c["types"]),
+                        json.dumps(sorted(c["types"])), _iso(c["earliest"]),
+                        _iso(c["latest"]), _iso(c["latest"] + 60_000), c["city"],
+                        _iso(c["earliest"]), c["latest"], c["earliest"],
+                    )
+                    for cluster_id, c in clusters.items()
+                ],
+            )
+            conn.executemany(
+                """INSERT INTO notifications
+                   (cluster_id, sent_at, embed_content, success, sent_at_ms)
+                   VALUES (?, ?, ?, 1, ?)""",
+                [
+                    (
+                        cluster_id,
+                        _iso(c["latest"] + 60_000),
+                        json.dumps({"title": f"ICE activity near {c['location']}",
+                                    "city": c["city"], "sources": sorted(c["types"])}),
+                        c["latest"] + 60_000,
+                    )
+                    for cluster_id, c in clusters.items()
+                ],
+            )
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return {"reports": n_reports, "clusters": len(clusters), "notifications": len(clusters)}
+
+
+def file_sizes(config: Config) -> dict[str, int]:
+    """Bytes on disk of the database, its WAL and the archive partitions."""
+    def size(path: str) -> int:
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    archive = Path(config.db_archive_dir or Path(config.db_path).parent / "archive")
+    return {
+        "db": size(config.db_path),
+        "wal": size(f"{config.db_path}-wal"),
+        "archive": sum(p.stat().st_size for p in archive.glob("*")) if archive.is_dir() else 0,
+    }
+
+
+async def _collect(reports: AsyncIterator) -> list:
+    return [r async for r in reports]
+
+
+class Ingest:
+    """Producer tasks inserting and processing new reports at a set rate."""
+
+    def __init__(self, db: Database, producers: int, rate: float, seed: int) -> None:
+        self.db = db
+        self.producers = producers
+        # Seconds between reports of one producer; 0 runs flat out
+        self.interval = producers / rate if rate > 0 else 0.0
+        self.rng = random.Random(seed)
+        self.texts = _text_pool(self.rng, 200)
+        self.count = 0
+        self._tasks: list[asyncio.Task] = []
+        self._started = 0.0
+
+    async def _run(self, worker: int) -> None:
+        n = 0
+        while True:
+            start = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            text = self.rng.choice(self.texts)
+            report_id = await self.db.insert_raw_report(RawReport(
+                source_type="bluesky",
+                source_id=f"live-{worker}-{n}",
+                source_url=f"https://example.com/live/{worker}/{n}",
+                author=f"live-user{self.rng.randrange(500)}",
+                text=text,
+                timestamp=now,
+                collected_at=now,
+            ))
+            relevant = self.rng.random() < 0.3
+            city = self.rng.choice(CITIES) if relevant else ""
+            neighborhood, lat, lon = _located(city, self.rng) if relevant else (None, None, None)
+            await self.db.update_report_processing(
+                report_id, text.lower(), relevant, neighborhood, lat, lon,
+                ["ice agents"] if relevant else [], city,
+            )
+            self.count += 1
+            n += 1
+            await asyncio.sleep(max(self.interval - (time.perf_counter() - start), 0))
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._run(w)) for w in range(self.producers)]
+
+    async def stop(self) -> float:
+        """Stop the producers; returns the reports per second they sustained."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self.count / (time.perf_counter() - self._started)
+
+
+async def measure(
+    config: Config,
+    repeats: int = 30,
+    producers: int = 4,
+    rate: float = 200.0,
+    seed: int = 7,
+) -> dict:
+    """Time every public Database method on the filled database at ``config.db_path``.
+
+    Returns ``{"samples": {method: [seconds, ...]}, "ingest_rate": reports/s}``.
+    """
+    samples: dict[str, list[float]] = {}
+    rng = random.Random(seed)
+
+    async def timed(name: str, call):
+        start = time.perf_counter()
+        result = await call
+        samples.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    db = Database(config)
+    await timed("connect", db.connect())
+    ingest = Ingest(db, producers, rate, seed)
+    ingest.start()
+    try:
+        now = datetime.now(timezone.utc)
+        window = now - timedelta(seconds=config.correlation_window_seconds)
+        week = now - timedelta(days=config.db_archive_retention_days)
+        cluster_ids = list(db.registry.clusters) or [0]
+
+        report_ids = []
+        for n in range(repeats):
+            report_ids.append(await timed("insert_raw_report", db.insert_raw_report(RawReport(
+                source_type="reddit",
+                source_id=f"timed-{n}",
+                source_url=f"https://example.com/timed/{n}",
+                author="timed-user",
+                text=rng.choice(SEARCH_QUERIES) + " reported by bench",
+                timestamp=now,
+                collected_at=now,
+            ))))
+        for report_id in report_ids:
+            city = rng.choice(CITIES)
+            neighborhood, lat, lon = _located(city, rng)
+            await timed("update_report_processing", db.update_report_processing(
+                report_id, "ice agents raid reported by bench", True,
+                neighborhood, lat, lon, ["ice agents"], city,
+            ))
+
+        for n in range(repeats):
+            await timed("get_correlation_cities", db.get_correlation_cities(window))
+            city = CITIES[n % len(CITIES)]
+            await timed("iter_recent_relevant", _collect(db.iter_recent_relevant(window, city)))
+            page = await _collect(db.iter_recent_relevant(window, city, limit=100))
+            await timed("load_report_texts", db.load_report_texts(page))
+            await timed("text_candidates", db.text_candidates(page[:1], window))
+            await timed("search_reports", db.search_reports(rng.choice(SEARCH_QUERIES), week))
+
+        for n, report_id in enumerate(report_ids):
+            stamp = datetime.now(timezone.utc)
+            [cluster_id] = await timed("apply_correlation_writes", db.apply_correlation_writes(
+                CorrelationWrites(new_clusters=[NewCluster(
+                    primary_location="Powderhorn", latitude=None, longitude=None,
+                    confidence_score=0.7, source_count=1, unique_source_types=["reddit"],
+                    earliest_report=stamp, latest_report=stamp, report_ids=[report_id],
+                    city=CITIES[n % len(CITIES)],
+                )])
+            ))
+            await timed("mark_cluster_notified", db.mark_cluster_notified(cluster_id))
+            await timed("log_notification", db.log_notification(
+                cluster_id, {"title": "bench", "report_ids": [report_id]}, success=True
+            ))
+
+        for n in range(repeats):
+            start = time.perf_counter()
+            db.is_source_notified("bluesky", f"bench-{rng.randrange(1_000_000)}")
+            samples.setdefault("is_source_notified", []).append(time.perf_counter() - start)
+            await timed("get_notified_cluster_report_ids",
+                        db.get_notified_cluster_report_ids(rng.choice(cluster_ids)))
+            await timed("get_active_clusters", db.get_active_clusters())
+            await timed("expire_due", db.expire_due())
+            await timed("storage_stats", db.storage_stats())
+            await timed("maintain", db.maintain())
+
+        # State-changing sweeps, once each
+        await timed("expire_old_reports", db.expire_old_reports(window))
+        await timed("expire_old_clusters", db.expire_old_clusters(config.cluster_expiry_hours))
+        await timed("archive_old_reports", db.archive_old_reports())
+        cold = now - timedelta(hours=config.db_hot_hours + 24)
+        await timed("iter_archived_reports", _collect(db.iter_archived_reports(cold, now)))
+        await timed("purge_old_data", db.purge_old_data(config.db_archive_retention_days))
+    finally:
+        ingest_rate = await ingest.stop()
+        await timed("close", db.close())
+    return {"samples": samples, "ingest_rate": ingest_rate}
+
+
+def summarize(samples: dict[str, list[float]]) -> list[dict]:
+    return [
+        {
+            "method": method,
+            "n": len(times),
+            "p50_ms": float(np.percentile(times, 50)) * 1000,
+            "p99_ms": float(np.percentile(times, 99)) * 1000,
+            "max_ms": max(times) * 1000,
+        }
+        for method, times in samples.items()
+    ]
+
+
+def _mib(n: int) -> str:
+    return f"{n / 2**20:.1f} MiB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000],
+                        help="raw_reports rows to fill")
+    parser.add_argument("--relevant", type=float, default=0.3, help="share of relevant reports")
+    parser.add_argument("--cold", type=float, default=0.05,
+                        help="share of reports older than the hot window, not archived yet")
+    parser.add_argument("--repeats", type=int, default=30, help="calls timed per method")
+    parser.add_argument("--producers", type=int, default=4, help="concurrent ingest tasks")
+    parser.add_argument("--ingest-rate", type=float, default=200.0,
+                        help="reports/s across producers (0 = flat out)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dir", default=None, help="scratch directory (default: a temp dir)")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+            config = Config(db_path=os.path.join(scratch, "bench.db"))
+
+            async def create_schema():
+                db = Database(config)
+                await db.connect()
+                await db.close()
+
+            asyncio.run(create_schema())
+            now = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            counts = fill(config.db_path, size, config, now, args.relevant, args.cold, args.seed)
+            filled = time.perf_counter() - start
+            before = file_sizes(config)
+            result = asyncio.run(measure(
+                config, args.repeats, args.producers, args.ingest_rate, args.seed
+            ))
+            after = file_sizes(config)
+
+            print(
+                f"{counts['reports']:,} reports, {counts['clusters']:,} clusters, "
+                f"{counts['notifications']:,} notifications (filled in {filled:.1f}s)"
+            )
+            print(
+                f"  before: db {_mib(before['db'])}, wal {_mib(before['wal'])}"
+                f"  after: db {_mib(after['db'])}, wal {_mib(after['wal'])}, "
+                f"archive {_mib(after['archive'])}"
+            )
+            print(f"  ingest alongside: {result['ingest_rate']:.0f} reports/s\n")
+            header = f"  {'method':<32} {'n':>4} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+            print(header)
+            print("  " + "-" * (len(header) - 2))
+            for s in summarize(result["samples"]):
+                print(
+                    f"  {s['method']:<32} {s['n']:>4} {s['p50_ms']:>9.2f} "
+                    f"{s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    main()
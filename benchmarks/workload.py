@@ -0,0 +1,164 @@
+"""Synthetic ProcessedReport streams with ground-truth incident labels.
+
+Incidents from ``benchmarks.corpus`` are placed in cities and expanded into
+bursts of reports from a weighted mix of sources, with coordinate jitter,
+reports missing coordinates, reposted near-duplicates, a finite author pool
+per source (so same-author pairs occur) and unrelated background chatter.
+Timestamps fall in the ``duration_seconds`` before ``end``.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.corpus import PLACES, SOURCES, make_incident, render
+from storage.models import ProcessedReport
+
+# Label of background reports that belong to no incident
+NOISE = -1
+
+CITY_CENTERS = {
+    "minneapolis": (44.9778, -93.2650),
+    "chicago": (41.8781, -87.6298),
+    "houston": (29.7604, -95.3698),
+    "denver": (39.7392, -104.9903),
+    "atlanta": (33.7490, -84.3880),
+    "boston": (42.3601, -71.0589),
+}
+
+_CHATTER = [
+    "Traffic is backed up on {place} again",
+    "Great tacos near {place} tonight",
+    "Anyone know why there are so many cops at {place}?",
+    "Community meeting at {place} on Thursday about rent",
+    "Lost dog near {place}, brown lab, answers to Max",
+]
+
+_KM_PER_DEGREE = 111.2
+
+
+@dataclass
+class WorkloadConfig:
+    cities: tuple[str, ...] = ("minneapolis", "chicago")
+    duration_seconds: float = 3 * 3600
+    incidents_per_city: int = 20
+    # Reports per incident, drawn uniformly from this range
+    burst_size: tuple[int, int] = (2, 6)
+    # Minutes over which an incident's reports trickle in (mean)
+    burst_minutes: float = 20.0
+    source_weights: dict[str, float] = field(default_factory=lambda: {
+        "iceout": 2.0, "stopice": 1.0, "bluesky": 3.0,
+        "twitter": 2.0, "reddit": 1.5, "rss": 0.5,
+    })
+    jitter_km: float = 0.8
+    no_coords_rate: float = 0.25
+    # Chance a report reposts an earlier report of the same incident
+    near_duplicate_rate: float = 0.15
+    authors_per_source: int = 30
+    # Background reports per city that belong to no incident
+    noise_per_city: int = 30
+    # Radius around the city center in which places are laid out
+    city_radius_km: float = 12.0
+    typo_rate: float = 0.02
+    seed: int = 7
+
+
+@dataclass
+class LabeledReport:
+    report: ProcessedReport
+    label: int
+
+
+def _offset(lat: float, lon: float, dy_km: float, dx_km: float) -> tuple[float, float]:
+    return (
+        lat + dy_km / _KM_PER_DEGREE,
+        lon + dx_km / (_KM_PER_DEGREE * math.cos(math.radians(lat))),
+    )
+
+
+def generate(
+    config: WorkloadConfig, end: datetime | None = None
+) -> list[LabeledReport]:
+    """Return a labeled report stream sorted by collection time."""
+    rng = random.Random(config.seed)
+    end = end or datetime.now(timezone.utc)
+    start = end - timedelta(seconds=config.duration_seconds)
+    sources = [s for s in SOURCES if config.source_weights.get(s, 0) > 0]
+    weights = [config.source_weights[s] for s in sources]
+    out: list[LabeledReport] = []
+    label = 0
+
+    def report(city, source, text, ts, place, lat, lon, n):
+        located = rng.random() >= config.no_coords_rate
+        return ProcessedReport(
+            id=None,
+            source_type=source,
+            source_id=f"{city}-{n}",
+            source_url="",
+            author=f"{source}-user{rng.randrange(config.authors_per_source)}",
+            original_text=text,
+            cleaned_text=text.lower(),
+            timestamp=ts,
+            collected_at=ts,
+            primary_neighborhood=place,
+            latitude=lat if located else None,
+            longitude=lon if located else None,
+            keywords_matched=["ice"],
+            is_relevant=True,
+            city=city,
+        )
+
+    for city in config.cities:
+        center = CITY_CENTERS[city]
+        places = {
+            place: _offset(
+                *center,
+                rng.uniform(-config.city_radius_km, config.city_radius_km),
+                rng.uniform(-config.city_radius_km, config.city_radius_km),
+            )
+            for place in PLACES
+        }
+        n = 0
+        for _ in range(config.incidents_per_city):
+            incident = make_incident(label, rng)
+            base_lat, base_lon = places[incident.place]
+            begin = rng.uniform(0, config.duration_seconds)
+            texts: list[str] = []
+            for _ in range(rng.randint(*config.burst_size)):
+                offset = min(
+                    begin + rng.expovariate(1 / (config.burst_minutes * 60)),
+                    config.duration_seconds,
+                )
+                source = rng.choices(sources, weights)[0]
+                if texts and rng.random() < config.near_duplicate_rate:
+                    text = rng.choice(texts)
+                else:
+                    text = render(incident, source, rng, config.typo_rate)
+                texts.append(text)
+                lat, lon = _offset(
+                    base_lat, base_lon,
+                    rng.gauss(0, config.jitter_km), rng.gauss(0, config.jitter_km),
+                )
+                ts = start + timedelta(seconds=offset)
+                out.append(LabeledReport(
+                    report(city, source, text, ts, incident.place, lat, lon, n), label
+                ))
+                n += 1
+            label += 1
+
+        for _ in range(config.noise_per_city):
+            place = rng.choice(PLACES)
+            lat, lon = places[place]
+            ts = start + timedelta(seconds=rng.uniform(0, config.duration_seconds))
+            source = rng.choices(sources, weights)[0]
+            text = rng.choice(_CHATTER).format(place=place)
+            out.append(LabeledReport(
+                report(city, source, text, ts, place, lat, lon, n), NOISE
+            ))
+            n += 1
+
+    out.sort(key=lambda lr: lr.report.collected_at)
+    return out
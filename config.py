@@ -70,14 +70,60 @@ class Config:
     correlation_window_seconds: int = 10800  # 3 hours
     min_corroboration_sources: int = 2
     similarity_threshold: float = 0.35
+    # Content similarity backend: tfidf, hashing, shingles or minhash
+    similarity_backend: str = "tfidf"
     geo_proximity_km: float = 3.0
     correlation_check_interval: int = 60
+    # Clustering engine: "linkage" (pair-score components) or "density"
+    clustering_engine: str = "linkage"
+    # Density engine: max time gap between neighbors, minimum neighborhood
+    # size (self included) of a core report, minimum content similarity
+    density_eps_seconds: int = 1800
+    density_min_samples: int = 2
+    density_min_content: float = 0.1
+    # Max new reports fetched per city per correlation cycle
+    correlation_city_budget: int = 500
+    # Worker processes for per-city pair scoring (0 = score in-process)
+    correlation_workers: int = 0
+    # Seconds a city's scoring job may take before it is retried next cycle
+    correlation_job_timeout: float = 30.0
+    # Correlation cycle timing traces kept in memory for dumping
+    correlation_trace_size: int = 100
+    # Score new reports only against the best N full-text (BM25) matches
+    # per report among the city's window, instead of the whole window
+    # (0 = whole window). Drops pairs linked by time and place alone.
+    correlation_fts_candidates: int = 0
+    # Off for ingest-only processes sharing a PostgreSQL database
+    correlation_enabled: bool = True
 
     # Cluster expiry - stops sending update notifications after this many hours
     cluster_expiry_hours: float = 6.0
 
-    # Database
+    # Database: "sqlite" (db_path), or "postgres" (database_url, with a
+    # pool of up to db_pool_size connections)
+    db_backend: str = "sqlite"
     db_path: str = "ice_monitor.db"
+    database_url: str = ""
+    db_pool_size: int = 10
+    # Group commit: max writes per transaction, and extra seconds the
+    # writer waits to fill a batch (0 = commit whatever queued up while
+    # the previous batch was committing). Also the most queued reports
+    # the processing loop takes at once
+    db_write_batch: int = 200
+    db_write_linger: float = 0.0
+    # Read-only connections for concurrent reads alongside the writer
+    db_read_connections: int = 4
+    # Idle-time maintenance: seconds between steps, freelist pages freed
+    # per step, and WAL size that triggers a TRUNCATE checkpoint
+    db_maintenance_interval: int = 60
+    db_vacuum_pages: int = 512
+    db_wal_truncate_mb: float = 64.0
+    # Hours of reports kept in the live database; older ones move to one
+    # archive file per day (default: "archive" next to the database),
+    # deleted after the retention period
+    db_hot_hours: float = 24.0
+    db_archive_dir: str = ""
+    db_archive_retention_days: int = 7
 
     # General
     log_level: str = "INFO"
@@ -141,10 +187,33 @@ def load_config() -> Config:
         correlation_window_seconds=_get_int("CORRELATION_WINDOW_SECONDS", 10800),
         min_corroboration_sources=_get_int("MIN_CORROBORATION_SOURCES", 2),
         similarity_threshold=_get_float("SIMILARITY_THRESHOLD", 0.35),
+        similarity_backend=os.getenv("SIMILARITY_BACKEND", "tfidf"),
         geo_proximity_km=_get_float("GEO_PROXIMITY_KM", 3.0),
         correlation_check_interval=_get_int("CORRELATION_CHECK_INTERVAL", 60),
+        clustering_engine=os.getenv("CLUSTERING_ENGINE", "linkage"),
+        density_eps_seconds=_get_int("DENSITY_EPS_SECONDS", 1800),
+        density_min_samples=_get_int("DENSITY_MIN_SAMPLES", 2),
+        density_min_content=_get_float("DENSITY_MIN_CONTENT", 0.1),
+        correlation_city_budget=_get_int("CORRELATION_CITY_BUDGET", 500),
+        correlation_workers=_get_int("CORRELATION_WORKERS", 0),
+        correlation_job_timeout=_get_float("CORRELATION_JOB_TIMEOUT", 30.0),
+        correlation_trace_size=_get_int("CORRELATION_TRACE_SIZE", 100),
+        correlation_fts_candidates=_get_int("CORRELATION_FTS_CANDIDATES", 0),
+        correlation_enabled=_get_bool("CORRELATION_ENABLED", True),
         cluster_expiry_hours=_get_float("CLUSTER_EXPIRY_HOURS", 6.0),
+        db_backend=os.getenv("DB_BACKEND", "sqlite"),
         db_path=os.getenv("DB_PATH", "ice_monitor.db"),
+        database_url=os.getenv("DATABASE_URL", ""),
+        db_pool_size=_get_int("DB_POOL_SIZE", 10),
+        db_write_batch=_get_int("DB_WRITE_BATCH", 200),
+        db_write_linger=_get_float("DB_WRITE_LINGER", 0.0),
+        db_read_connections=_get_int("DB_READ_CONNECTIONS", 4),
+        db_maintenance_interval=_get_int("DB_MAINTENANCE_INTERVAL", 60),
+        db_vacuum_pages=_get_int("DB_VACUUM_PAGES", 512),
+        db_wal_truncate_mb=_get_float("DB_WAL_TRUNCATE_MB", 64.0),
+        db_hot_hours=_get_float("DB_HOT_HOURS", 24.0),
+        db_archive_dir=os.getenv("DB_ARCHIVE_DIR", ""),
+        db_archive_retention_days=_get_int("DB_ARCHIVE_RETENTION_DAYS", 7),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         dry_run=_get_bool("DRY_RUN"),
     )
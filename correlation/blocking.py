@@ -0,0 +1,119 @@
+"""Spatio-temporal candidate generation for pair scoring.
+
+Instead of scoring every i<j pair, reports are put into blocks keyed by
+time bucket and grid cell, and only reports in the same or adjacent blocks
+are compared. The blocks are sized so no pair that could reach the
+correlator's threshold is lost:
+
+- Time buckets are one correlation window wide; pairs further apart than
+  the window score nothing, so adjacent buckets cover every live pair.
+- Grid cells are ``3 * geo_proximity_km`` wide. Two located reports
+  further apart than that get the minimum geo score (0.2) and cannot reach
+  the 0.40 threshold on time alone (0.30 + 0.35 * 0.2 = 0.37), so they
+  only qualify through shared content. Those pairs come from the sparse
+  content matrix and are passed in as ``extra_pairs``.
+- Reports without coordinates score on neighborhoods instead, which says
+  nothing about distance, so they go in a per-time-bucket fallback block
+  compared against every report in adjacent buckets.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from correlation.scoring import ReportArrays
+
+# Matches the Earth radius used by haversine_km
+_KM_PER_DEGREE_LAT = 2 * math.pi * 6371.0 / 360.0
+# Cells are padded slightly so grid rounding can never split a pair that
+# haversine_km puts inside the cell size
+_CELL_MARGIN = 1.05
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def candidate_pairs(
+    arrays: ReportArrays,
+    window_seconds: float,
+    cell_km: float,
+    start: int = 0,
+    extra_pairs: tuple[np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return index arrays ``(I, J)`` of candidate pairs, sorted and unique.
+
+    Every pair has ``I < J`` and ``J >= start``. ``extra_pairs`` (already
+    in that form) are always included. Work is per block, not per pair:
+    each block's new members are crossed with a neighbor block's members
+    as one array product.
+    """
+    n = len(arrays.timestamp)
+    found_i: list[np.ndarray] = []
+    found_j: list[np.ndarray] = []
+    if extra_pairs is not None:
+        found_i.append(np.asarray(extra_pairs[0], dtype=np.int64))
+        found_j.append(np.asarray(extra_pairs[1], dtype=np.int64))
+
+    if n >= 2 and start < n:
+        located = arrays.has_coords
+        # Longitude degrees shrink toward the poles; size cells for the
+        # highest latitude in the batch so every cell is at least cell_km wide
+        max_abs_lat = float(np.abs(arrays.latitude[located]).max()) if located.any() else 0.0
+        cos_lat = max(math.cos(math.radians(min(max_abs_lat, 89.0))), 1e-6)
+        lat_step = cell_km * _CELL_MARGIN / _KM_PER_DEGREE_LAT
+        lon_step = cell_km * _CELL_MARGIN / (_KM_PER_DEGREE_LAT * cos_lat)
+
+        bucket = np.floor(arrays.timestamp / window_seconds).astype(np.int64)
+        cell_y = np.zeros(n, dtype=np.int64)
+        cell_x = np.zeros(n, dtype=np.int64)
+        cell_y[located] = np.floor(arrays.latitude[located] / lat_step)
+        cell_x[located] = np.floor(arrays.longitude[located] / lon_step)
+
+        by_time: dict[int, list[int]] = defaultdict(list)
+        fallback: dict[int, list[int]] = defaultdict(list)
+        cells: dict[tuple[int, int, int], list[int]] = defaultdict(list)
+        for i, (b, y, x, has) in enumerate(zip(
+            bucket.tolist(), cell_y.tolist(), cell_x.tolist(), located.tolist()
+        )):
+            by_time[b].append(i)
+            if has:
+                cells[(b, y, x)].append(i)
+            else:
+                fallback[b].append(i)
+
+        blocks = {key: np.asarray(v, dtype=np.int64) for key, v in cells.items()}
+        fallback_blocks = {b: np.asarray(v, dtype=np.int64) for b, v in fallback.items()}
+        time_blocks = {b: np.asarray(v, dtype=np.int64) for b, v in by_time.items()}
+
+        def cross(new: np.ndarray, others: np.ndarray) -> None:
+            ii = np.tile(others, len(new))
+            jj = np.repeat(new, len(others))
+            keep = ii < jj
+            found_i.append(ii[keep])
+            found_j.append(jj[keep])
+
+        # Blocks are symmetric, so a pair of two new reports is found from
+        # the later one
+        for (b, y, x), members in blocks.items():
+            new = members[members >= start]
+            if not len(new):
+                continue
+            for nb in (b - 1, b, b + 1):
+                for dy in (-1, 0, 1):
+                    for dx in (-1, 0, 1):
+                        cross(new, blocks.get((nb, y + dy, x + dx), _EMPTY))
+                cross(new, fallback_blocks.get(nb, _EMPTY))
+        for b, members in fallback_blocks.items():
+            new = members[members >= start]
+            if not len(new):
+                continue
+            for nb in (b - 1, b, b + 1):
+                cross(new, time_blocks.get(nb, _EMPTY))
+
+    if not found_i:
+        return _EMPTY, _EMPTY
+    # Encode (i, j) as one integer to sort and deduplicate in a single pass
+    codes = np.unique(np.concatenate(found_i) * n + np.concatenate(found_j))
+    return codes // n, codes % n
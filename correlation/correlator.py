@@ -1,22 +1,55 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
+
 from config import Config
-from processing.location_extractor import haversine_km
+from correlation.density import neighbors_of
+from correlation.jobs import ScoringJob, ScoringResult, run_scoring_job
+from correlation.scoring import ReportArrays, score_pairs
+from correlation.state import CorrelationWindow
+from correlation.summary import ClusterSummary, content_vectors
+from correlation.trace import CycleTrace, TraceBuffer
 from processing.similarity import SimilarityEngine
-from storage.database import Database
-from storage.models import CorroboratedIncident, ProcessedReport
+from storage.backend import StorageBackend
+from storage.models import (
+    ClusterUpdate,
+    CorroboratedIncident,
+    CorrelationWrites,
+    NewCluster,
+    ProcessedReport,
+)
 
 logger = logging.getLogger(__name__)
 
+# Placeholder cluster_id for reports clustered this cycle whose cluster row
+# is created by the end-of-cycle write-back (SQLite ids start at 1)
+PENDING_CLUSTER_ID = 0
+
+# Lower combined-score threshold for joining an already-notified cluster
+UPDATE_THRESHOLD = 0.35
+
+# "linkage": connected components of the pair-score graph (default)
+# "density": DBSCAN over space, time and content (correlation/density.py)
+CLUSTERING_ENGINES = ("linkage", "density")
+
 # High-priority sources that can trigger single-source alerts
 # These are trusted community reporting platforms with real-time data
 # Iceout is the PRIMARY source - it has vetted real-time community reports
 HIGH_PRIORITY_SOURCES = {"iceout", "stopice"}
 
 
+def _pairs_dict(result: ScoringResult) -> dict[tuple[int, int], float]:
+    return dict(zip(zip(result.I.tolist(), result.J.tolist()), result.scores.tolist()))
+
+
 class Correlator:
     """Groups recent reports into clusters and checks corroboration thresholds.
 
@@ -25,107 +58,316 @@ class Correlator:
     - "update": new reports added to an already-notified incident
     """
 
-    def __init__(self, config: Config, db: Database):
+    def __init__(
+        self,
+        config: Config,
+        db: StorageBackend,
+        clock: Callable[[], datetime] | None = None,
+    ):
+        if config.clustering_engine not in CLUSTERING_ENGINES:
+            raise ValueError(
+                f"Unknown clustering engine {config.clustering_engine!r}; "
+                f"expected one of {', '.join(CLUSTERING_ENGINES)}"
+            )
         self.config = config
         self.db = db
-        self.similarity = SimilarityEngine()
+        # Source of "now" for the window cutoff; replays pass a simulated clock
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self.similarity = SimilarityEngine(config.similarity_backend)
+        # Reports, qualifying pairs and cluster membership persist across
+        # cycles; each cycle only loads and scores new arrivals.
+        self.window = CorrelationWindow()
+        # Active cluster id -> member ids when it was last matched against
+        # the whole unclustered window
+        self._cluster_checks: dict[int, frozenset[int]] = {}
+        # Active cluster id -> running summary of its window members
+        self._summaries: dict[int, ClusterSummary] = {}
+        # Writes collected during a cycle and flushed in one transaction,
+        # with the reports they cluster and the incidents awaiting ids
+        self._writes = CorrelationWrites()
+        self._assigned: list[ProcessedReport] = []
+        self._pending_incidents: list[CorroboratedIncident] = []
+        # Per-city scoring runs in worker processes when configured
+        self._pool: ProcessPoolExecutor | None = None
+        # Arrivals whose scoring job missed its deadline, retried next cycle
+        self._deferred: dict[str, list[ProcessedReport]] = {}
+        # Timing breakdown of the most recent cycles
+        self.traces = TraceBuffer(config.correlation_trace_size)
+
+    def close(self) -> None:
+        """Shut down the scoring worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
 
     async def run_cycle(self) -> list[CorroboratedIncident]:
         """Run one correlation cycle.
 
         Returns newly corroborated incidents AND updates to existing ones.
         Reports are grouped by city and correlated independently per city
-        to prevent cross-city clustering.
+        to prevent cross-city clustering. Only reports that arrived since
+        the previous cycle are scored against the in-memory window.
+        Every cycle's timing breakdown is kept in ``self.traces``.
         """
+        trace = CycleTrace()
+        start = time.perf_counter()
+        try:
+            incidents = await self._run_cycle(trace)
+            trace.incidents = len(incidents)
+            return incidents
+        finally:
+            trace.total = time.perf_counter() - start
+            trace.window_size = len(self.window)
+            self.traces.append(trace)
+            if trace.reports_fetched or trace.incidents:
+                logger.info("Correlation cycle: %s", trace.summary())
+
+    async def _run_cycle(self, trace: CycleTrace) -> list[CorroboratedIncident]:
         window = self.config.correlation_window_seconds
-        since = datetime.now(timezone.utc) - timedelta(seconds=window)
-
-        reports = await self.db.get_recent_relevant(since)
-        if not reports:
+        now = self._clock()
+        since = now - timedelta(seconds=window)
+
+        with trace.stage("fetch"):
+            evicted = self.window.evict(since)
+            if evicted:
+                logger.debug("Evicted %d reports from the correlation window", len(evicted))
+
+            # Fetch per city so a surge in one metro cannot crowd the others
+            # out; a city over its budget catches up on the next cycles.
+            # Cities are fetched concurrently, each on its own pooled read
+            # connection, and added to the window in city order.
+            budget = self.config.correlation_city_budget
+            cities = await self.db.get_correlation_cities(since)
+            batches = await asyncio.gather(*(
+                self._fetch_city(since, city, budget) for city in cities
+            ))
+            arrivals: list[ProcessedReport] = []
+            for city, reports in zip(cities, batches):
+                fetched = len(reports)
+                for report in reports:
+                    if self.window.add(report):
+                        arrivals.append(report)
+                trace.reports_fetched += fetched
+                if fetched >= budget:
+                    logger.warning(
+                        "City %s hit its correlation budget of %d reports; "
+                        "the rest follow next cycle",
+                        city or "(untagged)", budget,
+                    )
+        if not self.window:
+            self._deferred = {}
             logger.debug("No recent relevant reports to correlate")
             return []
 
-        logger.info("Correlating %d recent relevant reports", len(reports))
-
-        # Group reports by city for independent correlation
-        from collections import defaultdict
-        by_city: dict[str, list[ProcessedReport]] = defaultdict(list)
-        for r in reports:
-            by_city[r.city or ""].append(r)
-
-        all_incidents: list[CorroboratedIncident] = []
-
-        for city, city_reports in by_city.items():
-            if not city:
-                logger.debug("Skipping %d reports with no city tag", len(city_reports))
-                continue
+        with trace.stage("grouping"):
+            # Retry arrivals whose scoring missed the deadline last cycle
+            for deferred in self._deferred.values():
+                arrivals.extend(
+                    r for r in deferred if r.id in self.window and r.cluster_id is None
+                )
+            self._deferred = {}
 
-            incidents = await self._correlate_city(city, city_reports)
-            all_incidents.extend(incidents)
+            if arrivals:
+                logger.info(
+                    "Correlating %d new reports (%d in window)",
+                    len(arrivals),
+                    len(self.window),
+                )
 
-        return all_incidents
+            # Group new arrivals by city for independent correlation
+            by_city: dict[str, list[ProcessedReport]] = defaultdict(list)
+            for r in arrivals:
+                by_city[r.city or ""].append(r)
 
-    async def _correlate_city(
-        self, city: str, reports: list[ProcessedReport]
-    ) -> list[CorroboratedIncident]:
-        """Run correlation for a single city's reports."""
-        logger.info("Correlating %d reports for city: %s", len(reports), city)
-
-        # Separate reports into already-clustered and unclustered.
-        # Reports that are already notified but have no cluster_id are
-        # orphaned — they were notified in a previous run but their cluster
-        # was cleaned up. These should NOT be treated as unclustered.
-        unclustered = [
-            r for r in reports
-            if r.cluster_id is None
-        ]
-        clustered_by_id: dict[int, list[ProcessedReport]] = {}
-        for r in reports:
-            if r.cluster_id is not None:
-                clustered_by_id.setdefault(r.cluster_id, []).append(r)
+            # Active notified clusters, keyed by the city of their members
+            expiry_hours = getattr(self.config, "cluster_expiry_hours", 6.0)
+            active_clusters = await self.db.get_active_clusters(
+                max_age_hours=expiry_hours, now=now
+            )
+            members_by_cluster = self.window.clustered_by_id()
+            clusters_by_city: dict[str, list[dict]] = defaultdict(list)
+            for cluster_info in active_clusters:
+                members = members_by_cluster.get(cluster_info["id"])
+                if not members:
+                    continue
+                city = members[0].city or ""
+                clusters_by_city[city].append(cluster_info)
+                # A cluster that changed since it was last matched (newly
+                # notified, grown, or lost members to expiry) needs its city
+                # re-checked even without new arrivals.
+                if self._cluster_checks.get(cluster_info["id"]) != frozenset(
+                    r.id for r in members
+                ):
+                    by_city.setdefault(city, [])
+            active_ids = {c["id"] for c in active_clusters}
+            self._cluster_checks = {
+                cid: ids for cid, ids in self._cluster_checks.items() if cid in active_ids
+            }
+            self._summaries = {
+                cid: s for cid, s in self._summaries.items() if cid in active_ids
+            }
+            trace.cities = len(by_city)
+
+        with trace.stage("texts"):
+            # Only reports that reach content scoring need their texts: a
+            # city's unclustered reports once it has two of them or active
+            # clusters to match against, and the members of those clusters
+            scored: list[ProcessedReport] = []
+            for city in by_city:
+                if not city:
+                    continue
+                unclustered = self.window.unclustered(city)
+                if len(unclustered) >= 2 or clusters_by_city.get(city):
+                    scored.extend(unclustered)
+                for cluster_info in clusters_by_city.get(city, ()):
+                    scored.extend(members_by_cluster[cluster_info["id"]])
+            await self._load_texts(scored)
 
-        incidents: list[CorroboratedIncident] = []
+        all_incidents: list[CorroboratedIncident] = []
+        self._writes = CorrelationWrites()
+        self._assigned = []
+        self._pending_incidents = []
 
         # ── Phase 1: Check for updates to existing notified clusters ──
-        if unclustered:
-            update_incidents = await self._check_cluster_updates(
-                unclustered, clustered_by_id, reports, city=city
-            )
-            incidents.extend(update_incidents)
-
-        # Remove reports that were just assigned to clusters
-        still_unclustered = [r for r in unclustered if r.cluster_id is None]
+        fresh_by_city: dict[str, list[ProcessedReport]] = {}
+        with trace.stage("updates"):
+            for city, city_arrivals in by_city.items():
+                if not city:
+                    logger.debug("Skipping %d reports with no city tag", len(city_arrivals))
+                    continue
 
-        # ── Phase 2: Find new corroborated clusters among remaining ──
-        if len(still_unclustered) >= 2:
-            new_incidents = await self._find_new_clusters(still_unclustered, city=city)
-            incidents.extend(new_incidents)
+                logger.info("Correlating %d new reports for city: %s", len(city_arrivals), city)
+                if clusters_by_city.get(city):
+                    update_incidents = await self._check_cluster_updates(
+                        city_arrivals, members_by_cluster, clusters_by_city[city],
+                        city=city, trace=trace,
+                    )
+                    all_incidents.extend(update_incidents)
+
+                # Remove reports that were just assigned to clusters
+                fresh = [r for r in city_arrivals if r.cluster_id is None]
+                if fresh:
+                    fresh_by_city[city] = fresh
+
+        # ── Phase 2: Score new pairs, all cities in parallel ──
+        batches: dict[str, list[ProcessedReport]] = {}
+        jobs: dict[str, ScoringJob] = {}
+        fts_candidates = self.config.correlation_fts_candidates
+        for city, fresh in fresh_by_city.items():
+            fresh_ids = {r.id for r in fresh}
+            existing = [
+                r for r in self.window.unclustered(city) if r.id not in fresh_ids
+            ]
+            if fts_candidates and existing and self.config.clustering_engine == "linkage":
+                with trace.stage("fetch"):
+                    matches = await self.db.text_candidates(fresh, since, fts_candidates)
+                if matches is not None:
+                    existing = [r for r in existing if r.id in matches]
+            batches[city] = existing + fresh
+            if len(batches[city]) >= 2:
+                jobs[city] = self._scoring_job(city, batches[city], start=len(existing))
+        results = await self._run_scoring_jobs(jobs)
+        for result in results.values():
+            if result is not None:
+                trace.stages["vectorize"] += result.vectorize_seconds
+                trace.stages["scoring"] += result.scoring_seconds
+                trace.pairs_evaluated += result.candidates
+                trace.pairs_kept += len(result.scores)
+
+        with trace.stage("clustering"):
+            for city, fresh in fresh_by_city.items():
+                if city in jobs:
+                    if results.get(city) is None:
+                        self._deferred[city] = fresh
+                        continue
+                    result = results[city]
+                    if result.clusters is not None:
+                        new_incidents = await self._find_density_clusters(
+                            batches[city], result.clusters, jobs[city].start, city=city
+                        )
+                    else:
+                        new_incidents = await self._find_new_clusters(
+                            batches[city], _pairs_dict(result), fresh, city=city
+                        )
+                    all_incidents.extend(new_incidents)
+
+                # ── Phase 3: Single-source alerts from high-priority sources ──
+                still_unclustered = [r for r in fresh if r.cluster_id is None]
+                if still_unclustered:
+                    high_priority_incidents = await self._check_high_priority_singles(
+                        still_unclustered, city=city
+                    )
+                    all_incidents.extend(high_priority_incidents)
+
+        with trace.stage("writeback"):
+            await self._flush_writes()
+        with trace.stage("texts"):
+            # The notifier quotes every report, including single-source
+            # alerts that skipped content scoring
+            await self._load_texts([r for i in all_incidents for r in i.reports])
+        return all_incidents
 
-        # ── Phase 3: Single-source alerts from high-priority sources ──
-        still_unclustered = [r for r in still_unclustered if r.cluster_id is None]
-        if still_unclustered:
-            high_priority_incidents = await self._check_high_priority_singles(
-                still_unclustered, city=city
+    async def _load_texts(self, reports: list[ProcessedReport]) -> None:
+        missing = [r for r in reports if not r.text_loaded]
+        if missing:
+            await self.db.load_report_texts(missing)
+
+    async def _fetch_city(
+        self, since: datetime, city: str, budget: int
+    ) -> list[ProcessedReport]:
+        """One city's reports newer than its window watermark, up to ``budget``."""
+        return [
+            report
+            async for report in self.db.iter_recent_relevant(
+                since, city, after_seq=self.window.last_seqs.get(city, 0), limit=budget
             )
-            incidents.extend(high_priority_incidents)
+        ]
 
-        return incidents
+    async def _flush_writes(self) -> None:
+        """Persist the cycle's cluster writes and settle in-memory state.
+
+        On failure the cycle's assignments are undone in memory too, so the
+        same reports are retried on a later cycle.
+        """
+        if not self._writes:
+            return
+        try:
+            cluster_ids = await self.db.apply_correlation_writes(self._writes)
+        except Exception:
+            for r in self._assigned:
+                r.cluster_id = None
+            raise
+
+        for incident, cluster_id in zip(self._pending_incidents, cluster_ids):
+            incident.cluster_id = cluster_id
+            for r in incident.reports:
+                r.cluster_id = cluster_id
+        # Clustered reports no longer take part in pair linking
+        for r in self._assigned:
+            self.window.detach(r.id)
 
     async def _check_cluster_updates(
         self,
-        unclustered: list[ProcessedReport],
+        arrivals: list[ProcessedReport],
         clustered_by_id: dict[int, list[ProcessedReport]],
-        all_reports: list[ProcessedReport],
+        active_clusters: list[dict],
         city: str = "",
+        trace: CycleTrace | None = None,
     ) -> list[CorroboratedIncident]:
-        """Check if any unclustered reports match existing notified clusters."""
-        # Only get clusters that haven't expired (within cluster_expiry_hours)
-        expiry_hours = getattr(self.config, "cluster_expiry_hours", 6.0)
-        active_clusters = await self.db.get_active_clusters(max_age_hours=expiry_hours)
-        if not active_clusters:
-            return []
+        """Check if any unclustered reports match existing notified clusters.
 
+        New arrivals are matched against every active cluster. Older
+        unclustered reports were already matched on earlier cycles, so they
+        are only re-checked against clusters whose membership changed.
+        """
         incidents = []
+        window_unclustered: list[ProcessedReport] | None = None
+        vectors: dict[int, object] = {}
+
+        def vector(report: ProcessedReport):
+            if report.id not in vectors:
+                vectors[report.id] = content_vectors([report])
+            return vectors[report.id]
 
         for cluster_info in active_clusters:
             cluster_id = cluster_info["id"]
@@ -133,28 +375,36 @@ class Correlator:
             if not existing_reports:
                 continue
 
-            # Find unclustered reports that correlate with this cluster
-            new_matches = []
-            for report in unclustered:
-                if report.cluster_id is not None:
-                    continue  # Already assigned in this cycle
-
-                score = self._score_against_cluster(report, existing_reports)
-                if score >= 0.35:  # Lower threshold for updates
-                    new_matches.append(report)
+            member_ids = frozenset(r.id for r in existing_reports)
+            if self._cluster_checks.get(cluster_id) == member_ids:
+                candidates = arrivals
+            else:
+                if window_unclustered is None:
+                    window_unclustered = self.window.unclustered(city)
+                candidates = window_unclustered
+
+            # Matching is pure compute; keep it off the event loop
+            summary, new_matches = await asyncio.to_thread(
+                self._match_cluster, cluster_id, existing_reports, candidates, vector, trace
+            )
 
+            # Record only the members the candidates were checked against:
+            # older candidates have not seen reports joining now, so a
+            # grown cluster is re-checked on the next cycle
+            self._cluster_checks[cluster_id] = member_ids
             if not new_matches:
                 continue
 
             # Assign new reports to this cluster
             new_ids = [r.id for r in new_matches if r.id is not None]
-            if new_ids:
-                await self.db.assign_reports_to_cluster(new_ids, cluster_id)
-                for r in new_matches:
-                    r.cluster_id = cluster_id
+            for r in new_matches:
+                r.cluster_id = cluster_id
+                summary.add(r, vector(r))
+            self._assigned.extend(new_matches)
+            existing_reports.extend(new_matches)
+            all_cluster_reports = existing_reports
 
             # Build the update incident
-            all_cluster_reports = existing_reports + new_matches
             source_types = {r.source_type for r in all_cluster_reports}
             confidence = self._compute_confidence(all_cluster_reports, source_types)
 
@@ -173,27 +423,19 @@ class Correlator:
             lats = [r.latitude for r in all_cluster_reports if r.latitude is not None]
             lons = [r.longitude for r in all_cluster_reports if r.longitude is not None]
 
-            # Update cluster in DB
-            await self.db.update_cluster(
+            # Update cluster and mark new reports as notified
+            self._writes.updates.append(ClusterUpdate(
                 cluster_id=cluster_id,
                 confidence_score=confidence,
                 source_count=len(all_cluster_reports),
                 unique_source_types=list(source_types),
                 latest_report=max(timestamps),
-            )
-
-            # Mark new reports as notified
-            if new_ids:
-                for rid in new_ids:
-                    await self.db._db.execute(
-                        "UPDATE raw_reports SET notified = 1 WHERE id = ?",
-                        (rid,),
-                    )
-                await self.db._db.commit()
+                new_report_ids=new_ids,
+            ))
 
             incidents.append(CorroboratedIncident(
                 cluster_id=cluster_id,
-                reports=all_cluster_reports,
+                reports=list(all_cluster_reports),
                 primary_location=primary_location,
                 latitude=sum(lats) / len(lats) if lats else None,
                 longitude=sum(lons) / len(lons) if lons else None,
@@ -217,6 +459,97 @@ class Correlator:
 
         return incidents
 
+    def _match_cluster(
+        self,
+        cluster_id: int,
+        members: list[ProcessedReport],
+        candidates: list[ProcessedReport],
+        vector: Callable[[ProcessedReport], object],
+        trace: CycleTrace | None,
+    ) -> tuple[ClusterSummary, list[ProcessedReport]]:
+        """Return the cluster's summary and the candidates that join it.
+
+        Each candidate is bounded against the summary first; only close
+        calls are scored against every member.
+        """
+        summary = self._cluster_summary(cluster_id, members)
+        matches = []
+        for report in candidates:
+            if report.cluster_id is not None:
+                continue  # Already assigned in this cycle
+
+            if self.config.clustering_engine == "density":
+                if trace is not None:
+                    trace.update_candidates += 1
+                if self._joins_density_cluster(report, members, summary):
+                    matches.append(report)
+                continue
+
+            lower, upper = summary.bounds(
+                report,
+                vector(report),
+                self.config.correlation_window_seconds,
+                self.config.geo_proximity_km,
+            )
+            if trace is not None:
+                trace.update_candidates += 1
+            if upper < UPDATE_THRESHOLD:
+                continue
+            # Any one member's score is also a lower bound; try the latest
+            if lower < UPDATE_THRESHOLD and summary.latest is not None:
+                lower = self._score_against_cluster(report, [summary.latest])
+            if lower < UPDATE_THRESHOLD:
+                if trace is not None:
+                    trace.update_memberwise += 1
+                if self._score_against_cluster(report, members) < UPDATE_THRESHOLD:
+                    continue
+            matches.append(report)
+        return summary, matches
+
+    def _joins_density_cluster(
+        self,
+        report: ProcessedReport,
+        members: list[ProcessedReport],
+        summary: ClusterSummary,
+    ) -> bool:
+        """Whether ``report`` is a density neighbor of any cluster member."""
+        ts = report.timestamp.timestamp()
+        eps_seconds = self.config.density_eps_seconds
+        if summary.t_min - ts > eps_seconds or ts - summary.t_max > eps_seconds:
+            return False
+
+        arrays = ReportArrays.from_reports([report] + members)
+        near = neighbors_of(arrays, 0, self.config.geo_proximity_km, eps_seconds)
+        if not len(near):
+            return False
+        texts = [
+            members[k - 1].cleaned_text or members[k - 1].original_text
+            for k in near.tolist()
+        ] + [report.cleaned_text or report.original_text]
+        sim = self.similarity.compute_sparse(texts, start=len(near))
+        content = sim[:len(near), len(near)].toarray().ravel()
+        return bool((content >= self.config.density_min_content).any())
+
+    def _cluster_summary(
+        self, cluster_id: int, members: list[ProcessedReport]
+    ) -> ClusterSummary:
+        """Return the cluster's summary, brought in line with ``members``.
+
+        New members are folded in; if any member left the window the
+        summary is rebuilt, since maxima cannot be un-folded.
+        """
+        summary = self._summaries.get(cluster_id)
+        member_ids = {r.id for r in members}
+        if summary is None or summary.member_ids - member_ids:
+            summary = self._summaries[cluster_id] = ClusterSummary.build(members)
+        else:
+            added = [r for r in members if r.id not in summary.member_ids]
+            if added:
+                vectors = content_vectors(added)
+                for k, r in enumerate(added):
+                    summary.add(r, vectors[k])
+        return summary
+
     def _score_against_cluster(
         self,
         report: ProcessedReport,
@@ -226,35 +559,32 @@ class Correlator:
         if not cluster_reports:
             return 0.0
 
-        best_score = 0.0
-        window = self.config.correlation_window_seconds
-
-        for cr in cluster_reports:
-            # Skip same author
-            if report.author == cr.author and report.source_type == cr.source_type:
-                continue
-
-            # Temporal
-            time_diff = abs((report.timestamp - cr.timestamp).total_seconds())
-            if time_diff > window:
-                continue
-            temporal = 1.0 - (time_diff / window)
+        # Row 0 is the report; every member is paired against it
+        arrays = ReportArrays.from_reports([report] + cluster_reports)
+        J = np.arange(1, len(cluster_reports) + 1)
+        I = np.zeros_like(J)
 
-            # Geographic
-            geo = self._geo_score(report, cr)
-
-            # Content similarity (pairwise between just these two)
+        # Content similarity against every member that can still score,
+        # vectorized as one batch with the report last
+        window = self.config.correlation_window_seconds
+        dt = np.abs(arrays.timestamp[I] - arrays.timestamp[J])
+        live = np.flatnonzero((dt <= window) & (arrays.author[I] != arrays.author[J]))
+        content = np.zeros(len(J))
+        if len(live):
             texts = [
-                report.cleaned_text or report.original_text,
-                cr.cleaned_text or cr.original_text,
-            ]
-            sim_matrix = self.similarity.compute_pairwise(texts)
-            content = sim_matrix[0][1] if sim_matrix else 0.0
-
-            combined = 0.30 * temporal + 0.35 * geo + 0.35 * content
-            best_score = max(best_score, combined)
-
-        return best_score
+                cluster_reports[k].cleaned_text or cluster_reports[k].original_text
+                for k in live.tolist()
+            ] + [report.cleaned_text or report.original_text]
+            sim = self.similarity.compute_sparse(texts, start=len(live))
+            content[live] = sim[:len(live), len(live)].toarray().ravel()
+
+        _, _, combined = score_pairs(
+            arrays, I, J, content,
+            window_seconds=window,
+            proximity_km=self.config.geo_proximity_km,
+            threshold=0.0,
+        )
+        return float(combined.max()) if len(combined) else 0.0
 
     async def _check_high_priority_singles(
         self, reports: list[ProcessedReport], city: str = ""
@@ -268,11 +598,6 @@ class Correlator:
         logger.info("Checking %d reports for high-priority single-source alerts", len(reports))
         incidents = []
 
-        # Get all already-notified source_ids to prevent re-alerting on
-        # reports we've already sent notifications for (even if they have
-        # a new DB row due to _seen_ids eviction in the collector).
-        notified_sources = await self.db.get_notified_source_ids()
-
         for report in reports:
             logger.debug(
                 "  Checking report: [%s] cluster_id=%s id=%s",
@@ -287,9 +612,12 @@ class Correlator:
                 continue
 
             # Skip if this report was already notified (prevent flood on re-collection)
-            source_key = f"{report.source_type}:{report.source_id}"
-            if source_key in notified_sources:
-                logger.debug("    -> Skipping: already notified (source_key=%s)", source_key)
+            # (even if it has a new DB row due to _seen_ids eviction in the collector)
+            if self.db.is_source_notified(report.source_type, report.source_id):
+                logger.debug(
+                    "    -> Skipping: already notified (source_key=%s:%s)",
+                    report.source_type, report.source_id,
+                )
                 continue
 
             logger.info("    -> CREATING single-source alert for %s", report.source_type)
@@ -305,32 +633,8 @@ class Correlator:
             fallback = city_locale.fallback_location if city_locale else self.config.locale.fallback_location
             primary_location = report.primary_neighborhood or fallback
 
-            # Create cluster for this single report
-            report_ids = [report.id] if report.id is not None else []
-            cluster_id = await self.db.create_cluster(
-                primary_location=primary_location,
-                latitude=report.latitude,
-                longitude=report.longitude,
-                confidence_score=confidence,
-                source_count=1,
-                unique_source_types=list(source_types),
-                earliest_report=report.timestamp,
-                latest_report=report.timestamp,
-                city=city,
-            )
-
-            if report_ids:
-                await self.db.assign_reports_to_cluster(report_ids, cluster_id)
-                report.cluster_id = cluster_id
-                # Mark reports as notified to prevent zombie re-correlation
-                for rid in report_ids:
-                    await self.db._db.execute(
-                        "UPDATE raw_reports SET notified = 1 WHERE id = ?", (rid,)
-                    )
-                await self.db._db.commit()
-
             incident = CorroboratedIncident(
-                cluster_id=cluster_id,
+                cluster_id=PENDING_CLUSTER_ID,
                 reports=[report],
                 primary_location=primary_location,
                 latitude=report.latitude,
@@ -344,6 +648,8 @@ class Correlator:
                 new_reports=[report],
                 city=city,
             )
+            # Create cluster for this single report
+            self._queue_new_cluster(incident)
             incidents.append(incident)
 
             logger.info(
@@ -356,139 +662,148 @@ class Correlator:
         return incidents
 
     async def _find_new_clusters(
-        self, reports: list[ProcessedReport], city: str = ""
+        self,
+        reports: list[ProcessedReport],
+        pairs: dict[tuple[int, int], float],
+        arrivals: list[ProcessedReport],
+        city: str = "",
     ) -> list[CorroboratedIncident]:
-        """Find new corroborated clusters among unclustered reports."""
-        if len(reports) < 2:
-            return []
+        """Find new corroborated clusters involving newly arrived reports.
 
-        # Build pairwise scores
-        pairs = self._score_pairs(reports)
-
-        # Cluster via single-linkage
-        clusters = self._cluster(reports, pairs)
+        ``pairs`` are the qualifying pairs among ``reports`` (the city's
+        unclustered window) that involve an arrival. They join the
+        window's pair graph, and only the connected components touched by
+        an arrival are checked: components without an arrival were already
+        checked and can only have shrunk since.
+        """
+        for (i, j), score in pairs.items():
+            self.window.link(reports[i].id, reports[j].id, score)
 
-        # Filter for corroborated clusters
+        # Single-linkage clusters are the connected components of the graph
         incidents = []
-        for cluster_reports in clusters:
+        seen: set[int] = set()
+        for report in arrivals:
+            if report.id in seen or report.cluster_id is not None:
+                continue
+            cluster_reports = self.window.component(report.id)
+            seen.update(r.id for r in cluster_reports)
+            if len(cluster_reports) < 2:
+                continue
+
+            # Filter for corroborated clusters
             source_types = {r.source_type for r in cluster_reports}
             if len(source_types) < self.config.min_corroboration_sources:
                 continue
 
+            cluster_reports.sort(key=lambda r: r.timestamp, reverse=True)
             incident = await self._build_incident(cluster_reports, source_types, city=city)
             if incident is not None:
                 incidents.append(incident)
 
         return incidents
 
-    def _score_pairs(
-        self, reports: list[ProcessedReport]
-    ) -> dict[tuple[int, int], float]:
-        """Compute combined scores for all valid report pairs."""
-        n = len(reports)
-        window = self.config.correlation_window_seconds
-
-        # Pre-compute TF-IDF similarity matrix
-        texts = [r.cleaned_text or r.original_text for r in reports]
-        sim_matrix = self.similarity.compute_pairwise(texts)
-
-        scores: dict[tuple[int, int], float] = {}
-
-        for i in range(n):
-            for j in range(i + 1, n):
-                ri, rj = reports[i], reports[j]
-
-                # Skip same author (not independent)
-                if ri.author == rj.author and ri.source_type == rj.source_type:
-                    continue
-
-                # Temporal score
-                time_diff = abs((ri.timestamp - rj.timestamp).total_seconds())
-                if time_diff > window:
-                    continue
-                temporal_score = 1.0 - (time_diff / window)
-
-                # Geographic score
-                geo_score = self._geo_score(ri, rj)
-
-                # Content similarity
-                content_score = sim_matrix[i][j] if sim_matrix else 0.0
-
-                # Combined
-                combined = (
-                    0.30 * temporal_score
-                    + 0.35 * geo_score
-                    + 0.35 * content_score
-                )
-
-                if combined >= 0.40:
-                    scores[(i, j)] = combined
-
-        return scores
-
-    def _geo_score(self, a: ProcessedReport, b: ProcessedReport) -> float:
-        """Score geographic proximity between two reports."""
-        # Both have coordinates
-        if (
-            a.latitude is not None
-            and a.longitude is not None
-            and b.latitude is not None
-            and b.longitude is not None
-        ):
-            dist = haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)
-            if dist <= self.config.geo_proximity_km:
-                return 1.0
-            elif dist <= self.config.geo_proximity_km * 3:
-                return 0.5
-            return 0.2
-
-        # Both have neighborhoods
-        if a.primary_neighborhood and b.primary_neighborhood:
-            if a.primary_neighborhood == b.primary_neighborhood:
-                return 1.0
-            return 0.5  # different neighborhoods but both in locale area
-
-        # At least one has some locale reference (they passed keyword filter)
-        return 0.3
-
-    def _cluster(
+    async def _find_density_clusters(
         self,
         reports: list[ProcessedReport],
-        pairs: dict[tuple[int, int], float],
-    ) -> list[list[ProcessedReport]]:
-        """Single-linkage clustering based on qualifying pairs."""
-        n = len(reports)
+        clusters: list[np.ndarray],
+        start: int,
+        city: str = "",
+    ) -> list[CorroboratedIncident]:
+        """Build incidents from density clusters that contain a new arrival.
 
-        # Union-Find
-        parent = list(range(n))
+        ``clusters`` index into ``reports`` (the city's unclustered window,
+        arrivals from ``start``). Clusters of older reports only were
+        already checked on an earlier cycle.
+        """
+        incidents = []
+        for members in clusters:
+            if members.max() < start:
+                continue
+            cluster_reports = [reports[k] for k in members.tolist()]
 
-        def find(x: int) -> int:
-            while parent[x] != x:
-                parent[x] = parent[parent[x]]
-                x = parent[x]
-            return x
+            # Filter for corroborated clusters
+            source_types = {r.source_type for r in cluster_reports}
+            if len(source_types) < self.config.min_corroboration_sources:
+                continue
 
-        def union(x: int, y: int) -> None:
-            px, py = find(x), find(y)
-            if px != py:
-                parent[px] = py
+            cluster_reports.sort(key=lambda r: r.timestamp, reverse=True)
+            incident = await self._build_incident(cluster_reports, source_types, city=city)
+            if incident is not None:
+                incidents.append(incident)
 
-        for (i, j) in pairs:
-            union(i, j)
+        return incidents
 
-        # Group by root
-        groups: dict[int, list[int]] = {}
-        for idx in range(n):
-            root = find(idx)
-            groups.setdefault(root, []).append(idx)
+    def _scoring_job(
+        self, city: str, reports: list[ProcessedReport], start: int
+    ) -> ScoringJob:
+        return ScoringJob(
+            city=city,
+            arrays=ReportArrays.from_reports(reports),
+            texts=[r.cleaned_text or r.original_text for r in reports],
+            start=start,
+            backend=self.config.similarity_backend,
+            window_seconds=self.config.correlation_window_seconds,
+            proximity_km=self.config.geo_proximity_km,
+            engine=self.config.clustering_engine,
+            density_eps_seconds=self.config.density_eps_seconds,
+            density_min_samples=self.config.density_min_samples,
+            density_min_content=self.config.density_min_content,
+        )
+
+    def _score_pairs(
+        self, reports: list[ProcessedReport], start: int = 0
+    ) -> dict[tuple[int, int], float]:
+        """Compute combined scores for valid report pairs, in-process.
 
-        # Only return clusters with 2+ reports
-        clusters = []
-        for indices in groups.values():
-            if len(indices) >= 2:
-                clusters.append([reports[i] for i in indices])
+        Only pairs ``(i, j)`` with ``j >= start`` are scored, so passing
+        the index of the first new report skips pairs already scored on
+        earlier cycles. ``start=0`` scores every pair.
+        """
+        return _pairs_dict(run_scoring_job(self._scoring_job("", reports, start)))
+
+    async def _run_scoring_jobs(
+        self, jobs: dict[str, ScoringJob]
+    ) -> dict[str, ScoringResult | None]:
+        """Run scoring jobs and return each city's result.
+
+        With ``correlation_workers`` > 0 the jobs run concurrently in a
+        process pool, each with a ``correlation_job_timeout`` deadline, so
+        one busy city cannot hold up the others. A city whose job fails or
+        misses the deadline maps to None. Otherwise they run one at a time
+        in a worker thread, which keeps the event loop (Discord gateway,
+        collectors) responsive while NumPy and SciPy do the work.
+        """
+        if not jobs:
+            return {}
+        workers = self.config.correlation_workers
+        if workers <= 0:
+            return {
+                city: await asyncio.to_thread(run_scoring_job, job)
+                for city, job in jobs.items()
+            }
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+        loop = asyncio.get_running_loop()
+        timeout = self.config.correlation_job_timeout
+
+        async def run(city: str, job: ScoringJob):
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self._pool, run_scoring_job, job), timeout
+                )
+                return city, result
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Scoring %d reports for %s missed the %.0fs deadline; "
+                    "retrying next cycle",
+                    len(job.texts), city, timeout,
+                )
+            except Exception:
+                logger.exception("Scoring job for %s failed", city)
+            return city, None
 
-        return clusters
+        return dict(await asyncio.gather(*(run(c, j) for c, j in jobs.items())))
 
     async def _build_incident(
         self,
@@ -521,31 +836,8 @@ class Correlator:
         # Confidence score
         confidence = self._compute_confidence(reports, source_types)
 
-        # Persist cluster
-        report_ids = [r.id for r in reports if r.id is not None]
-        cluster_id = await self.db.create_cluster(
-            primary_location=primary_location,
-            latitude=avg_lat,
-            longitude=avg_lon,
-            confidence_score=confidence,
-            source_count=len(reports),
-            unique_source_types=list(source_types),
-            earliest_report=earliest,
-            latest_report=latest,
-            city=city,
-        )
-
-        if report_ids:
-            await self.db.assign_reports_to_cluster(report_ids, cluster_id)
-            # Mark reports as notified to prevent zombie re-correlation
-            for rid in report_ids:
-                await self.db._db.execute(
-                    "UPDATE raw_reports SET notified = 1 WHERE id = ?", (rid,)
-                )
-            await self.db._db.commit()
-
-        return CorroboratedIncident(
-            cluster_id=cluster_id,
+        incident = CorroboratedIncident(
+            cluster_id=PENDING_CLUSTER_ID,
             reports=reports,
             primary_location=primary_location,
             latitude=avg_lat,
@@ -559,6 +851,32 @@ class Correlator:
             new_reports=reports,
             city=city,
         )
+        # Persist cluster at the end of the cycle
+        self._queue_new_cluster(incident)
+        return incident
+
+    def _queue_new_cluster(self, incident: CorroboratedIncident) -> None:
+        """Queue a new cluster for write-back and mark its reports clustered.
+
+        The reports and the incident carry ``PENDING_CLUSTER_ID`` until
+        ``_flush_writes`` learns the real id.
+        """
+        self._writes.new_clusters.append(NewCluster(
+            primary_location=incident.primary_location,
+            latitude=incident.latitude,
+            longitude=incident.longitude,
+            confidence_score=incident.confidence_score,
+            source_count=incident.source_count,
+            unique_source_types=list(incident.unique_source_types),
+            earliest_report=incident.earliest_report,
+            latest_report=incident.latest_report,
+            report_ids=[r.id for r in incident.reports if r.id is not None],
+            city=incident.city,
+        ))
+        self._pending_incidents.append(incident)
+        for r in incident.reports:
+            r.cluster_id = PENDING_CLUSTER_ID
+        self._assigned.extend(incident.reports)
 
     def _compute_confidence(
         self,
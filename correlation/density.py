@@ -0,0 +1,139 @@
+"""Density-based spatio-temporal clustering (DBSCAN) for the correlator.
+
+The default engine links every pair whose combined score clears the
+threshold and takes connected components, so in a busy city a chain of
+loosely related reports can merge into one blob. This engine instead
+treats two reports as neighbors only when they are close in space *and*
+time *and* say similar things:
+
+1. Space: located reports within ``eps_km`` by haversine distance, found
+   with a BallTree. Reports without coordinates neighbor reports in the
+   same neighborhood.
+2. Time: the two reports are at most ``eps_seconds`` apart.
+3. Content refinement: the two texts' similarity is at least
+   ``min_content``, which cuts chains through unrelated chatter.
+
+Pairs by the same author on the same platform are never neighbors. A
+report with at least ``min_samples - 1`` neighbors is a core point;
+clusters are the connected cores plus any border reports they reach,
+as in DBSCAN.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import BallTree
+
+from correlation.scoring import ReportArrays, haversine_km
+
+_EARTH_RADIUS_KM = 6371.0
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def neighbor_pairs(
+    arrays: ReportArrays, eps_km: float, eps_seconds: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(I, J)`` with ``I < J`` of reports close in space and time."""
+    found_i: list[np.ndarray] = []
+    found_j: list[np.ndarray] = []
+
+    located = np.flatnonzero(arrays.has_coords)
+    if len(located) >= 2:
+        coords = np.radians(
+            np.column_stack([arrays.latitude[located], arrays.longitude[located]])
+        )
+        tree = BallTree(coords, metric="haversine")
+        for a, near in enumerate(tree.query_radius(coords, r=eps_km / _EARTH_RADIUS_KM)):
+            near = near[near > a]
+            found_i.append(np.full(len(near), located[a], dtype=np.int64))
+            found_j.append(located[near])
+
+    # Reports without coordinates fall back to matching neighborhoods
+    hood = arrays.neighborhood
+    for k in np.flatnonzero(~arrays.has_coords & (hood >= 0)).tolist():
+        same = np.flatnonzero(hood == hood[k])
+        same = same[same != k]
+        found_i.append(np.minimum(same, k))
+        found_j.append(np.maximum(same, k))
+
+    if not found_i:
+        return _EMPTY, _EMPTY
+    n = len(arrays.timestamp)
+    codes = np.unique(np.concatenate(found_i) * n + np.concatenate(found_j))
+    I, J = codes // n, codes % n
+
+    close = np.abs(arrays.timestamp[I] - arrays.timestamp[J]) <= eps_seconds
+    distinct = arrays.author[I] != arrays.author[J]
+    keep = close & distinct
+    return I[keep], J[keep]
+
+
+def neighbors_of(
+    arrays: ReportArrays, k: int, eps_km: float, eps_seconds: float
+) -> np.ndarray:
+    """Indices of the reports that are neighbors of report ``k``.
+
+    Same rules as ``neighbor_pairs``, brute force against one report; used
+    to decide whether a new report joins an existing cluster.
+    """
+    others = np.delete(np.arange(len(arrays.timestamp)), k)
+    near = (
+        (np.abs(arrays.timestamp[others] - arrays.timestamp[k]) <= eps_seconds)
+        & (arrays.author[others] != arrays.author[k])
+    )
+    both_located = arrays.has_coords[others] & arrays.has_coords[k]
+    if both_located.any():
+        dist = np.full(len(others), np.inf)
+        dist[both_located] = haversine_km(
+            arrays.latitude[k], arrays.longitude[k],
+            arrays.latitude[others[both_located]], arrays.longitude[others[both_located]],
+        )
+        spatial = dist <= eps_km
+    else:
+        spatial = np.zeros(len(others), dtype=bool)
+    hood = arrays.neighborhood
+    spatial |= ~both_located & (hood[k] >= 0) & (hood[others] == hood[k])
+    return others[near & spatial]
+
+
+def density_clusters(
+    n: int, I: np.ndarray, J: np.ndarray, min_samples: int
+) -> list[np.ndarray]:
+    """DBSCAN over the neighbor graph ``(I, J)``; clusters of 2+ indices.
+
+    Border reports within reach of several clusters join the first core
+    neighbor's cluster, as in scikit-learn's DBSCAN.
+    """
+    if not len(I):
+        return []
+    ones = np.ones(len(I), dtype=np.int8)
+    graph = sparse.coo_matrix((ones, (I, J)), shape=(n, n)).tocsr()
+    graph = (graph + graph.T).tocsr()
+    degree = np.diff(graph.indptr)
+    core = degree + 1 >= min_samples
+
+    labels = np.full(n, -1, dtype=np.int64)
+    core_idx = np.flatnonzero(core)
+    if not len(core_idx):
+        return []
+    _, core_labels = connected_components(
+        graph[core_idx][:, core_idx], directed=False
+    )
+    labels[core_idx] = core_labels
+
+    for k in np.flatnonzero(~core & (degree > 0)).tolist():
+        near = graph.indices[graph.indptr[k]:graph.indptr[k + 1]]
+        near = near[core[near]]
+        if len(near):
+            labels[k] = labels[near.min()]
+
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    splits = np.flatnonzero(np.diff(sorted_labels)) + 1
+    return [
+        members for members in np.split(order, splits)
+        if len(members) >= 2 and labels[members[0]] >= 0
+    ]
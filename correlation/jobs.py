@@ -0,0 +1,126 @@
+"""Per-city pair-scoring jobs.
+
+A job carries only plain arrays and texts, and ``run_scoring_job`` is a
+module-level function with no access to the database or the event loop,
+so jobs can be shipped to worker processes and their results merged back
+by the correlator.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from correlation.blocking import candidate_pairs
+from correlation.density import density_clusters, neighbor_pairs
+from correlation.scoring import ReportArrays, score_pairs
+from processing.similarity import SimilarityEngine
+
+# One engine per backend per process; engines hold no per-batch state
+_engines: dict[str, SimilarityEngine] = {}
+
+
+@dataclass
+class ScoringJob:
+    """Inputs for scoring one city's batch.
+
+    With the ``linkage`` engine, pairs ``(i, j)`` with ``j >= start`` are
+    scored: ``start`` is the index of the first new report, everything
+    before it was scored already. The ``density`` engine re-clusters the
+    whole batch.
+    """
+    city: str
+    arrays: ReportArrays
+    texts: list[str]
+    start: int
+    backend: str
+    window_seconds: float
+    proximity_km: float
+    engine: str = "linkage"
+    density_eps_seconds: float = 1800.0
+    density_min_samples: int = 2
+    density_min_content: float = 0.1
+
+
+@dataclass
+class ScoringResult:
+    """Qualifying pairs ``(I, J, scores)`` plus the job's own timings.
+
+    The density engine also returns its clusters as index arrays; its
+    pairs are the neighbor edges that survived content refinement.
+    """
+    I: np.ndarray
+    J: np.ndarray
+    scores: np.ndarray
+    candidates: int
+    vectorize_seconds: float
+    scoring_seconds: float
+    clusters: list[np.ndarray] | None = None
+
+
+def _engine(backend: str) -> SimilarityEngine:
+    engine = _engines.get(backend)
+    if engine is None:
+        engine = _engines[backend] = SimilarityEngine(backend)
+    return engine
+
+
+def run_scoring_job(job: ScoringJob) -> ScoringResult:
+    """Score a batch and return its qualifying pairs."""
+    if job.engine == "density":
+        return _run_density_job(job)
+    start = time.perf_counter()
+    # Sparse content similarities; absent pairs score 0.0
+    sim = _engine(job.backend).compute_sparse(job.texts, start=job.start).tocsr()
+    shared = sim.tocoo()
+    vectorized = time.perf_counter()
+
+    I, J = candidate_pairs(
+        job.arrays,
+        window_seconds=job.window_seconds,
+        cell_km=job.proximity_km * 3,
+        start=job.start,
+        extra_pairs=(shared.row, shared.col),
+    )
+    content = np.asarray(sim[I, J]).ravel() if len(I) else np.empty(0)
+
+    kept_i, kept_j, scores = score_pairs(
+        job.arrays,
+        I,
+        J,
+        content,
+        window_seconds=job.window_seconds,
+        proximity_km=job.proximity_km,
+    )
+    return ScoringResult(
+        I=kept_i,
+        J=kept_j,
+        scores=scores,
+        candidates=len(I),
+        vectorize_seconds=vectorized - start,
+        scoring_seconds=time.perf_counter() - vectorized,
+    )
+
+
+def _run_density_job(job: ScoringJob) -> ScoringResult:
+    start = time.perf_counter()
+    sim = _engine(job.backend).compute_sparse(job.texts).tocsr()
+    vectorized = time.perf_counter()
+
+    I, J = neighbor_pairs(job.arrays, job.proximity_km, job.density_eps_seconds)
+    content = np.asarray(sim[I, J]).ravel() if len(I) else np.empty(0)
+    keep = content >= job.density_min_content
+    clusters = density_clusters(
+        len(job.texts), I[keep], J[keep], job.density_min_samples
+    )
+    return ScoringResult(
+        I=I[keep],
+        J=J[keep],
+        scores=content[keep],
+        candidates=len(I),
+        vectorize_seconds=vectorized - start,
+        scoring_seconds=time.perf_counter() - vectorized,
+        clusters=clusters,
+    )
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from datetime import datetime
+
+from storage.models import ProcessedReport
+
+
+class CorrelationWindow:
+    """In-memory correlation state that survives between cycles.
+
+    Holds every report currently inside the correlation window, the
+    qualifying pair scores found among unclustered reports, and (through
+    each report's ``cluster_id``) cluster membership. Reports leave in
+    ``collected_at`` order via a min-heap, so eviction touches only the
+    reports that actually expire.
+    """
+
+    def __init__(self) -> None:
+        self.reports: dict[int, ProcessedReport] = {}
+        self.pair_scores: dict[tuple[int, int], float] = {}
+        self._neighbors: dict[int, set[int]] = {}
+        self._expiry: list[tuple[datetime, int]] = []
+        # Highest report ``seq`` loaded per city; each city's next fetch
+        # starts after its own watermark
+        self.last_seqs: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.reports)
+
+    def __contains__(self, report_id: int) -> bool:
+        return report_id in self.reports
+
+    def add(self, report: ProcessedReport) -> bool:
+        """Track a newly fetched report. Returns False if already known."""
+        if report.id is None or report.id in self.reports:
+            return False
+        self.reports[report.id] = report
+        heapq.heappush(self._expiry, (report.collected_at, report.id))
+        city = report.city or ""
+        if report.seq > self.last_seqs.get(city, 0):
+            self.last_seqs[city] = report.seq
+        return True
+
+    def evict(self, before: datetime) -> list[ProcessedReport]:
+        """Drop reports collected before ``before`` and return them."""
+        evicted = []
+        while self._expiry and self._expiry[0][0] < before:
+            _, report_id = heapq.heappop(self._expiry)
+            report = self.reports.pop(report_id, None)
+            if report is None:
+                continue
+            self.detach(report_id)
+            evicted.append(report)
+        return evicted
+
+    def link(self, a: int, b: int, score: float) -> None:
+        """Record a qualifying pair between two unclustered reports."""
+        key = (a, b) if a < b else (b, a)
+        self.pair_scores[key] = score
+        self._neighbors.setdefault(a, set()).add(b)
+        self._neighbors.setdefault(b, set()).add(a)
+
+    def detach(self, report_id: int) -> None:
+        """Forget every pair involving ``report_id``."""
+        for other in self._neighbors.pop(report_id, ()):
+            peers = self._neighbors.get(other)
+            if peers is not None:
+                peers.discard(report_id)
+                if not peers:
+                    del self._neighbors[other]
+            key = (report_id, other) if report_id < other else (other, report_id)
+            self.pair_scores.pop(key, None)
+
+    def component(self, report_id: int) -> list[ProcessedReport]:
+        """Connected unclustered reports reachable from ``report_id``.
+
+        Equivalent to the single-linkage cluster union-find would build
+        over all current pairs, but only walks the touched component.
+        """
+        seen = {report_id}
+        queue = deque([report_id])
+        members = []
+        while queue:
+            current = queue.popleft()
+            report = self.reports.get(current)
+            if report is None or report.cluster_id is not None:
+                continue
+            members.append(report)
+            for other in self._neighbors.get(current, ()):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+        return members
+
+    def unclustered(self, city: str) -> list[ProcessedReport]:
+        return [
+            r for r in self.reports.values()
+            if r.city == city and r.cluster_id is None
+        ]
+
+    def clustered_by_id(
+        self, city: str | None = None
+    ) -> dict[int, list[ProcessedReport]]:
+        """Clustered window reports grouped by cluster, optionally for one city."""
+        clustered: dict[int, list[ProcessedReport]] = {}
+        for r in self.reports.values():
+            if r.cluster_id is not None and (city is None or r.city == city):
+                clustered.setdefault(r.cluster_id, []).append(r)
+        return clustered
@@ -0,0 +1,174 @@
+"""Running summaries of active clusters for update matching.
+
+A report joins a notified cluster when its best score against any member
+reaches the update threshold. Scoring every member makes long-running
+incidents more expensive the more reports pile in, so each cluster keeps a
+summary instead: mean and element-wise max content vectors, coordinate
+centroid with a spread bound, time span, neighborhoods and authors. From it
+``bounds`` derives a lower and an upper bound on the best member score in
+constant time; only reports whose bounds straddle the threshold are scored
+member by member.
+
+Content vectors live in the hashing backend's space (L2-normalized,
+non-negative term frequencies), the only backend with stable per-text rows.
+For non-negative unit vectors the mean vector's dot product is the average
+member cosine and the max vector's dot product is at least every member
+cosine, so with ``SIMILARITY_BACKEND=hashing`` the bounds are exact; with
+other backends the content bounds are close estimates.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy import sparse
+
+from correlation.scoring import CONTENT_WEIGHT, GEO_WEIGHT, TEMPORAL_WEIGHT, haversine_km
+from processing.similarity import HashingBackend
+from storage.models import ProcessedReport
+
+_hasher: HashingBackend | None = None
+
+
+def content_vectors(reports: list[ProcessedReport]) -> sparse.csr_matrix:
+    global _hasher
+    if _hasher is None:
+        _hasher = HashingBackend()
+    return _hasher.vectorize([r.cleaned_text or r.original_text for r in reports])
+
+
+def _km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    return float(haversine_km(
+        np.float64(lat1), np.float64(lon1), np.float64(lat2), np.float64(lon2)
+    ))
+
+
+def _geo_for_distance(km: float, proximity_km: float) -> float:
+    if km <= proximity_km:
+        return 1.0
+    if km <= proximity_km * 3:
+        return 0.5
+    return 0.2
+
+
+class ClusterSummary:
+    """Aggregate view of one cluster's members in the correlation window."""
+
+    def __init__(self) -> None:
+        self.member_ids: set[int] = set()
+        self.vec_sum: sparse.csr_matrix | None = None
+        self.vec_max: sparse.csr_matrix | None = None
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.located = 0
+        # Upper bound on any located member's distance from the centroid
+        self.spread_km = 0.0
+        self.t_min: float = np.inf
+        self.t_max: float = -np.inf
+        self.hoods: set[str] = set()
+        self.authors: set[tuple[str, str]] = set()
+        # Most recent member; new arrivals usually score best against it
+        self.latest: ProcessedReport | None = None
+
+    @classmethod
+    def build(cls, members: list[ProcessedReport]) -> ClusterSummary:
+        summary = cls()
+        vectors = content_vectors(members)
+        for k, report in enumerate(members):
+            summary.add(report, vectors[k])
+        return summary
+
+    def __len__(self) -> int:
+        return len(self.member_ids)
+
+    def centroid(self) -> tuple[float, float] | None:
+        if not self.located:
+            return None
+        return self.lat_sum / self.located, self.lon_sum / self.located
+
+    def add(self, report: ProcessedReport, vector: sparse.csr_matrix) -> None:
+        """Fold one new member into the summary."""
+        if report.id in self.member_ids:
+            return
+        self.member_ids.add(report.id)
+        if self.vec_sum is None:
+            self.vec_sum = vector.copy()
+            self.vec_max = vector.copy()
+        else:
+            self.vec_sum = self.vec_sum + vector
+            self.vec_max = self.vec_max.maximum(vector)
+
+        if report.latitude is not None and report.longitude is not None:
+            old = self.centroid()
+            self.lat_sum += report.latitude
+            self.lon_sum += report.longitude
+            self.located += 1
+            lat, lon = self.centroid()
+            # Old members moved at most as far as the centroid did
+            shift = _km(*old, lat, lon) if old else 0.0
+            self.spread_km = max(
+                self.spread_km + shift, _km(report.latitude, report.longitude, lat, lon)
+            )
+
+        ts = report.timestamp.timestamp()
+        self.t_min = min(self.t_min, ts)
+        if ts >= self.t_max:
+            self.t_max = ts
+            self.latest = report
+        if report.primary_neighborhood:
+            self.hoods.add(report.primary_neighborhood)
+        self.authors.add((report.author, report.source_type))
+
+    def bounds(
+        self,
+        report: ProcessedReport,
+        vector: sparse.csr_matrix,
+        window_seconds: float,
+        proximity_km: float,
+    ) -> tuple[float, float]:
+        """Lower and upper bound on ``report``'s best member score.
+
+        Returns ``(0.0, 0.0)`` when no member can pair with the report
+        (all out of the time window or by the same author).
+        """
+        ts = report.timestamp.timestamp()
+        gap = max(self.t_min - ts, ts - self.t_max, 0.0)
+        far = max(abs(ts - self.t_min), abs(ts - self.t_max))
+        author = (report.author, report.source_type)
+        if not self.member_ids or gap > window_seconds or self.authors == {author}:
+            return 0.0, 0.0
+
+        n = len(self.member_ids)
+        content_max = min(float((vector @ self.vec_max.T).toarray()[0, 0]), 1.0)
+        content_mean = float((vector @ self.vec_sum.T).toarray()[0, 0]) / n
+
+        # Best geo any member can reach, and the worst it can fall to
+        hood_best = 0.3
+        if report.primary_neighborhood and self.hoods:
+            hood_best = 1.0 if report.primary_neighborhood in self.hoods else 0.5
+        geo_worst = 0.2
+        centroid = self.centroid()
+        if report.latitude is not None and report.longitude is not None and centroid:
+            d = _km(report.latitude, report.longitude, *centroid)
+            geo_best = _geo_for_distance(max(d - self.spread_km, 0.0), proximity_km)
+            if self.located < n:
+                geo_best = max(geo_best, hood_best)
+            else:
+                geo_worst = _geo_for_distance(d + self.spread_km, proximity_km)
+        else:
+            geo_best = hood_best
+
+        upper = (
+            TEMPORAL_WEIGHT * (1.0 - gap / window_seconds)
+            + GEO_WEIGHT * geo_best
+            + CONTENT_WEIGHT * content_max
+        )
+        # The best member scores at least the members' average, which only
+        # holds when every member can pair with the report
+        lower = 0.0
+        if far <= window_seconds and author not in self.authors:
+            lower = (
+                TEMPORAL_WEIGHT * (1.0 - far / window_seconds)
+                + GEO_WEIGHT * geo_worst
+                + CONTENT_WEIGHT * content_mean
+            )
+        return lower, upper
@@ -0,0 +1,86 @@
+"""Per-cycle timing traces for the correlator.
+
+Each ``run_cycle`` records a ``CycleTrace``: wall time per stage plus how
+many candidate pairs were scored and how many qualified. The last N traces
+are kept in a ``TraceBuffer`` that can be dumped as JSON lines.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+STAGES = (
+    "fetch", "grouping", "texts", "updates", "vectorize", "scoring", "clustering", "writeback",
+)
+
+
+@dataclass
+class CycleTrace:
+    """Timing breakdown of one correlation cycle, in seconds.
+
+    ``vectorize`` and ``scoring`` are summed over cities; with worker
+    processes they are CPU time spent in the workers, not wall time.
+    """
+    started_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat()
+    )
+    stages: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    total: float = 0.0
+    reports_fetched: int = 0
+    window_size: int = 0
+    cities: int = 0
+    pairs_evaluated: int = 0
+    pairs_kept: int = 0
+    # Cluster update candidates, and those too close to call from the
+    # cluster summary that were scored against every member
+    update_candidates: int = 0
+    update_memberwise: int = 0
+    incidents: int = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def summary(self) -> str:
+        parts = " ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.stages.items() if v)
+        return (
+            f"{self.total * 1000:.0f}ms total ({parts}); "
+            f"{self.reports_fetched} fetched, {self.window_size} in window, "
+            f"pairs {self.pairs_kept}/{self.pairs_evaluated} kept"
+        )
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent cycle traces."""
+
+    def __init__(self, size: int) -> None:
+        self._traces: deque[CycleTrace] = deque(maxlen=max(size, 1))
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def append(self, trace: CycleTrace) -> None:
+        self._traces.append(trace)
+
+    def snapshot(self) -> list[dict]:
+        return [asdict(t) for t in self._traces]
+
+    def dump(self, path: str | Path) -> int:
+        """Write the buffered traces as JSON lines. Returns the count."""
+        traces = self.snapshot()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            for trace in traces:
+                f.write(json.dumps(trace) + "\n")
+        return len(traces)
@@ -25,7 +25,7 @@ from collectors.rss_collector import RSSCollector
 from correlation.correlator import Correlator
 from notifications.discord_notifier import DiscordNotifier
 from processing.text_processor import clean_text, is_relevant, get_all_matched_keywords
-from storage.database import Database
+from storage.backend import create_database
 from storage.models import RawReport
 
 logger = logging.getLogger("ice_monitor")
@@ -51,7 +51,7 @@ class ICEMonitor:
 
     def __init__(self, config: Config):
         self.config = config
-        self.db = Database(config)
+        self.db = create_database(config)
         self.report_queue: asyncio.Queue[RawReport] = asyncio.Queue()
         self.collectors: list[BaseCollector] = []
         self.correlator = Correlator(config, self.db)
@@ -134,18 +134,13 @@ class ICEMonitor:
                 )
         return self._location_extractor
 
-    async def _process_report(self, report: RawReport) -> None:
-        """Process a single raw report: clean, filter, extract location, store."""
-        now = datetime.now(timezone.utc)
-
-        # Trusted community sources (iceout, stopice) are pre-validated as
-        # ICE-related and have structured location data — skip keyword filtering
-        is_trusted_source = report.source_type in ("iceout", "stopice")
+    def _is_stale(self, report: RawReport, now: datetime) -> bool:
+        """Freshness filter — stale reports are discarded.
 
-        # Freshness filter — discard stale reports
-        # Trusted sources get 6 hours (they're already vetted)
-        # Other sources get 3 hours
-        if is_trusted_source:
+        Trusted sources get 6 hours (they're already vetted), other
+        sources get 3 hours.
+        """
+        if report.source_type in ("iceout", "stopice"):
             max_age = timedelta(hours=6)
         else:
             max_age = timedelta(seconds=self.config.report_max_age_seconds)
@@ -157,12 +152,17 @@ class ICEMonitor:
                 report.timestamp.isoformat(),
                 max_age,
             )
-            return
+            return True
+        return False
 
-        # Insert into DB (deduplicates via UNIQUE constraint)
-        row_id = await self.db.insert_raw_report(report)
-        if row_id is None:
-            return  # Duplicate
+    def _analyze(self, report: RawReport) -> dict:
+        """Clean, filter, locate and tag one report.
+
+        Returns the ``update_report_processing`` fields for it.
+        """
+        # Trusted community sources (iceout, stopice) are pre-validated as
+        # ICE-related and have structured location data — skip keyword filtering
+        is_trusted_source = report.source_type in ("iceout", "stopice")
 
         # Clean and filter
         cleaned = clean_text(report.text)
@@ -216,17 +216,6 @@ class ICEMonitor:
         # Tag with city
         city = self._city_tagger.tag(cleaned, lat, lon) if relevant else ""
 
-        await self.db.update_report_processing(
-            report_id=row_id,
-            cleaned_text=cleaned,
-            is_relevant=relevant,
-            primary_neighborhood=neighborhood,
-            latitude=lat,
-            longitude=lon,
-            keywords_matched=keywords,
-            city=city,
-        )
-
         if relevant:
             logger.info(
                 "✓ RELEVANT: [%s] %s (location: %s, city: %s)",
@@ -241,15 +230,68 @@ class ICEMonitor:
                 report.source_type,
                 report.text[:60].replace('\n', ' '),
             )
+        return {
+            "cleaned_text": cleaned,
+            "is_relevant": relevant,
+            "primary_neighborhood": neighborhood,
+            "latitude": lat,
+            "longitude": lon,
+            "keywords_matched": keywords,
+            "city": city,
+        }
+
+    async def _process_reports(self, reports: list[RawReport]) -> None:
+        """Process queued reports: store, clean, filter, extract location, tag.
+
+        The inserts of the whole batch are submitted together, then the
+        processed fields, so the writer group-commits each step once
+        instead of once per report. Both are submitted in queue order and
+        the writer applies them in that order, so relevance is still set
+        in insertion order.
+        """
+        now = datetime.now(timezone.utc)
+        fresh = [r for r in reports if not self._is_stale(r, now)]
+
+        # Insert into DB (deduplicates via UNIQUE constraint)
+        row_ids = await asyncio.gather(
+            *(self.db.insert_raw_report(r) for r in fresh), return_exceptions=True
+        )
+        updates = []
+        for report, row_id in zip(fresh, row_ids):
+            if isinstance(row_id, Exception):
+                logger.error("Error storing report", exc_info=row_id)
+                continue
+            if row_id is None:
+                continue  # Duplicate
+            try:
+                fields = self._analyze(report)
+            except Exception:
+                logger.exception("Error processing report")
+                continue
+            updates.append(self.db.update_report_processing(report_id=row_id, **fields))
+
+        for result in await asyncio.gather(*updates, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error("Error storing processed report", exc_info=result)
 
     async def _processing_loop(self) -> None:
-        """Consume reports from the queue and process them."""
+        """Consume reports from the queue and process them.
+
+        Everything queued by the time a report arrives, up to a write
+        batch, is processed together.
+        """
         while not self._shutdown_event.is_set():
             try:
                 report = await asyncio.wait_for(
                     self.report_queue.get(), timeout=5.0
                 )
-                await self._process_report(report)
+                batch = [report]
+                while (
+                    len(batch) < self.config.db_write_batch
+                    and not self.report_queue.empty()
+                ):
+                    batch.append(self.report_queue.get_nowait())
+                await self._process_reports(batch)
             except asyncio.TimeoutError:
                 continue
             except asyncio.CancelledError:
@@ -293,6 +335,15 @@ class ICEMonitor:
                         pass  # Not on Linux
 
                 incidents = await self.correlator.run_cycle()
+
+                # Expire uncorroborated reports and stale clusters as
+                # their deadlines come due
+                expired_count, deleted_clusters = await self.db.expire_due()
+                if expired_count:
+                    logger.debug("Expired %d uncorroborated reports", expired_count)
+                if deleted_clusters:
+                    logger.info("Deleted %d expired clusters", deleted_clusters)
+
                 if not incidents:
                     continue
 
@@ -370,19 +421,6 @@ class ICEMonitor:
                         if sent_count < cycle_limit:
                             await asyncio.sleep(2)
 
-                # Expire old uncorroborated reports and stale clusters
-                expiry_cutoff = datetime.now(timezone.utc) - timedelta(
-                    seconds=self.config.correlation_window_seconds
-                )
-                expired_count = await self.db.expire_old_reports(expiry_cutoff)
-                if expired_count:
-                    logger.debug("Expired %d uncorroborated reports", expired_count)
-                deleted_clusters = await self.db.expire_old_clusters(
-                    self.config.cluster_expiry_hours
-                )
-                if deleted_clusters:
-                    logger.info("Deleted %d expired clusters", deleted_clusters)
-
             except asyncio.CancelledError:
                 break
             except Exception:
@@ -393,12 +431,42 @@ class ICEMonitor:
         while not self._shutdown_event.is_set():
             try:
                 await asyncio.sleep(14400)  # 4 hours
-                await self.db.purge_old_data(days=7)
+                await self.db.purge_old_data(days=self.config.db_archive_retention_days)
             except asyncio.CancelledError:
                 break
             except Exception:
                 logger.exception("Error in daily cleanup")
 
+    async def _storage_maintenance(self) -> None:
+        """Reclaim freed pages and checkpoint the WAL in small idle steps."""
+        runs = 0
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.sleep(self.config.db_maintenance_interval)
+                stats = await self.db.maintain(self.config.db_vacuum_pages)
+                if stats is None:
+                    continue  # Writes pending; try again next interval
+                runs += 1
+                # Log storage metrics every 10 steps, or when a step did real work
+                worked = stats["vacuumed_pages"] or stats["checkpoint"] == "TRUNCATE"
+                if runs % 10 == 0 or worked:
+                    logger.info(
+                        "Storage: %d pages (%d free), WAL %.1f MB; "
+                        "vacuumed %d pages, %s checkpoint %d/%d pages%s",
+                        stats["page_count"],
+                        stats["freelist_count"],
+                        stats["wal_bytes"] / 1e6,
+                        stats["vacuumed_pages"],
+                        stats["checkpoint"],
+                        stats["checkpointed_pages"],
+                        stats["wal_pages"],
+                        " (readers busy)" if stats["checkpoint_busy"] else "",
+                    )
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in storage maintenance")
+
     async def run(self) -> None:
         """Start all components and run until shutdown."""
         # Initialize locale-dependent geo keywords
@@ -470,16 +538,24 @@ class ICEMonitor:
             self._processing_loop(), name="processing"
         ))
 
-        # Correlation loop
-        tasks.append(asyncio.create_task(
-            self._correlation_loop(), name="correlation"
-        ))
+        # Correlation loop (one process per shared database)
+        if self.config.correlation_enabled:
+            tasks.append(asyncio.create_task(
+                self._correlation_loop(), name="correlation"
+            ))
+        else:
+            logger.info("Correlation disabled: ingest-only process")
 
         # Daily cleanup
         tasks.append(asyncio.create_task(
             self._daily_cleanup(), name="cleanup"
         ))
 
+        # Incremental vacuum and WAL checkpoints
+        tasks.append(asyncio.create_task(
+            self._storage_maintenance(), name="storage_maintenance"
+        ))
+
         logger.info("All tasks started. Press Ctrl+C to stop.")
 
         try:
@@ -532,6 +608,7 @@ class ICEMonitor:
             await asyncio.sleep(0.5)
             loop.set_exception_handler(_orig_handler)
 
+            self.correlator.close()
             await self.db.close()
             logger.info("Shutdown complete.")
 
@@ -574,9 +651,16 @@ def main() -> None:
         logger.info("Received signal %s, requesting shutdown...", sig)
         monitor.request_shutdown()
 
+    # Dump recent correlation cycle timings on demand: kill -USR1 <pid>
+    def _dump_traces(sig, frame):
+        path = "logs/correlation_traces.jsonl"
+        count = monitor.correlator.traces.dump(path)
+        logger.info("Dumped %d correlation cycle traces to %s", count, path)
+
     signal.signal(signal.SIGINT, _signal_handler)
     if sys.platform != "win32":
         signal.signal(signal.SIGTERM, _signal_handler)
+        signal.signal(signal.SIGUSR1, _dump_traces)
     else:
         signal.signal(signal.SIGBREAK, _signal_handler)
 
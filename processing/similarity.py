@@ -1,19 +1,149 @@
 from __future__ import annotations
 
 import logging
+from typing import Callable
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 
 logger = logging.getLogger(__name__)
 
+# Rows of the left operand scored per block. Bounds the temporary block
+# to block_size x N entries however large the window grows.
+_PRODUCT_BLOCK_ROWS = 256
 
-class SimilarityEngine:
-    """Compute text similarity using TF-IDF + cosine similarity.
+# Block scorer: (left rows, right rows) -> COO scores for every stored pair.
+_BlockScorer = Callable[[object, object], sparse.coo_matrix]
+
+
+def _blocked_scores(
+    score_block: _BlockScorer,
+    left,
+    right,
+    n_left: int,
+    n_right: int,
+    threshold: float,
+    block_size: int,
+    upper_only: bool,
+) -> sparse.csr_matrix:
+    """Run ``score_block`` over row blocks of ``left`` and keep strong pairs."""
+    rows, cols, data = [], [], []
+    for start in range(0, n_left, block_size):
+        stop = min(start + block_size, n_left)
+        block = score_block(left[start:stop], right)
+        keep = block.data > 0.0
+        if upper_only:
+            keep &= block.col > block.row + start
+        if threshold > 0.0:
+            keep &= block.data >= threshold
+        rows.append(block.row[keep] + start)
+        cols.append(block.col[keep])
+        data.append(block.data[keep])
+
+    if not rows:
+        return sparse.csr_matrix((n_left, n_right), dtype=np.float64)
+    return sparse.csr_matrix(
+        (
+            np.concatenate(data).astype(np.float64, copy=False),
+            (np.concatenate(rows), np.concatenate(cols)),
+        ),
+        shape=(n_left, n_right),
+    )
+
+
+def _cosine_block(left: sparse.csr_matrix, right: sparse.csr_matrix) -> sparse.coo_matrix:
+    return (left @ right.T).tocoo()
+
+
+def top_k_neighbors(
+    upper: sparse.csr_matrix, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the ``k`` best neighbors per row of an upper-triangular matrix.
+
+    Returns ``(indices, scores)`` arrays of shape ``(n, k)``, sorted by
+    descending score. Rows with fewer than ``k`` neighbors are padded with
+    index -1 and score 0.0.
+    """
+    n = upper.shape[0]
+    indices = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float64)
+    if n == 0 or k <= 0:
+        return indices, scores
 
-    Uses fresh vectorizer per call to avoid memory accumulation.
+    full = (upper + upper.T).tocsr()
+    for i in range(n):
+        start, stop = full.indptr[i], full.indptr[i + 1]
+        if start == stop:
+            continue
+        row_cols = full.indices[start:stop]
+        row_data = full.data[start:stop]
+        if len(row_data) > k:
+            best = np.argpartition(-row_data, k - 1)[:k]
+        else:
+            best = np.arange(len(row_data))
+        best = best[np.argsort(-row_data[best], kind="stable")]
+        indices[i, : len(best)] = row_cols[best]
+        scores[i, : len(best)] = row_data[best]
+    return indices, scores
+
+
+# ── Backends ─────────────────────────────────────────────────────────────
+
+
+class SimilarityBackend:
+    """Base class for a text representation plus its pair similarity.
+
+    ``vectorize`` turns texts into a row-indexable representation and
+    ``_score_block`` scores a block of rows against another set of rows.
+    Stateless backends encode each text independently of the batch, so
+    their rows can be cached and compared across cycles.
     """
 
+    name = ""
+    stateless = True
+
+    def vectorize(self, texts: list[str]):
+        raise NotImplementedError
+
+    def _score_block(self, left, right) -> sparse.coo_matrix:
+        raise NotImplementedError
+
+    def pairwise(
+        self, rep, n: int, threshold: float = 0.0,
+        block_size: int = _PRODUCT_BLOCK_ROWS,
+    ) -> sparse.csr_matrix:
+        """Upper-triangular similarities among the rows of ``rep``."""
+        if n < 2:
+            return sparse.csr_matrix((n, n), dtype=np.float64)
+        return _blocked_scores(
+            self._score_block, rep, rep, n, n, threshold, block_size,
+            upper_only=True,
+        )
+
+    def cross(
+        self, left, n_left: int, right, n_right: int, threshold: float = 0.0,
+        block_size: int = _PRODUCT_BLOCK_ROWS,
+    ) -> sparse.csr_matrix:
+        """Similarities of every row of ``left`` against every row of ``right``."""
+        if n_left == 0 or n_right == 0:
+            return sparse.csr_matrix((n_left, n_right), dtype=np.float64)
+        return _blocked_scores(
+            self._score_block, left, right, n_left, n_right, threshold,
+            block_size, upper_only=False,
+        )
+
+
+class TfidfBackend(SimilarityBackend):
+    """Word uni/bi-gram TF-IDF with cosine similarity (the original scorer).
+
+    IDF weights are fitted on each batch, so rows from different calls are
+    not comparable.
+    """
+
+    name = "tfidf"
+    stateless = False
+
     def _create_vectorizer(self) -> TfidfVectorizer:
         """Create a fresh vectorizer for each computation."""
         return TfidfVectorizer(
@@ -22,30 +152,189 @@ class SimilarityEngine:
             ngram_range=(1, 2),
         )
 
-    def compute_pairwise(self, texts: list[str]) -> list[list[float]]:
-        """Return NxN similarity matrix for a list of texts."""
-        if len(texts) < 2:
-            return []
+    def vectorize(self, texts: list[str]) -> sparse.csr_matrix:
         try:
             # Fresh vectorizer each time to prevent memory leak
             vectorizer = self._create_vectorizer()
-            tfidf_matrix = vectorizer.fit_transform(texts)
-            result = cosine_similarity(tfidf_matrix).tolist()
-            # Explicitly delete to help GC
-            del vectorizer, tfidf_matrix
-            return result
+            matrix = vectorizer.fit_transform(texts).tocsr()
+            del vectorizer
+            return matrix
         except ValueError:
             logger.warning("TF-IDF vectorization failed (empty vocabulary?)")
-            n = len(texts)
-            return [[0.0] * n for _ in range(n)]
+            return sparse.csr_matrix((len(texts), 1), dtype=np.float64)
+
+    def _score_block(self, left, right) -> sparse.coo_matrix:
+        return _cosine_block(left, right)
+
+
+class HashingBackend(SimilarityBackend):
+    """Word uni/bi-gram term frequencies hashed into a fixed space, cosine.
+
+    No vocabulary or IDF is fitted, so each text's row never changes.
+    """
+
+    name = "hashing"
+
+    def __init__(self, n_features: int = 2 ** 18):
+        self._vectorizer = HashingVectorizer(
+            stop_words="english",
+            ngram_range=(1, 2),
+            n_features=n_features,
+            alternate_sign=False,
+            norm="l2",
+        )
+
+    def vectorize(self, texts: list[str]) -> sparse.csr_matrix:
+        return self._vectorizer.transform(texts).tocsr()
+
+    def _score_block(self, left, right) -> sparse.coo_matrix:
+        return _cosine_block(left, right)
+
+
+class ShingleBackend(SimilarityBackend):
+    """Exact Jaccard similarity over character n-gram shingle sets.
+
+    Robust to the misspellings, hashtags and run-together words common in
+    social posts, which word tokens miss.
+    """
+
+    name = "shingles"
+
+    def __init__(self, shingle_size: int = 4, n_features: int = 2 ** 20):
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(shingle_size, shingle_size),
+            n_features=n_features,
+            alternate_sign=False,
+            binary=True,
+            norm=None,
+        )
+
+    def vectorize(self, texts: list[str]) -> sparse.csr_matrix:
+        return self._vectorizer.transform(texts).tocsr()
+
+    def _score_block(self, left, right) -> sparse.coo_matrix:
+        overlap = (left @ right.T).tocoo()
+        left_sizes = np.asarray(left.getnnz(axis=1), dtype=np.float64)
+        right_sizes = np.asarray(right.getnnz(axis=1), dtype=np.float64)
+        union = left_sizes[overlap.row] + right_sizes[overlap.col] - overlap.data
+        overlap.data = overlap.data / union
+        return overlap
+
+
+class MinHashBackend(ShingleBackend):
+    """MinHash estimate of shingle Jaccard using fixed-size signatures.
+
+    Each text becomes ``num_perm`` integers regardless of its length, and
+    similarity is the fraction of matching signature slots.
+    """
+
+    name = "minhash"
+
+    # Mersenne prime for the universal hash family (a * x + b) mod p
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        super().__init__(shingle_size=shingle_size)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self._PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, self._PRIME, size=num_perm, dtype=np.int64)
+
+    def vectorize(self, texts: list[str]) -> np.ndarray:
+        shingles = super().vectorize(texts)
+        n = shingles.shape[0]
+        # Empty texts keep the sentinel row and are never considered similar
+        signatures = np.full((n, len(self._a)), self._PRIME, dtype=np.int64)
+        if shingles.nnz == 0:
+            return signatures
+        hashed = (
+            np.outer(shingles.indices.astype(np.int64), self._a) + self._b
+        ) % self._PRIME
+        lengths = np.diff(shingles.indptr)
+        non_empty = np.flatnonzero(lengths)
+        signatures[non_empty] = np.minimum.reduceat(
+            hashed, shingles.indptr[non_empty], axis=0
+        )
+        return signatures
+
+    def _score_block(self, left, right) -> sparse.coo_matrix:
+        matches = (left[:, None, :] == right[None, :, :]).mean(axis=2)
+        empty_left = left[:, 0] == self._PRIME
+        empty_right = right[:, 0] == self._PRIME
+        matches[empty_left, :] = 0.0
+        matches[:, empty_right] = 0.0
+        return sparse.coo_matrix(matches)
+
+
+SIMILARITY_BACKENDS: dict[str, type[SimilarityBackend]] = {
+    TfidfBackend.name: TfidfBackend,
+    HashingBackend.name: HashingBackend,
+    ShingleBackend.name: ShingleBackend,
+    MinHashBackend.name: MinHashBackend,
+}
+
+
+def create_backend(name: str) -> SimilarityBackend:
+    """Instantiate a similarity backend by its config name."""
+    try:
+        return SIMILARITY_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown similarity backend {name!r}; "
+            f"choose from {', '.join(sorted(SIMILARITY_BACKENDS))}"
+        ) from None
+
+
+class SimilarityEngine:
+    """Compute text similarity with a configurable backend.
+
+    Defaults to TF-IDF + cosine similarity. Results are sparse: only pairs
+    with a non-zero score are ever stored.
+    """
+
+    def __init__(self, backend: str = "tfidf"):
+        self.backend = create_backend(backend)
+
+    @property
+    def stateless(self) -> bool:
+        return self.backend.stateless
+
+    def vectorize(self, texts: list[str]):
+        """Return the backend's row representation of ``texts``."""
+        return self.backend.vectorize(texts)
+
+    def compute_sparse(
+        self, texts: list[str], threshold: float = 0.0, start: int = 0
+    ) -> sparse.csr_matrix:
+        """Return an upper-triangular CSR matrix of pair similarities.
+
+        Entry ``(i, j)`` with ``i < j`` holds the similarity of ``texts[i]``
+        and ``texts[j]`` when it is non-zero and at least ``threshold``;
+        every other pair is implicitly 0.0. With ``start`` > 0 only pairs
+        where ``j >= start`` are scored, i.e. ``texts[start:]`` against
+        everything before and among themselves.
+        """
+        n = len(texts)
+        if n < 2 or start >= n:
+            return sparse.csr_matrix((n, n), dtype=np.float64)
+        rep = self.vectorize(texts)
+        if start <= 0:
+            return self.backend.pairwise(rep, n, threshold)
+
+        cross = self.backend.cross(rep[start:], n - start, rep, n, threshold).tocoo()
+        rows = cross.row + start
+        keep = cross.col < rows
+        return sparse.csr_matrix(
+            (cross.data[keep], (cross.col[keep], rows[keep])), shape=(n, n)
+        )
+
+    def top_k(
+        self, texts: list[str], k: int, threshold: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(indices, scores)`` of the ``k`` nearest texts per text."""
+        return top_k_neighbors(self.compute_sparse(texts, threshold), k)
 
     def score(self, text_a: str, text_b: str) -> float:
-        """Return cosine similarity between two texts."""
-        try:
-            vectorizer = self._create_vectorizer()
-            tfidf = vectorizer.fit_transform([text_a, text_b])
-            result = float(cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0])
-            del vectorizer, tfidf
-            return result
-        except ValueError:
-            return 0.0
+        """Return the similarity between two texts."""
+        pair = self.compute_sparse([text_a, text_b])
+        return float(pair[0, 1])
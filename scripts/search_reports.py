@@ -0,0 +1,49 @@
+"""Keyword search over stored reports, live and archived.
+
+Uses the full-text index, so a week of history is searched without
+scanning it. Queries use SQLite FTS5 syntax.
+
+Usage:
+    python -m scripts.search_reports "checkpoint"
+    python -m scripts.search_reports '"lake street" AND (raid OR detain*)' --days 3
+    python -m scripts.search_reports "courthouse" --city chicago --limit 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from config import load_config
+from storage.database import Database
+
+
+async def search(args: argparse.Namespace) -> None:
+    config = load_config()
+    db = Database(config)
+    await db.connect()
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=args.days)
+        reports = await db.search_reports(
+            args.query, since, city=args.city, limit=args.limit
+        )
+    finally:
+        await db.close()
+    for r in reports:
+        text = (r.cleaned_text or r.original_text).replace("\n", " ")
+        print(f"{r.collected_at:%Y-%m-%d %H:%M}  {r.city or '-':<12} {r.source_type:<10} {text[:100]}")
+    print(f"\n{len(reports)} report(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("query", help="FTS5 query")
+    parser.add_argument("--days", type=float, default=7.0, help="how far back to search")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--city", default="", help="only reports tagged with this city")
+    asyncio.run(search(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Daily archive partitions of ``raw_reports``.
+
+Reports older than the hot window are moved out of the live database into
+one SQLite file per UTC day of collection, ``reports-YYYY-MM-DD.db`` in
+the archive directory, so the live file only holds what correlation and
+notification still read. Retention deletes whole partition files instead
+of running large DELETEs. Partitions are opened only on demand, attached
+read-only.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+PARTITION_PREFIX = "reports-"
+
+DAY_MS = 86_400_000
+
+
+def day_of(epoch_ms: int) -> date:
+    """UTC calendar day of an epoch-millisecond time."""
+    return datetime.fromtimestamp(epoch_ms // 1000, timezone.utc).date()
+
+
+class ArchiveStore:
+    """Locates, lists and deletes the per-day partition files."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    def path_for(self, day: date) -> Path:
+        return self.directory / f"{PARTITION_PREFIX}{day.isoformat()}.db"
+
+    def partitions(
+        self, first: date | None = None, last: date | None = None
+    ) -> list[tuple[date, Path]]:
+        """Existing partitions, oldest first, optionally within [first, last]."""
+        found = []
+        for path in self.directory.glob(f"{PARTITION_PREFIX}*.db"):
+            try:
+                day = date.fromisoformat(path.stem[len(PARTITION_PREFIX):])
+            except ValueError:
+                continue  # Not a partition
+            if (first is None or day >= first) and (last is None or day <= last):
+                found.append((day, path))
+        return sorted(found)
+
+    def drop_before(self, day: date) -> list[date]:
+        """Delete partitions of days before ``day``. Returns the days dropped."""
+        dropped = []
+        for partition_day, path in self.partitions(last=day):
+            if partition_day >= day:
+                continue
+            for suffix in ("", "-journal", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+            dropped.append(partition_day)
+        return dropped
@@ -0,0 +1,170 @@
+"""Storage backend interface.
+
+``StorageBackend`` is what the monitor, the correlator and the notifier
+call; ``create_database`` picks the implementation from
+``config.db_backend``:
+
+- ``sqlite`` (default): ``storage.database.Database``, one file with a
+  single group-committing writer.
+- ``postgres``: ``storage.postgres.PostgresDatabase``, over an asyncpg
+  connection pool, so several monitor processes can share one database.
+  Needs the optional ``postgres`` dependencies.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from config import Config
+from storage.models import CorrelationWrites, ProcessedReport, RawReport
+from storage.registry import ClusterRegistry
+
+BACKENDS = ("sqlite", "postgres")
+
+
+class StorageBackend(ABC):
+    """Async storage for reports, clusters and notifications.
+
+    Subclasses keep ``registry`` loaded with the notified report keys, so
+    ``is_source_notified`` never queries the database.
+    """
+
+    registry: ClusterRegistry
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open connections and create or migrate the schema."""
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def insert_raw_report(self, report: RawReport) -> int | None:
+        """Insert a raw report. Returns the row id, or None if duplicate."""
+        ...
+
+    @abstractmethod
+    async def update_report_processing(
+        self,
+        report_id: int,
+        cleaned_text: str,
+        is_relevant: bool,
+        primary_neighborhood: str | None,
+        latitude: float | None,
+        longitude: float | None,
+        keywords_matched: list[str],
+        city: str = "",
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def get_correlation_cities(self, since: datetime) -> list[str]:
+        """Cities with relevant, un-expired reports collected since a cutoff."""
+        ...
+
+    @abstractmethod
+    def iter_recent_relevant(
+        self,
+        since: datetime,
+        city: str,
+        after_seq: int = 0,
+        limit: int = 500,
+    ) -> AsyncIterator[ProcessedReport]:
+        """Stream one city's relevant reports with ``seq > after_seq``, in seq order.
+
+        ``seq`` orders reports by when they became visible as relevant, so
+        a watermark on it never skips one that was processed late.
+        Reports come without texts (``text_loaded`` is False).
+        """
+        ...
+
+    @abstractmethod
+    async def load_report_texts(self, reports: list[ProcessedReport]) -> None:
+        """Fill in source URL, texts and keywords of lean reports, in place."""
+        ...
+
+    async def text_candidates(
+        self, reports: list[ProcessedReport], since: datetime, limit: int = 20
+    ) -> set[int] | None:
+        """Ids of unclustered reports whose text best matches each of ``reports``.
+
+        None when the backend has no full-text index.
+        """
+        return None
+
+    @abstractmethod
+    async def apply_correlation_writes(self, writes: CorrelationWrites) -> list[int]:
+        """Apply one correlation cycle's writes atomically; returns new cluster ids."""
+        ...
+
+    @abstractmethod
+    async def mark_cluster_notified(self, cluster_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def log_notification(
+        self,
+        cluster_id: int,
+        embed_content: dict,
+        success: bool,
+        error_message: str | None = None,
+    ) -> None:
+        ...
+
+    def is_source_notified(self, source_type: str, source_id: str) -> bool:
+        """Whether a report with this source key was already notified.
+
+        Used by the correlator to prevent re-alerting on reports that
+        were previously notified but got re-collected due to _seen_ids
+        eviction in the collector. Served from the in-memory registry.
+        """
+        return self.registry.is_notified(source_type, source_id)
+
+    @abstractmethod
+    async def get_notified_cluster_report_ids(self, cluster_id: int) -> set[int]:
+        ...
+
+    @abstractmethod
+    async def get_active_clusters(
+        self, max_age_hours: float = 6.0, now: datetime | None = None
+    ) -> list[dict]:
+        """Notified clusters whose latest report is within ``max_age_hours``."""
+        ...
+
+    @abstractmethod
+    async def expire_due(
+        self, now: datetime | None = None, batch_size: int = 200
+    ) -> tuple[int, int]:
+        """Expire stale reports and clusters. Returns ``(expired, deleted)``."""
+        ...
+
+    @abstractmethod
+    async def purge_old_data(self, days: int = 7) -> None:
+        ...
+
+    @abstractmethod
+    async def maintain(self, vacuum_pages: int = 512) -> dict | None:
+        """One idle-time maintenance step; returns storage stats, or None if skipped."""
+        ...
+
+
+def create_database(config: Config) -> StorageBackend:
+    """The storage backend selected by ``config.db_backend``."""
+    if config.db_backend == "postgres":
+        try:
+            from storage.postgres import PostgresDatabase
+        except ImportError as e:
+            raise RuntimeError(
+                "DB_BACKEND=postgres needs asyncpg: install the 'postgres' extra"
+            ) from e
+        return PostgresDatabase(config)
+    if config.db_backend != "sqlite":
+        raise ValueError(
+            f"Unknown DB_BACKEND {config.db_backend!r}; expected one of {', '.join(BACKENDS)}"
+        )
+    from storage.database import Database
+    return Database(config)
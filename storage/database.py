@@ -2,12 +2,23 @@ from __future__ import annotations
 
 import json
 import logging
-from datetime import datetime, timezone
+import os
+import re
+import sqlite3
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
 
 import aiosqlite
 
 from config import Config
-from storage.models import RawReport, ProcessedReport
+from storage.archive import DAY_MS, ArchiveStore, day_of
+from storage.backend import StorageBackend
+from storage.expiry import ExpiryScheduler
+from storage.models import CorrelationWrites, RawReport, ProcessedReport
+from storage.readers import ReaderPool
+from storage.registry import ClusterRegistry
+from storage.writer import Writer
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +44,9 @@ CREATE TABLE IF NOT EXISTS raw_reports (
     expired INTEGER DEFAULT 0,
     city TEXT DEFAULT '',
     created_at TEXT DEFAULT (datetime('now')),
+    timestamp_ms INTEGER,
+    collected_at_ms INTEGER,
+    created_at_ms INTEGER,
     UNIQUE(source_type, source_id)
 );
 
@@ -49,7 +63,9 @@ CREATE TABLE IF NOT EXISTS clusters (
     notified INTEGER DEFAULT 0,
     notified_at TEXT,
     city TEXT DEFAULT '',
-    created_at TEXT DEFAULT (datetime('now'))
+    created_at TEXT DEFAULT (datetime('now')),
+    latest_report_ms INTEGER,
+    created_at_ms INTEGER
 );
 
 CREATE TABLE IF NOT EXISTS notifications (
@@ -60,56 +76,395 @@ CREATE TABLE IF NOT EXISTS notifications (
     embed_content TEXT,
     success INTEGER DEFAULT 1,
     error_message TEXT,
+    sent_at_ms INTEGER,
     FOREIGN KEY (cluster_id) REFERENCES clusters(id)
 );
+"""
+
+# Integer epoch-millisecond copies of the ISO-8601 time columns, which
+# every time-range query and index uses instead of comparing strings
+EPOCH_COLUMNS = {
+    "raw_reports": {
+        "timestamp_ms": "timestamp",
+        "collected_at_ms": "collected_at",
+        "created_at_ms": "created_at",
+    },
+    "clusters": {"latest_report_ms": "latest_report", "created_at_ms": "created_at"},
+    "notifications": {"sent_at_ms": "sent_at"},
+}
+
+# Created after the migrations, since older databases lack the columns.
+# Each index is shaped after the queries it serves. Partial indexes hold
+# only the rows those queries can match; they also list the filtered and
+# selected columns, since SQLite only treats an index as covering when
+# every column the query mentions is in it. Superseded indexes are dropped.
+INDEX_SQL = """
+DROP INDEX IF EXISTS idx_raw_reports_correlation;
+DROP INDEX IF EXISTS idx_raw_reports_city_window;
+DROP INDEX IF EXISTS idx_raw_reports_window;
+DROP INDEX IF EXISTS idx_raw_reports_expiry;
+DROP INDEX IF EXISTS idx_clusters_latest;
+-- Duplicated the UNIQUE(source_type, source_id) index
+DROP INDEX IF EXISTS idx_raw_reports_source;
+-- Reports are archived by collection time rather than purged
+DROP INDEX IF EXISTS idx_raw_reports_created;
+
+-- Correlation fetch: one city's new arrivals past its id watermark.
+-- Also covers the list of cities in the window, which SQLite answers by
+-- skipping from one city to the next
+CREATE INDEX IF NOT EXISTS idx_raw_reports_live_city
+    ON raw_reports(city, id, collected_at_ms, expired, is_relevant)
+    WHERE expired = 0 AND is_relevant = 1;
+
+-- Report expiry, and seeding the expiry scheduler
+CREATE INDEX IF NOT EXISTS idx_raw_reports_pending
+    ON raw_reports(collected_at_ms, notified, expired)
+    WHERE notified = 0 AND expired = 0;
 
-CREATE INDEX IF NOT EXISTS idx_raw_reports_correlation
-    ON raw_reports(is_relevant, notified, expired, collected_at);
+-- Notified report keys loaded into the cluster registry
+CREATE INDEX IF NOT EXISTS idx_raw_reports_notified_keys
+    ON raw_reports(source_type, source_id, notified)
+    WHERE notified = 1;
 
-CREATE INDEX IF NOT EXISTS idx_raw_reports_source
-    ON raw_reports(source_type, source_id);
+-- Reports of one cluster
+CREATE INDEX IF NOT EXISTS idx_raw_reports_cluster
+    ON raw_reports(cluster_id, notified)
+    WHERE cluster_id IS NOT NULL;
+
+-- Notified clusters: registry load and cluster expiry
+CREATE INDEX IF NOT EXISTS idx_clusters_notified
+    ON clusters(latest_report_ms)
+    WHERE notified = 1;
+
+-- Archiving
+CREATE INDEX IF NOT EXISTS idx_raw_reports_collected ON raw_reports(collected_at_ms);
+
+-- Purge
+CREATE INDEX IF NOT EXISTS idx_clusters_created ON clusters(created_at_ms);
+CREATE INDEX IF NOT EXISTS idx_notifications_sent ON notifications(sent_at_ms);
 """
 
+# Full-text index over the cleaned text of relevant reports, kept in sync
+# by triggers. It is an external-content table: it holds only the index
+# and reads texts from raw_reports. Since only relevant reports are
+# indexed, it must never be 'rebuild'-ed, which would index every row.
+FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS raw_reports_fts USING fts5(
+    cleaned_text, content='raw_reports', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS raw_reports_fts_insert AFTER INSERT ON raw_reports
+WHEN new.is_relevant = 1 AND new.cleaned_text IS NOT NULL
+BEGIN
+    INSERT INTO raw_reports_fts(rowid, cleaned_text) VALUES (new.id, new.cleaned_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS raw_reports_fts_delete AFTER DELETE ON raw_reports
+WHEN old.is_relevant = 1 AND old.cleaned_text IS NOT NULL
+BEGIN
+    INSERT INTO raw_reports_fts(raw_reports_fts, rowid, cleaned_text)
+    VALUES ('delete', old.id, old.cleaned_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS raw_reports_fts_update
+AFTER UPDATE OF cleaned_text, is_relevant ON raw_reports
+BEGIN
+    INSERT INTO raw_reports_fts(raw_reports_fts, rowid, cleaned_text)
+    SELECT 'delete', old.id, old.cleaned_text
+    WHERE old.is_relevant = 1 AND old.cleaned_text IS NOT NULL;
+    INSERT INTO raw_reports_fts(rowid, cleaned_text)
+    SELECT new.id, new.cleaned_text
+    WHERE new.is_relevant = 1 AND new.cleaned_text IS NOT NULL;
+END;
+"""
+
+# Indexes the relevant reports of a database whose full-text table is new
+FTS_BACKFILL_SQL = """INSERT INTO {schema}.raw_reports_fts(rowid, cleaned_text)
+    SELECT id, cleaned_text FROM {schema}.raw_reports
+    WHERE is_relevant = 1 AND cleaned_text IS NOT NULL"""
+
+# Analyst keyword search, best BM25 match first
+SEARCH_SQL = """SELECT r.*, f.rank AS score
+    FROM {schema}.raw_reports_fts AS f
+    JOIN {schema}.raw_reports AS r ON r.id = f.rowid
+    WHERE f.raw_reports_fts MATCH ?
+      AND r.collected_at_ms >= ? AND r.collected_at_ms < ?
+      AND (? = '' OR r.city = ?)
+    ORDER BY f.rank
+    LIMIT ?"""
+
+# Terms of a report's text used to look up similar reports
+MATCH_TERMS = 32
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Columns of the cluster rows the correlator matches updates against
+ACTIVE_CLUSTER_COLUMNS = """id, primary_location, latitude, longitude,
+    confidence_score, source_count, unique_source_types,
+    earliest_report, latest_report, latest_report_ms, city"""
+
+
+# Columns correlation needs for every report in its window, in the order
+# ``_lean_row_to_report`` unpacks them; texts are loaded separately
+LEAN_REPORT_COLUMNS = """id, source_type, source_id, author, timestamp,
+    collected_at, primary_neighborhood, latitude, longitude, cluster_id, city"""
+
+# Ids per ``load_report_texts`` query
+TEXT_LOAD_BATCH = 500
+
+
+def epoch_ms(moment: datetime) -> int:
+    """Epoch milliseconds of ``moment``; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return round(moment.timestamp() * 1000)
+
+
+def _now_ms() -> int:
+    return epoch_ms(datetime.now(timezone.utc))
+
+
+def _match_any(text: str) -> str | None:
+    """FTS5 query matching any of ``text``'s first ``MATCH_TERMS`` distinct words."""
+    terms = list(dict.fromkeys(re.findall(r"\w+", text.lower())))[:MATCH_TERMS]
+    return " OR ".join(f'"{term}"' for term in terms) or None
+
+
+def _row_to_report(row: aiosqlite.Row) -> ProcessedReport:
+    return ProcessedReport(
+        id=row["id"],
+        source_type=row["source_type"],
+        source_id=row["source_id"],
+        source_url=row["source_url"],
+        author=row["author"],
+        original_text=row["original_text"],
+        cleaned_text=row["cleaned_text"] or "",
+        timestamp=datetime.fromisoformat(row["timestamp"]),
+        collected_at=datetime.fromisoformat(row["collected_at"]),
+        primary_neighborhood=row["primary_neighborhood"],
+        latitude=row["latitude"],
+        longitude=row["longitude"],
+        keywords_matched=json.loads(row["keywords_matched"] or "[]"),
+        is_relevant=bool(row["is_relevant"]),
+        cluster_id=row["cluster_id"],
+        city=row["city"] or "",
+    )
+
+
+def _lean_row_to_report(row: aiosqlite.Row) -> ProcessedReport:
+    """Map a ``LEAN_REPORT_COLUMNS`` row by position; only relevant rows are read."""
+    (report_id, source_type, source_id, author, timestamp, collected_at,
+     neighborhood, latitude, longitude, cluster_id, city) = row
+    return ProcessedReport(
+        id=report_id,
+        source_type=source_type,
+        source_id=source_id,
+        source_url="",
+        author=author,
+        original_text="",
+        cleaned_text="",
+        timestamp=datetime.fromisoformat(timestamp),
+        collected_at=datetime.fromisoformat(collected_at),
+        primary_neighborhood=neighborhood,
+        latitude=latitude,
+        longitude=longitude,
+        is_relevant=True,
+        cluster_id=cluster_id,
+        city=city or "",
+        text_loaded=False,
+        seq=report_id,
+    )
+
+
+class Database(StorageBackend):
+    """Async SQLite storage.
+
+    Writes go through a single ``Writer`` that owns its own connection and
+    group-commits them; reads borrow a connection from a ``ReaderPool`` of
+    read-only connections, which in WAL mode see every committed write
+    without waiting on the writer or on each other. An in-memory database
+    is opened as a named shared-cache database so all connections see the
+    same data; it is meant for tests and benchmarks, since its readers
+    also see uncommitted writes (see ``ReaderPool``).
+    """
 
-class Database:
     def __init__(self, config: Config):
         self.db_path = config.db_path
-        self._db: aiosqlite.Connection | None = None
+        self._readers: ReaderPool | None = None
+        self._read_connections = config.db_read_connections
+        self._writer: Writer | None = None
+        self._write_batch = config.db_write_batch
+        self._write_linger = config.db_write_linger
+        self._wal_truncate_bytes = int(config.db_wal_truncate_mb * 1024 * 1024)
+        # Reports stay in the live database while correlation or cluster
+        # updates may still read them
+        self._hot_ms = round(max(
+            config.db_hot_hours * 3600,
+            config.correlation_window_seconds,
+            config.cluster_expiry_hours * 3600,
+        ) * 1000)
+        self.archive = ArchiveStore(
+            config.db_archive_dir
+            or os.path.join(os.path.dirname(os.path.abspath(config.db_path)), "archive")
+        )
+        self.registry = ClusterRegistry()
+        self.expiry = ExpiryScheduler()
+        self._report_ttl_ms = config.correlation_window_seconds * 1000
+        self._cluster_ttl_ms = round(config.cluster_expiry_hours * 3_600_000)
 
     async def connect(self) -> None:
-        self._db = await aiosqlite.connect(self.db_path)
-        self._db.row_factory = aiosqlite.Row
-        await self._db.execute("PRAGMA journal_mode=WAL")
-        await self._db.execute("PRAGMA busy_timeout=5000")
-        await self._db.executescript(SCHEMA_SQL)
-        await self._migrate_add_city_column()
-        await self._db.commit()
+        in_memory = self.db_path == ":memory:"
+        path = self.db_path
+        if in_memory:
+            path = f"file:ice_monitor_{id(self)}?mode=memory&cache=shared"
+        self._writer = Writer(
+            path, uri=in_memory, max_batch=self._write_batch, linger=self._write_linger
+        )
+        await self._writer.start()
+        await self._write(self._setup_schema, transactional=False)
+
+        self._readers = ReaderPool(
+            path, uri=in_memory, size=self._read_connections, read_uncommitted=in_memory
+        )
+        await self._readers.open()
+
+        await self._load_registry()
+        await self._load_expiry()
         logger.info("Database initialized at %s", self.db_path)
 
-    async def _migrate_add_city_column(self) -> None:
+    def _setup_schema(self, db: sqlite3.Connection) -> None:
+        self._migrate_incremental_vacuum(db)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        # Checkpoints are scheduled by maintain(); the automatic one only
+        # backstops a WAL that grows past the truncate threshold
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        backstop = max(self._wal_truncate_bytes // page_size, 1000)
+        db.execute(f"PRAGMA wal_autocheckpoint={backstop}")
+        db.executescript(SCHEMA_SQL)
+        self._migrate_add_city_column(db)
+        self._migrate_add_epoch_columns(db)
+        db.executescript(INDEX_SQL)
+        self._migrate_fts(db)
+
+    def _migrate_incremental_vacuum(self, db: sqlite3.Connection) -> None:
+        """Switch to incremental auto-vacuum (backward compat).
+
+        A new database only needs the pragma before its first table; an
+        existing one is rebuilt by a one-time VACUUM.
+        """
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return
+        db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if db.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+            db.execute("VACUUM")
+            logger.info("Migrated database to incremental auto-vacuum")
+
+    def _migrate_add_city_column(self, db: sqlite3.Connection) -> None:
         """Add city column to existing tables if missing (backward compat)."""
         for table in ("raw_reports", "clusters"):
-            cursor = await self._db.execute(f"PRAGMA table_info({table})")
-            columns = {row[1] for row in await cursor.fetchall()}
+            columns = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
             if "city" not in columns:
-                await self._db.execute(
-                    f"ALTER TABLE {table} ADD COLUMN city TEXT DEFAULT ''"
-                )
+                db.execute(f"ALTER TABLE {table} ADD COLUMN city TEXT DEFAULT ''")
                 logger.info("Migrated %s: added city column", table)
 
+    def _migrate_add_epoch_columns(self, db: sqlite3.Connection) -> None:
+        """Add and backfill the ``*_ms`` time columns if missing."""
+        for table, columns in EPOCH_COLUMNS.items():
+            existing = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+            for column, source in columns.items():
+                if column in existing:
+                    continue
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+                # julianday() parses ISO-8601 with or without an offset, and
+                # datetime('now') values, as UTC
+                db.execute(
+                    f"""UPDATE {table} SET {column} =
+                        CAST(ROUND((julianday({source}) - 2440587.5) * 86400000) AS INTEGER)"""
+                )
+                logger.info("Migrated %s: added %s", table, column)
+
+    def _migrate_fts(self, db: sqlite3.Connection) -> None:
+        """Create the full-text index and its triggers, indexing existing reports."""
+        exists = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'raw_reports_fts'"
+        ).fetchone()
+        db.executescript(FTS_SQL)
+        if not exists:
+            db.execute(FTS_BACKFILL_SQL.format(schema="main"))
+            logger.info("Migrated raw_reports: added full-text index")
+
+    async def _load_registry(self) -> None:
+        """Read notified clusters and notified report keys into memory."""
+        async with self._readers.connection() as db:
+            cursor = await db.execute(
+                f"SELECT {ACTIVE_CLUSTER_COLUMNS} FROM clusters WHERE notified = 1"
+            )
+            clusters = [dict(row) for row in await cursor.fetchall()]
+            cursor = await db.execute(
+                "SELECT source_type, source_id FROM raw_reports WHERE notified = 1"
+            )
+            notified = [tuple(row) for row in await cursor.fetchall()]
+        self.registry.load(clusters, notified)
+        logger.info(
+            "Loaded %d notified clusters and %d notified report keys",
+            len(clusters), len(notified),
+        )
+
+    async def _load_expiry(self) -> None:
+        """Seed the expiry scheduler from pending reports and the registry."""
+        self.expiry.clear()
+        async with self._readers.connection() as db:
+            cursor = await db.execute(
+                """SELECT id, collected_at_ms FROM raw_reports
+                   WHERE notified = 0 AND expired = 0"""
+            )
+            async with cursor:
+                async for row in cursor:
+                    self._schedule_report(row["id"], row["collected_at_ms"])
+        for cluster in self.registry.clusters.values():
+            self._schedule_cluster(cluster["id"], cluster["latest_report_ms"])
+
+    def _schedule_report(self, report_id: int, collected_at_ms: int) -> None:
+        self.expiry.schedule_report(report_id, collected_at_ms + self._report_ttl_ms)
+
+    def _schedule_cluster(self, cluster_id: int, latest_report_ms: int) -> None:
+        self.expiry.schedule_cluster(cluster_id, latest_report_ms + self._cluster_ttl_ms)
+
     async def close(self) -> None:
-        if self._db:
-            await self._db.close()
-            self._db = None
+        if self._readers:
+            await self._readers.close()
+            self._readers = None
+        if self._writer:
+            await self._writer.stop()
+            logger.debug(
+                "Writer committed %d writes in %d batches",
+                self._writer.committed, self._writer.batches,
+            )
+            self._writer = None
+
+    async def _write(
+        self, op: Callable[[sqlite3.Connection], Any], transactional: bool = True
+    ) -> Any:
+        """Run ``op(connection)`` on the writer; returns once committed."""
+        return await self._writer.submit(op, transactional)
+
+    async def _execute_write(self, sql: str, params=()) -> int:
+        """Run one write statement. Returns the affected row count."""
+        return await self._write(lambda db: db.execute(sql, params).rowcount)
 
     async def insert_raw_report(self, report: RawReport) -> int | None:
         """Insert a raw report. Returns the row id, or None if duplicate."""
-        try:
-            cursor = await self._db.execute(
+        collected_at_ms = epoch_ms(report.collected_at)
+
+        def op(db):
+            cursor = db.execute(
                 """INSERT INTO raw_reports
                    (source_type, source_id, source_url, author,
-                    original_text, timestamp, collected_at, raw_metadata)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    original_text, timestamp, collected_at, raw_metadata,
+                    timestamp_ms, collected_at_ms, created_at_ms)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                 (
                     report.source_type,
                     report.source_id,
@@ -119,13 +474,20 @@ class Database:
                     report.timestamp.isoformat(),
                     report.collected_at.isoformat(),
                     json.dumps(report.raw_metadata),
+                    epoch_ms(report.timestamp),
+                    collected_at_ms,
+                    _now_ms(),
                 ),
             )
-            await self._db.commit()
             return cursor.lastrowid
-        except aiosqlite.IntegrityError:
+
+        try:
+            report_id = await self._write(op)
+        except sqlite3.IntegrityError:
             # Duplicate source_type + source_id
             return None
+        self._schedule_report(report_id, collected_at_ms)
+        return report_id
 
     async def update_report_processing(
         self,
@@ -138,7 +500,7 @@ class Database:
         keywords_matched: list[str],
         city: str = "",
     ) -> None:
-        await self._db.execute(
+        await self._execute_write(
             """UPDATE raw_reports
                SET cleaned_text = ?, is_relevant = ?,
                    primary_neighborhood = ?, latitude = ?, longitude = ?,
@@ -155,102 +517,200 @@ class Database:
                 report_id,
             ),
         )
-        await self._db.commit()
 
-    async def get_recent_relevant(
-        self, since: datetime
-    ) -> list[ProcessedReport]:
-        """Get relevant, un-expired reports since a cutoff time.
+    async def get_correlation_cities(self, since: datetime) -> list[str]:
+        """Cities with relevant, un-expired reports collected since a cutoff."""
+        async with self._readers.connection() as db:
+            cursor = await db.execute(
+                """SELECT DISTINCT city FROM raw_reports
+                   WHERE is_relevant = 1
+                     AND expired = 0
+                     AND collected_at_ms >= ?""",
+                (epoch_ms(since),),
+            )
+            return [row["city"] or "" for row in await cursor.fetchall()]
 
-        Returns both un-notified reports AND notified reports that belong
-        to active clusters (needed for update detection).
-        """
-        cursor = await self._db.execute(
-            """SELECT * FROM raw_reports
-               WHERE is_relevant = 1
-                 AND expired = 0
-                 AND collected_at >= ?
-               ORDER BY timestamp DESC
-               LIMIT 500""",
-            (since.isoformat(),),
-        )
-        rows = await cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append(ProcessedReport(
-                id=row["id"],
-                source_type=row["source_type"],
-                source_id=row["source_id"],
-                source_url=row["source_url"],
-                author=row["author"],
-                original_text=row["original_text"],
-                cleaned_text=row["cleaned_text"] or "",
-                timestamp=datetime.fromisoformat(row["timestamp"]),
-                collected_at=datetime.fromisoformat(row["collected_at"]),
-                primary_neighborhood=row["primary_neighborhood"],
-                latitude=row["latitude"],
-                longitude=row["longitude"],
-                keywords_matched=json.loads(row["keywords_matched"] or "[]"),
-                is_relevant=bool(row["is_relevant"]),
-                cluster_id=row["cluster_id"],
-                city=row["city"] or "",
-            ))
-        return results
-
-    async def create_cluster(
+    async def iter_recent_relevant(
         self,
-        primary_location: str,
-        latitude: float | None,
-        longitude: float | None,
-        confidence_score: float,
-        source_count: int,
-        unique_source_types: list[str],
-        earliest_report: datetime,
-        latest_report: datetime,
-        city: str = "",
-    ) -> int:
-        cursor = await self._db.execute(
-            """INSERT INTO clusters
-               (primary_location, latitude, longitude, confidence_score,
-                source_count, unique_source_types, earliest_report, latest_report,
-                city)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                primary_location,
-                latitude,
-                longitude,
-                confidence_score,
-                source_count,
-                json.dumps(unique_source_types),
-                earliest_report.isoformat(),
-                latest_report.isoformat(),
-                city,
-            ),
-        )
-        await self._db.commit()
-        return cursor.lastrowid
+        since: datetime,
+        city: str,
+        after_seq: int = 0,
+        limit: int = 500,
+    ) -> AsyncIterator[ProcessedReport]:
+        """Stream one city's relevant, un-expired reports since a cutoff.
 
-    async def assign_reports_to_cluster(
-        self, report_ids: list[int], cluster_id: int
-    ) -> None:
-        placeholders = ",".join("?" for _ in report_ids)
-        await self._db.execute(
-            f"UPDATE raw_reports SET cluster_id = ? WHERE id IN ({placeholders})",
-            [cluster_id] + report_ids,
-        )
-        await self._db.commit()
+        Yields both un-notified reports AND notified reports that belong
+        to active clusters (needed for update detection). A report's
+        ``seq`` is its id: only rows with ``id > after_seq`` are returned,
+        at most ``limit`` of them, in id order, so the correlator can page
+        through each city's new arrivals with its own watermark; relevance
+        and city are set together by the single processing loop in
+        insertion order, so no row is skipped.
+
+        Reports come without source URL, texts or keywords
+        (``text_loaded`` is False); ``load_report_texts`` fetches them for
+        the reports that get that far.
+        """
+        async with self._readers.connection() as db:
+            cursor = await db.execute(
+                f"""SELECT {LEAN_REPORT_COLUMNS} FROM raw_reports
+                   WHERE city = ?
+                     AND is_relevant = 1
+                     AND expired = 0
+                     AND collected_at_ms >= ?
+                     AND id > ?
+                   ORDER BY id
+                   LIMIT ?""",
+                (city, epoch_ms(since), after_seq, limit),
+            )
+            async with cursor:
+                async for row in cursor:
+                    yield _lean_row_to_report(row)
+
+    async def load_report_texts(self, reports: list[ProcessedReport]) -> None:
+        """Fill in source URL, texts and keywords of lean reports, in place."""
+        pending = {r.id: r for r in reports if not r.text_loaded}
+        if not pending:
+            return
+        ids = list(pending)
+        async with self._readers.connection() as db:
+            for start in range(0, len(ids), TEXT_LOAD_BATCH):
+                batch = ids[start:start + TEXT_LOAD_BATCH]
+                cursor = await db.execute(
+                    f"""SELECT id, source_url, original_text, cleaned_text, keywords_matched
+                        FROM raw_reports
+                        WHERE id IN ({", ".join("?" * len(batch))})""",
+                    batch,
+                )
+                for report_id, url, original, cleaned, keywords in await cursor.fetchall():
+                    report = pending[report_id]
+                    report.source_url = url
+                    report.original_text = original
+                    report.cleaned_text = cleaned or ""
+                    report.keywords_matched = json.loads(keywords or "[]")
+                    report.text_loaded = True
+
+    async def apply_correlation_writes(self, writes: CorrelationWrites) -> list[int]:
+        """Apply one correlation cycle's writes in a single transaction.
+
+        Creates the new clusters, assigns reports to new and existing
+        clusters, marks every assigned report as notified (prevents zombie
+        re-correlation) and updates existing cluster stats. Returns the ids
+        of the created clusters in ``writes.new_clusters`` order. Nothing
+        is written if any statement fails.
+        """
+        created_ms = _now_ms()
+
+        def op(db):
+            cluster_ids = []
+            for c in writes.new_clusters:
+                cursor = db.execute(
+                    """INSERT INTO clusters
+                       (primary_location, latitude, longitude, confidence_score,
+                        source_count, unique_source_types, earliest_report,
+                        latest_report, city, latest_report_ms, created_at_ms)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        c.primary_location,
+                        c.latitude,
+                        c.longitude,
+                        c.confidence_score,
+                        c.source_count,
+                        json.dumps(c.unique_source_types),
+                        c.earliest_report.isoformat(),
+                        c.latest_report.isoformat(),
+                        c.city,
+                        epoch_ms(c.latest_report),
+                        created_ms,
+                    ),
+                )
+                cluster_ids.append(cursor.lastrowid)
+
+            assignments = [
+                (cluster_id, report_id)
+                for cluster_id, c in zip(cluster_ids, writes.new_clusters)
+                for report_id in c.report_ids
+            ] + [
+                (u.cluster_id, report_id)
+                for u in writes.updates
+                for report_id in u.new_report_ids
+            ]
+            notified_keys = []
+            if assignments:
+                db.executemany(
+                    "UPDATE raw_reports SET cluster_id = ?, notified = 1 WHERE id = ?",
+                    assignments,
+                )
+                report_ids = [report_id for _, report_id in assignments]
+                for i in range(0, len(report_ids), 500):
+                    chunk = report_ids[i:i + 500]
+                    cursor = db.execute(
+                        f"""SELECT source_type, source_id FROM raw_reports
+                            WHERE id IN ({",".join("?" * len(chunk))})""",
+                        chunk,
+                    )
+                    notified_keys.extend(cursor.fetchall())
+
+            if writes.updates:
+                db.executemany(
+                    """UPDATE clusters
+                       SET confidence_score = ?, source_count = ?,
+                           unique_source_types = ?, latest_report = ?,
+                           latest_report_ms = ?
+                       WHERE id = ?""",
+                    [
+                        (
+                            u.confidence_score,
+                            u.source_count,
+                            json.dumps(u.unique_source_types),
+                            u.latest_report.isoformat(),
+                            epoch_ms(u.latest_report),
+                            u.cluster_id,
+                        )
+                        for u in writes.updates
+                    ],
+                )
+            return cluster_ids, notified_keys
+
+        cluster_ids, notified_keys = await self._write(op)
+        for source_type, source_id in notified_keys:
+            self.registry.add_notified(source_type, source_id)
+        for u in writes.updates:
+            self.registry.update_cluster(
+                u.cluster_id,
+                confidence_score=u.confidence_score,
+                source_count=u.source_count,
+                unique_source_types=json.dumps(u.unique_source_types),
+                latest_report=u.latest_report.isoformat(),
+                latest_report_ms=epoch_ms(u.latest_report),
+            )
+            if u.cluster_id in self.registry.clusters:
+                self._schedule_cluster(u.cluster_id, epoch_ms(u.latest_report))
+        return cluster_ids
 
     async def mark_cluster_notified(self, cluster_id: int) -> None:
         now = datetime.now(timezone.utc).isoformat()
-        await self._db.execute(
-            "UPDATE clusters SET notified = 1, notified_at = ? WHERE id = ?",
-            (now, cluster_id),
-        )
-        await self._db.execute(
-            "UPDATE raw_reports SET notified = 1 WHERE cluster_id = ?",
-            (cluster_id,),
-        )
-        await self._db.commit()
+
+        def op(db):
+            cursor = db.execute(
+                f"""UPDATE clusters SET notified = 1, notified_at = ? WHERE id = ?
+                    RETURNING {ACTIVE_CLUSTER_COLUMNS}""",
+                (now, cluster_id),
+            )
+            clusters = [dict(row) for row in cursor.fetchall()]
+            cursor = db.execute(
+                """UPDATE raw_reports SET notified = 1 WHERE cluster_id = ?
+                   RETURNING source_type, source_id""",
+                (cluster_id,),
+            )
+            return clusters, cursor.fetchall()
+
+        clusters, keys = await self._write(op)
+        for cluster in clusters:
+            self.registry.put_cluster(cluster)
+            self._schedule_cluster(cluster["id"], cluster["latest_report_ms"])
+        for source_type, source_id in keys:
+            self.registry.add_notified(source_type, source_id)
 
     async def log_notification(
         self,
@@ -259,64 +719,44 @@ class Database:
         success: bool,
         error_message: str | None = None,
     ) -> None:
-        await self._db.execute(
+        now = datetime.now(timezone.utc)
+        await self._execute_write(
             """INSERT INTO notifications
-               (cluster_id, sent_at, embed_content, success, error_message)
-               VALUES (?, ?, ?, ?, ?)""",
+               (cluster_id, sent_at, embed_content, success, error_message, sent_at_ms)
+               VALUES (?, ?, ?, ?, ?, ?)""",
             (
                 cluster_id,
-                datetime.now(timezone.utc).isoformat(),
+                now.isoformat(),
                 json.dumps(embed_content),
                 int(success),
                 error_message,
+                epoch_ms(now),
             ),
         )
-        await self._db.commit()
-
-    async def get_notified_source_ids(self) -> set[str]:
-        """Get source_type:source_id keys for all already-notified reports.
-
-        Used by the correlator to prevent re-alerting on reports that
-        were previously notified but got re-collected due to _seen_ids
-        eviction in the collector.
-        """
-        cursor = await self._db.execute(
-            "SELECT source_type, source_id FROM raw_reports WHERE notified = 1"
-        )
-        rows = await cursor.fetchall()
-        return {f"{row['source_type']}:{row['source_id']}" for row in rows}
 
     async def get_notified_cluster_report_ids(
         self, cluster_id: int
     ) -> set[int]:
         """Get IDs of reports that were already part of a cluster when it was notified."""
-        cursor = await self._db.execute(
-            "SELECT id FROM raw_reports WHERE cluster_id = ? AND notified = 1",
-            (cluster_id,),
-        )
-        rows = await cursor.fetchall()
+        async with self._readers.connection() as db:
+            cursor = await db.execute(
+                "SELECT id FROM raw_reports WHERE cluster_id = ? AND notified = 1",
+                (cluster_id,),
+            )
+            rows = await cursor.fetchall()
         return {row["id"] for row in rows}
 
-    async def get_active_clusters(self, max_age_hours: float = 6.0) -> list[dict]:
+    async def get_active_clusters(
+        self, max_age_hours: float = 6.0, now: datetime | None = None
+    ) -> list[dict]:
         """Get notified clusters that are still active (within max_age_hours).
 
         Clusters older than max_age_hours since their latest_report are
-        considered stale and excluded from update detection.
+        considered stale and excluded from update detection. Served from
+        the in-memory registry, which every cluster write keeps current.
         """
-        from datetime import timedelta
-        cutoff = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).isoformat()
-
-        cursor = await self._db.execute(
-            """SELECT id, primary_location, latitude, longitude,
-                      confidence_score, source_count, unique_source_types,
-                      earliest_report, latest_report, city
-               FROM clusters
-               WHERE notified = 1
-                 AND latest_report >= ?""",
-            (cutoff,),
-        )
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        now = now or datetime.now(timezone.utc)
+        return self.registry.active_clusters(epoch_ms(now - timedelta(hours=max_age_hours)))
 
     async def expire_old_clusters(self, max_age_hours: float = 6.0) -> int:
         """Delete clusters older than max_age_hours.
@@ -324,68 +764,377 @@ class Database:
         Frees memory and keeps the clusters table from growing unboundedly.
         Returns count of deleted clusters.
         """
-        from datetime import timedelta
-        cutoff = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).isoformat()
+        cutoff = epoch_ms(datetime.now(timezone.utc) - timedelta(hours=max_age_hours))
 
-        cursor = await self._db.execute(
+        deleted = await self._execute_write(
             """DELETE FROM clusters
-               WHERE notified = 1 AND latest_report < ?""",
+               WHERE notified = 1 AND latest_report_ms < ?""",
             (cutoff,),
         )
-        await self._db.commit()
-        return cursor.rowcount
-
-    async def update_cluster(
-        self,
-        cluster_id: int,
-        confidence_score: float,
-        source_count: int,
-        unique_source_types: list[str],
-        latest_report: datetime,
-    ) -> None:
-        """Update an existing cluster with new stats."""
-        await self._db.execute(
-            """UPDATE clusters
-               SET confidence_score = ?, source_count = ?,
-                   unique_source_types = ?, latest_report = ?
-               WHERE id = ?""",
-            (
-                confidence_score,
-                source_count,
-                json.dumps(unique_source_types),
-                latest_report.isoformat(),
-                cluster_id,
-            ),
-        )
-        await self._db.commit()
+        self.registry.drop_clusters_before(cutoff)
+        return deleted
 
     async def expire_old_reports(self, before: datetime) -> int:
         """Mark old un-notified reports as expired. Returns count."""
-        cursor = await self._db.execute(
+        return await self._execute_write(
             """UPDATE raw_reports
                SET expired = 1
                WHERE notified = 0
                  AND expired = 0
-                 AND collected_at < ?""",
-            (before.isoformat(),),
+                 AND collected_at_ms < ?""",
+            (epoch_ms(before),),
         )
-        await self._db.commit()
-        return cursor.rowcount
 
-    async def purge_old_data(self, days: int = 7) -> None:
-        """Delete records older than N days."""
-        from datetime import timedelta
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-        await self._db.execute(
-            "DELETE FROM raw_reports WHERE created_at < ?", (cutoff,)
+    async def expire_due(
+        self, now: datetime | None = None, batch_size: int = 200
+    ) -> tuple[int, int]:
+        """Apply the expirations whose deadline has passed.
+
+        Reports a correlation window past collection are marked expired
+        unless they were notified in the meantime; notified clusters whose
+        latest report is ``cluster_expiry_hours`` old are deleted. Work is
+        taken from the expiry scheduler, so nothing is scanned, and applied
+        ``batch_size`` ids per transaction. Returns ``(expired reports,
+        deleted clusters)``.
+        """
+        now_ms = epoch_ms(now or datetime.now(timezone.utc))
+        expired = deleted = 0
+        while report_ids := self.expiry.due_reports(now_ms, batch_size):
+            expired += await self._execute_write(
+                f"""UPDATE raw_reports SET expired = 1
+                    WHERE id IN ({",".join("?" * len(report_ids))})
+                      AND notified = 0 AND expired = 0""",
+                report_ids,
+            )
+        while cluster_ids := self.expiry.due_clusters(now_ms, batch_size):
+            deleted += await self._execute_write(
+                f"""DELETE FROM clusters
+                    WHERE id IN ({",".join("?" * len(cluster_ids))})
+                      AND notified = 1""",
+                cluster_ids,
+            )
+            self.registry.drop_clusters(cluster_ids)
+        return expired, deleted
+
+    async def archive_old_reports(self, now: datetime | None = None) -> int:
+        """Move reports collected before the hot window into day partitions.
+
+        Each UTC day of collection is copied into its partition file and
+        deleted from the live table in one transaction. The copy ignores
+        rows the partition already holds, so a move interrupted between
+        the two files is finished by the next run. Returns the number of
+        reports moved. Notified keys of moved reports leave the registry.
+        """
+        cutoff = epoch_ms(now or datetime.now(timezone.utc)) - self._hot_ms
+        self.archive.directory.mkdir(parents=True, exist_ok=True)
+
+        def move(db):
+            days = [row[0] for row in db.execute(
+                """SELECT DISTINCT collected_at_ms / ? FROM raw_reports
+                   WHERE collected_at_ms < ?""",
+                (DAY_MS, cutoff),
+            )]
+            moved = 0
+            notified = []
+            for day in days:
+                span = (day * DAY_MS, min((day + 1) * DAY_MS, cutoff))
+                path = self.archive.path_for(day_of(day * DAY_MS))
+                db.execute("ATTACH DATABASE ? AS archive", (str(path),))
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    columns = self._prepare_partition(db)
+                    # Index only rows not archived yet; an interrupted
+                    # move may have copied some already
+                    db.execute(
+                        """INSERT INTO archive.raw_reports_fts(rowid, cleaned_text)
+                           SELECT id, cleaned_text FROM main.raw_reports
+                           WHERE collected_at_ms >= ? AND collected_at_ms < ?
+                             AND is_relevant = 1 AND cleaned_text IS NOT NULL
+                             AND id NOT IN (SELECT id FROM archive.raw_reports)""",
+                        span,
+                    )
+                    db.execute(
+                        f"""INSERT OR IGNORE INTO archive.raw_reports ({columns})
+                            SELECT {columns} FROM main.raw_reports
+                            WHERE collected_at_ms >= ? AND collected_at_ms < ?""",
+                        span,
+                    )
+                    notified += db.execute(
+                        """SELECT source_type, source_id FROM main.raw_reports
+                           WHERE collected_at_ms >= ? AND collected_at_ms < ?
+                             AND notified = 1""",
+                        span,
+                    ).fetchall()
+                    moved += db.execute(
+                        """DELETE FROM main.raw_reports
+                           WHERE collected_at_ms >= ? AND collected_at_ms < ?""",
+                        span,
+                    ).rowcount
+                    db.execute("COMMIT")
+                except BaseException:
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    raise
+                finally:
+                    db.execute("DETACH DATABASE archive")
+            return moved, notified
+
+        moved, notified = await self._write(move, transactional=False)
+        self.registry.discard_notified(notified)
+        if moved:
+            logger.info("Archived %d reports to %s", moved, self.archive.directory)
+        return moved
+
+    @staticmethod
+    def _prepare_partition(db: sqlite3.Connection) -> str:
+        """Create or migrate the attached partition's tables; returns the report columns."""
+        db.execute(
+            """CREATE TABLE IF NOT EXISTS archive.raw_reports AS
+               SELECT * FROM main.raw_reports WHERE 0"""
         )
-        await self._db.execute(
-            "DELETE FROM clusters WHERE created_at < ?", (cutoff,)
+        db.execute(
+            """CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_archive_reports_id
+               ON raw_reports(id)"""
         )
-        await self._db.execute(
-            "DELETE FROM notifications WHERE sent_at < ?", (cutoff,)
+        live = [row[1] for row in db.execute("PRAGMA main.table_info(raw_reports)")]
+        archived = {row[1] for row in db.execute("PRAGMA archive.table_info(raw_reports)")}
+        for column in live:
+            if column not in archived:
+                db.execute(f"ALTER TABLE archive.raw_reports ADD COLUMN {column}")
+        # Partitions have no triggers: rows are indexed as they are moved in
+        has_fts = db.execute(
+            "SELECT 1 FROM archive.sqlite_master WHERE name = 'raw_reports_fts'"
+        ).fetchone()
+        db.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS archive.raw_reports_fts USING fts5(
+                   cleaned_text, content='raw_reports', content_rowid='id'
+               )"""
+        )
+        if not has_fts:
+            db.execute(FTS_BACKFILL_SQL.format(schema="archive"))
+        return ", ".join(live)
+
+    async def iter_archived_reports(
+        self, since: datetime, until: datetime
+    ) -> AsyncIterator[ProcessedReport]:
+        """Stream archived reports collected in ``[since, until)``, oldest day first."""
+        since_ms, until_ms = epoch_ms(since), epoch_ms(until)
+        rows = self._query_partitions(
+            since_ms, until_ms,
+            """SELECT * FROM part.raw_reports
+               WHERE collected_at_ms >= ? AND collected_at_ms < ?
+               ORDER BY id""",
+            (since_ms, until_ms),
+        )
+        async for row in rows:
+            yield _row_to_report(row)
+
+    async def _query_partitions(
+        self, since_ms: int, until_ms: int, sql: str, params=(), table: str = "raw_reports"
+    ) -> AsyncIterator[aiosqlite.Row]:
+        """Run ``sql`` on each partition of ``[since_ms, until_ms)``, oldest first.
+
+        Each partition is attached read-only as ``part`` to a private
+        connection just for its query, so archive reads never touch the
+        live database's connections. Partitions without ``table`` are
+        skipped.
+        """
+        partitions = self.archive.partitions(day_of(since_ms), day_of(until_ms))
+        if not partitions:
+            return
+        conn = await aiosqlite.connect("file::memory:", uri=True)
+        conn.row_factory = aiosqlite.Row
+        try:
+            for _, path in partitions:
+                await conn.execute(
+                    "ATTACH DATABASE ? AS part", (f"{path.resolve().as_uri()}?mode=ro",)
+                )
+                try:
+                    cursor = await conn.execute(
+                        "SELECT 1 FROM part.sqlite_master WHERE name = ?", (table,)
+                    )
+                    if await cursor.fetchone() is None:
+                        continue
+                    cursor = await conn.execute(sql, params)
+                    async with cursor:
+                        async for row in cursor:
+                            yield row
+                finally:
+                    await conn.execute("DETACH DATABASE part")
+        finally:
+            await conn.close()
+
+    async def search_reports(
+        self,
+        query: str,
+        since: datetime,
+        until: datetime | None = None,
+        city: str = "",
+        limit: int = 50,
+    ) -> list[ProcessedReport]:
+        """Relevant reports collected in ``[since, until)`` matching an FTS5 query.
+
+        ``query`` uses FTS5 syntax (``ice AND raid``, ``"lake street"``,
+        ``detain*``). The live database and the archive partitions in
+        range are searched through their full-text indexes, and the best
+        ``limit`` BM25 matches come first, optionally only from ``city``.
+        Partitions archived before the index existed are not searched.
+        """
+        since_ms = epoch_ms(since)
+        until_ms = epoch_ms(until or datetime.now(timezone.utc))
+        params = (query, since_ms, until_ms, city, city, limit)
+        async with self._readers.connection() as db:
+            cursor = await db.execute(SEARCH_SQL.format(schema="main"), params)
+            rows = list(await cursor.fetchall())
+        rows += [
+            row async for row in self._query_partitions(
+                since_ms, until_ms, SEARCH_SQL.format(schema="part"), params,
+                table="raw_reports_fts",
+            )
+        ]
+        rows.sort(key=lambda row: row["score"])
+        found: dict[int, ProcessedReport] = {}
+        for row in rows:
+            # A move interrupted between files leaves a report in both
+            if row["id"] not in found:
+                found[row["id"]] = _row_to_report(row)
+        return list(found.values())[:limit]
+
+    async def text_candidates(
+        self, reports: list[ProcessedReport], since: datetime, limit: int = 20
+    ) -> set[int] | None:
+        """Ids of unclustered reports whose text best matches each of ``reports``.
+
+        For every report, the ``limit`` best BM25 matches for any of its
+        words among its city's un-expired reports collected since
+        ``since``. The reports themselves may be included.
+
+        Ranking runs only over the index rows from the city's first live
+        report in the window onwards, found on the live-city index, so its
+        cost follows the correlation window rather than the whole table.
+        """
+        since_ms = epoch_ms(since)
+        found: set[int] = set()
+        first_ids: dict[str, int | None] = {}
+        async with self._readers.connection() as db:
+            for report in reports:
+                query = _match_any(report.cleaned_text or report.original_text)
+                if query is None:
+                    continue
+                if report.city not in first_ids:
+                    cursor = await db.execute(
+                        """SELECT MIN(id) FROM raw_reports
+                           WHERE city = ? AND expired = 0 AND is_relevant = 1
+                             AND collected_at_ms >= ?""",
+                        (report.city, since_ms),
+                    )
+                    first_ids[report.city] = (await cursor.fetchone())[0]
+                first_id = first_ids[report.city]
+                if first_id is None:
+                    continue
+                cursor = await db.execute(
+                    """SELECT r.id FROM raw_reports_fts AS f
+                       JOIN raw_reports AS r ON r.id = f.rowid
+                       WHERE f.raw_reports_fts MATCH ?
+                         AND f.rowid >= ?
+                         AND r.city = ?
+                         AND r.collected_at_ms >= ?
+                         AND r.expired = 0
+                         AND r.cluster_id IS NULL
+                       ORDER BY f.rank
+                       LIMIT ?""",
+                    # One more, since a report matches itself best
+                    (query, first_id, report.city, since_ms, limit + 1),
+                )
+                found.update(row[0] for row in await cursor.fetchall())
+        return found
+
+    async def purge_old_data(self, days: int = 7) -> None:
+        """Archive cold reports and drop everything older than N days.
+
+        Reports past the hot window move to day partitions, and whole
+        partitions are deleted once older than the retention period.
+        Clusters and notifications, which stay small, are deleted in
+        place. An in-memory database has nowhere to archive to, so its
+        old reports are deleted instead. The freed pages go to the
+        freelist; ``maintain`` hands them back to the filesystem a few at
+        a time. Only the purged clusters and report keys leave the
+        registry, so write-through updates committed meanwhile are kept.
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = epoch_ms(now - timedelta(days=days))
+        in_memory = self.db_path == ":memory:"
+        if not in_memory:
+            await self.archive_old_reports(now)
+
+        def purge(db):
+            notified = []
+            if in_memory:
+                notified = db.execute(
+                    """DELETE FROM raw_reports WHERE created_at_ms < ? AND notified = 1
+                       RETURNING source_type, source_id""",
+                    (cutoff,),
+                ).fetchall()
+                db.execute("DELETE FROM raw_reports WHERE created_at_ms < ?", (cutoff,))
+            clusters = db.execute(
+                "DELETE FROM clusters WHERE created_at_ms < ? RETURNING id", (cutoff,)
+            ).fetchall()
+            db.execute("DELETE FROM notifications WHERE sent_at_ms < ?", (cutoff,))
+            return [row[0] for row in clusters], notified
+
+        cluster_ids, notified = await self._write(purge)
+        self.registry.drop_clusters(cluster_ids)
+        self.registry.discard_notified(notified)
+        dropped = self.archive.drop_before(day_of(cutoff))
+        await self._load_expiry()
+        logger.info(
+            "Purged data older than %d days (%d archive partitions dropped)",
+            days, len(dropped),
+        )
+
+    async def storage_stats(self) -> dict:
+        """Page, freelist and WAL sizes of the database file."""
+        stats = {}
+        async with self._readers.connection() as db:
+            for pragma in ("page_size", "page_count", "freelist_count"):
+                cursor = await db.execute(f"PRAGMA {pragma}")
+                stats[pragma] = (await cursor.fetchone())[0]
+        wal_path = f"{self.db_path}-wal"
+        stats["wal_bytes"] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        return stats
+
+    async def maintain(self, vacuum_pages: int = 512) -> dict | None:
+        """One idle-time maintenance step; returns storage stats after it.
+
+        Frees up to ``vacuum_pages`` freelist pages with an incremental
+        vacuum, then runs a PASSIVE checkpoint, which copies what it can
+        from the WAL without waiting on readers. Once the WAL file passes
+        ``db_wal_truncate_mb`` a TRUNCATE checkpoint also resets it to
+        zero bytes. Skipped (returns None) while writes are queued, so the
+        step never delays them.
+        """
+        if not self._writer.idle:
+            return None
+        wal_bytes = (await self.storage_stats())["wal_bytes"]
+        mode = "TRUNCATE" if wal_bytes > self._wal_truncate_bytes else "PASSIVE"
+
+        def step(db):
+            freed = db.execute("PRAGMA freelist_count").fetchone()[0]
+            # execute() would step the pragma once, freeing a single page
+            db.executescript(f"PRAGMA incremental_vacuum({vacuum_pages});")
+            freed -= db.execute("PRAGMA freelist_count").fetchone()[0]
+            busy, wal_pages, checkpointed = db.execute(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).fetchone()
+            return freed, busy, wal_pages, checkpointed
+
+        freed, busy, wal_pages, checkpointed = await self._write(step, transactional=False)
+        stats = await self.storage_stats()
+        stats.update(
+            vacuumed_pages=freed,
+            checkpoint=mode,
+            checkpoint_busy=bool(busy),
+            wal_pages=wal_pages,
+            checkpointed_pages=checkpointed,
         )
-        await self._db.commit()
-        # Reclaim disk space and reduce memory footprint
-        await self._db.execute("VACUUM")
-        logger.info("Purged data older than %d days and vacuumed DB", days)
+        return stats
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import heapq
+
+
+class ExpiryScheduler:
+    """Min-heaps of expiry deadlines for reports and notified clusters.
+
+    Reports are scheduled once, when inserted, to expire a correlation
+    window after collection. A cluster's deadline moves every time it
+    gets a later report, so cluster entries use lazy deletion: the heap
+    may hold stale deadlines, and only the one matching
+    ``_cluster_deadlines`` counts. Deadlines are epoch milliseconds.
+    """
+
+    def __init__(self) -> None:
+        self._reports: list[tuple[int, int]] = []
+        self._clusters: list[tuple[int, int]] = []
+        self._cluster_deadlines: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._reports) + len(self._cluster_deadlines)
+
+    def clear(self) -> None:
+        self._reports = []
+        self._clusters = []
+        self._cluster_deadlines = {}
+
+    def schedule_report(self, report_id: int, deadline_ms: int) -> None:
+        heapq.heappush(self._reports, (deadline_ms, report_id))
+
+    def schedule_cluster(self, cluster_id: int, deadline_ms: int) -> None:
+        if self._cluster_deadlines.get(cluster_id) == deadline_ms:
+            return
+        self._cluster_deadlines[cluster_id] = deadline_ms
+        heapq.heappush(self._clusters, (deadline_ms, cluster_id))
+
+    def forget_cluster(self, cluster_id: int) -> None:
+        self._cluster_deadlines.pop(cluster_id, None)
+
+    def due_reports(self, now_ms: int, limit: int) -> list[int]:
+        """Pop up to ``limit`` reports whose deadline has passed."""
+        due = []
+        while self._reports and len(due) < limit and self._reports[0][0] < now_ms:
+            due.append(heapq.heappop(self._reports)[1])
+        return due
+
+    def due_clusters(self, now_ms: int, limit: int) -> list[int]:
+        """Pop up to ``limit`` clusters whose current deadline has passed."""
+        due = []
+        while self._clusters and len(due) < limit and self._clusters[0][0] < now_ms:
+            deadline_ms, cluster_id = heapq.heappop(self._clusters)
+            if self._cluster_deadlines.get(cluster_id) != deadline_ms:
+                continue  # Superseded by a later deadline, or forgotten
+            del self._cluster_deadlines[cluster_id]
+            due.append(cluster_id)
+        return due
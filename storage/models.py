@@ -37,6 +37,12 @@ class ProcessedReport:
     is_relevant: bool = False
     cluster_id: int | None = None
     city: str = ""
+    # False for correlation reads, which leave out source_url, texts and
+    # keywords until ``Database.load_report_texts`` fills them in
+    text_loaded: bool = True
+    # Position in the backend's correlation fetch order; the correlator's
+    # per-city watermark. The row id on SQLite
+    seq: int = 0
 
 
 @dataclass
@@ -58,3 +64,39 @@ class CorroboratedIncident:
     notification_type: str = "new"
     new_reports: list[ProcessedReport] = field(default_factory=list)
     city: str = ""
+
+
+@dataclass
+class NewCluster:
+    """A cluster to create, with the reports that belong to it."""
+    primary_location: str
+    latitude: float | None
+    longitude: float | None
+    confidence_score: float
+    source_count: int
+    unique_source_types: list[str]
+    earliest_report: datetime
+    latest_report: datetime
+    report_ids: list[int]
+    city: str = ""
+
+
+@dataclass
+class ClusterUpdate:
+    """New stats for an existing cluster and the reports joining it."""
+    cluster_id: int
+    confidence_score: float
+    source_count: int
+    unique_source_types: list[str]
+    latest_report: datetime
+    new_report_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class CorrelationWrites:
+    """Everything one correlation cycle writes, applied in one transaction."""
+    new_clusters: list[NewCluster] = field(default_factory=list)
+    updates: list[ClusterUpdate] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.new_clusters or self.updates)
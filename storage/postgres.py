@@ -0,0 +1,500 @@
+"""PostgreSQL storage backend (``DB_BACKEND=postgres``).
+
+Uses an asyncpg connection pool, so any number of monitor processes can
+ingest into one database; Postgres takes concurrent writers where the
+SQLite backend funnels every write through one connection. Times are
+``timestamptz`` columns indexed directly, and duplicate reports are
+dropped with ``ON CONFLICT DO NOTHING`` instead of a caught error.
+
+The correlation window and the notified-report registry live in process
+memory, so run correlation in one process; the others only ingest.
+
+With several ingest processes, ids no longer say in which order reports
+became relevant: a report inserted first may be processed last. The
+correlator's watermark is instead the id of the transaction that
+processed each report (``processed_xid``), and a fetch only returns
+reports whose transaction is older than every one still running, so a
+report committed after the watermark moved always sorts after it. A
+long-running transaction anywhere in the database holds new reports back
+until it ends.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+from config import Config
+from storage.backend import StorageBackend
+from storage.models import CorrelationWrites, ProcessedReport, RawReport
+from storage.registry import ClusterRegistry
+
+logger = logging.getLogger(__name__)
+
+# Serializes schema setup between processes starting together
+SCHEMA_LOCK = 0x1CE_5C4E
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS raw_reports (
+    id BIGSERIAL PRIMARY KEY,
+    source_type TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    source_url TEXT,
+    author TEXT,
+    original_text TEXT NOT NULL,
+    cleaned_text TEXT,
+    timestamp TIMESTAMPTZ NOT NULL,
+    collected_at TIMESTAMPTZ NOT NULL,
+    raw_metadata JSONB,
+    is_relevant BOOLEAN NOT NULL DEFAULT FALSE,
+    primary_neighborhood TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    keywords_matched JSONB,
+    cluster_id BIGINT,
+    notified BOOLEAN NOT NULL DEFAULT FALSE,
+    expired BOOLEAN NOT NULL DEFAULT FALSE,
+    city TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    processed_xid XID8,
+    UNIQUE (source_type, source_id)
+);
+ALTER TABLE raw_reports ADD COLUMN IF NOT EXISTS processed_xid XID8;
+
+CREATE TABLE IF NOT EXISTS clusters (
+    id BIGSERIAL PRIMARY KEY,
+    primary_location TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    confidence_score DOUBLE PRECISION,
+    source_count INTEGER,
+    unique_source_types JSONB,
+    earliest_report TIMESTAMPTZ,
+    latest_report TIMESTAMPTZ,
+    notified BOOLEAN NOT NULL DEFAULT FALSE,
+    notified_at TIMESTAMPTZ,
+    city TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- No foreign key: expired clusters are deleted, their notification log stays
+CREATE TABLE IF NOT EXISTS notifications (
+    id BIGSERIAL PRIMARY KEY,
+    cluster_id BIGINT NOT NULL,
+    discord_message_id TEXT,
+    sent_at TIMESTAMPTZ NOT NULL,
+    embed_content JSONB,
+    success BOOLEAN NOT NULL DEFAULT TRUE,
+    error_message TEXT
+);
+
+-- Correlation fetch: one city's new arrivals past its processing
+-- watermark. Superseded the id-ordered index
+DROP INDEX IF EXISTS idx_raw_reports_live_city;
+CREATE INDEX IF NOT EXISTS idx_raw_reports_live_xid
+    ON raw_reports (city, processed_xid) INCLUDE (collected_at)
+    WHERE is_relevant AND NOT expired;
+
+-- Report expiry
+CREATE INDEX IF NOT EXISTS idx_raw_reports_pending
+    ON raw_reports (collected_at)
+    WHERE NOT notified AND NOT expired;
+
+-- Reports of one cluster
+CREATE INDEX IF NOT EXISTS idx_raw_reports_cluster
+    ON raw_reports (cluster_id)
+    WHERE cluster_id IS NOT NULL;
+
+-- Active clusters and cluster expiry
+CREATE INDEX IF NOT EXISTS idx_clusters_notified
+    ON clusters (latest_report)
+    WHERE notified;
+
+-- Purge
+CREATE INDEX IF NOT EXISTS idx_raw_reports_created ON raw_reports (created_at);
+CREATE INDEX IF NOT EXISTS idx_clusters_created ON clusters (created_at);
+CREATE INDEX IF NOT EXISTS idx_notifications_sent ON notifications (sent_at);
+"""
+
+# Same columns, in the same order, as the SQLite backend's lean rows,
+# then the fetch watermark
+LEAN_REPORT_COLUMNS = """id, source_type, source_id, author, timestamp,
+    collected_at, primary_neighborhood, latitude, longitude, cluster_id, city,
+    processed_xid::text::bigint"""
+
+ACTIVE_CLUSTER_COLUMNS = """id, primary_location, latitude, longitude,
+    confidence_score, source_count, unique_source_types,
+    earliest_report, latest_report, city"""
+
+
+def _utc(moment: datetime) -> datetime:
+    """``moment`` with naive datetimes taken as UTC, as the SQLite backend does."""
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _rowcount(status: str) -> int:
+    """Row count of an asyncpg command status such as ``UPDATE 3``."""
+    return int(status.rsplit(" ", 1)[-1])
+
+
+def _lean_record_to_report(record: asyncpg.Record) -> ProcessedReport:
+    (report_id, source_type, source_id, author, timestamp, collected_at,
+     neighborhood, latitude, longitude, cluster_id, city, seq) = record
+    return ProcessedReport(
+        id=report_id,
+        source_type=source_type,
+        source_id=source_id,
+        source_url="",
+        author=author,
+        original_text="",
+        cleaned_text="",
+        timestamp=timestamp,
+        collected_at=collected_at,
+        primary_neighborhood=neighborhood,
+        latitude=latitude,
+        longitude=longitude,
+        is_relevant=True,
+        cluster_id=cluster_id,
+        city=city,
+        text_loaded=False,
+        seq=seq,
+    )
+
+
+def _cluster_row(record: asyncpg.Record) -> dict:
+    """An active cluster shaped like the SQLite backend's rows."""
+    cluster = dict(record)
+    cluster["earliest_report"] = cluster["earliest_report"].isoformat()
+    cluster["latest_report"] = cluster["latest_report"].isoformat()
+    cluster["latest_report_ms"] = round(record["latest_report"].timestamp() * 1000)
+    return cluster
+
+
+class PostgresDatabase(StorageBackend):
+    """Async PostgreSQL storage over an asyncpg connection pool."""
+
+    def __init__(self, config: Config):
+        self.database_url = config.database_url
+        self._pool_size = config.db_pool_size
+        self._pool: asyncpg.Pool | None = None
+        self.registry = ClusterRegistry()
+        self._report_ttl = timedelta(seconds=config.correlation_window_seconds)
+        self._cluster_ttl = timedelta(hours=config.cluster_expiry_hours)
+
+    async def connect(self) -> None:
+        if not self.database_url:
+            raise RuntimeError("DB_BACKEND=postgres needs DATABASE_URL")
+        self._pool = await asyncpg.create_pool(
+            self.database_url, min_size=1, max_size=self._pool_size
+        )
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", SCHEMA_LOCK)
+            await conn.execute(SCHEMA_SQL)
+        await self._load_registry()
+        logger.info("Database initialized on PostgreSQL (pool of %d)", self._pool_size)
+
+    async def _load_registry(self) -> None:
+        """Read notified report keys into memory."""
+        rows = await self._pool.fetch(
+            "SELECT source_type, source_id FROM raw_reports WHERE notified"
+        )
+        self.registry.load([], [tuple(row) for row in rows])
+        logger.info("Loaded %d notified report keys", len(rows))
+
+    async def close(self) -> None:
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+
+    async def insert_raw_report(self, report: RawReport) -> int | None:
+        """Insert a raw report. Returns the row id, or None if duplicate."""
+        return await self._pool.fetchval(
+            """INSERT INTO raw_reports
+               (source_type, source_id, source_url, author,
+                original_text, timestamp, collected_at, raw_metadata)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+               ON CONFLICT (source_type, source_id) DO NOTHING
+               RETURNING id""",
+            report.source_type,
+            report.source_id,
+            report.source_url,
+            report.author,
+            report.text,
+            _utc(report.timestamp),
+            _utc(report.collected_at),
+            json.dumps(report.raw_metadata),
+        )
+
+    async def update_report_processing(
+        self,
+        report_id: int,
+        cleaned_text: str,
+        is_relevant: bool,
+        primary_neighborhood: str | None,
+        latitude: float | None,
+        longitude: float | None,
+        keywords_matched: list[str],
+        city: str = "",
+    ) -> None:
+        # One report per transaction, so its id is the report's watermark
+        await self._pool.execute(
+            """UPDATE raw_reports
+               SET cleaned_text = $1, is_relevant = $2,
+                   primary_neighborhood = $3, latitude = $4, longitude = $5,
+                   keywords_matched = $6, city = $7,
+                   processed_xid = pg_current_xact_id()
+               WHERE id = $8""",
+            cleaned_text,
+            is_relevant,
+            primary_neighborhood,
+            latitude,
+            longitude,
+            json.dumps(keywords_matched),
+            city,
+            report_id,
+        )
+
+    async def get_correlation_cities(self, since: datetime) -> list[str]:
+        """Cities with relevant, un-expired reports collected since a cutoff."""
+        rows = await self._pool.fetch(
+            """SELECT DISTINCT city FROM raw_reports
+               WHERE is_relevant AND NOT expired AND collected_at >= $1""",
+            _utc(since),
+        )
+        return [row["city"] for row in rows]
+
+    async def iter_recent_relevant(
+        self,
+        since: datetime,
+        city: str,
+        after_seq: int = 0,
+        limit: int = 500,
+    ) -> AsyncIterator[ProcessedReport]:
+        """Stream one city's relevant, un-expired reports since a cutoff.
+
+        A report's ``seq`` is the id of the transaction that processed it.
+        Rows with ``seq > after_seq`` are returned, at most ``limit``, in
+        seq order, without texts; rows processed by a transaction that is
+        not older than every running one wait for a later fetch.
+        """
+        rows = await self._pool.fetch(
+            f"""SELECT {LEAN_REPORT_COLUMNS} FROM raw_reports
+                WHERE city = $1
+                  AND is_relevant
+                  AND NOT expired
+                  AND collected_at >= $2
+                  AND processed_xid > $3::bigint::text::xid8
+                  AND processed_xid < pg_snapshot_xmin(pg_current_snapshot())
+                ORDER BY processed_xid
+                LIMIT $4""",
+            city, _utc(since), after_seq, limit,
+        )
+        for row in rows:
+            yield _lean_record_to_report(row)
+
+    async def load_report_texts(self, reports: list[ProcessedReport]) -> None:
+        """Fill in source URL, texts and keywords of lean reports, in place."""
+        pending = {r.id: r for r in reports if not r.text_loaded}
+        if not pending:
+            return
+        rows = await self._pool.fetch(
+            """SELECT id, source_url, original_text, cleaned_text, keywords_matched
+               FROM raw_reports WHERE id = ANY($1::bigint[])""",
+            list(pending),
+        )
+        for report_id, url, original, cleaned, keywords in rows:
+            report = pending[report_id]
+            report.source_url = url
+            report.original_text = original
+            report.cleaned_text = cleaned or ""
+            report.keywords_matched = json.loads(keywords or "[]")
+            report.text_loaded = True
+
+    async def apply_correlation_writes(self, writes: CorrelationWrites) -> list[int]:
+        """Apply one correlation cycle's writes in a single transaction.
+
+        Creates the new clusters, assigns reports to new and existing
+        clusters, marks every assigned report as notified and updates
+        existing cluster stats. Returns the ids of the created clusters
+        in ``writes.new_clusters`` order.
+        """
+        async with self._pool.acquire() as conn, conn.transaction():
+            cluster_ids = []
+            for c in writes.new_clusters:
+                cluster_ids.append(await conn.fetchval(
+                    """INSERT INTO clusters
+                       (primary_location, latitude, longitude, confidence_score,
+                        source_count, unique_source_types, earliest_report,
+                        latest_report, city)
+                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                       RETURNING id""",
+                    c.primary_location,
+                    c.latitude,
+                    c.longitude,
+                    c.confidence_score,
+                    c.source_count,
+                    json.dumps(c.unique_source_types),
+                    _utc(c.earliest_report),
+                    _utc(c.latest_report),
+                    c.city,
+                ))
+
+            assignments = [
+                (cluster_id, report_id)
+                for cluster_id, c in zip(cluster_ids, writes.new_clusters)
+                for report_id in c.report_ids
+            ] + [
+                (u.cluster_id, report_id)
+                for u in writes.updates
+                for report_id in u.new_report_ids
+            ]
+            notified_keys = []
+            if assignments:
+                notified_keys = await conn.fetch(
+                    """UPDATE raw_reports AS r
+                       SET cluster_id = a.cluster_id, notified = TRUE
+                       FROM unnest($1::bigint[], $2::bigint[]) AS a(cluster_id, id)
+                       WHERE r.id = a.id
+                       RETURNING r.source_type, r.source_id""",
+                    [cluster_id for cluster_id, _ in assignments],
+                    [report_id for _, report_id in assignments],
+                )
+
+            if writes.updates:
+                await conn.executemany(
+                    """UPDATE clusters
+                       SET confidence_score = $1, source_count = $2,
+                           unique_source_types = $3, latest_report = $4
+                       WHERE id = $5""",
+                    [
+                        (
+                            u.confidence_score,
+                            u.source_count,
+                            json.dumps(u.unique_source_types),
+                            _utc(u.latest_report),
+                            u.cluster_id,
+                        )
+                        for u in writes.updates
+                    ],
+                )
+
+        for source_type, source_id in notified_keys:
+            self.registry.add_notified(source_type, source_id)
+        return cluster_ids
+
+    async def mark_cluster_notified(self, cluster_id: int) -> None:
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                "UPDATE clusters SET notified = TRUE, notified_at = now() WHERE id = $1",
+                cluster_id,
+            )
+            keys = await conn.fetch(
+                """UPDATE raw_reports SET notified = TRUE WHERE cluster_id = $1
+                   RETURNING source_type, source_id""",
+                cluster_id,
+            )
+        for source_type, source_id in keys:
+            self.registry.add_notified(source_type, source_id)
+
+    async def log_notification(
+        self,
+        cluster_id: int,
+        embed_content: dict,
+        success: bool,
+        error_message: str | None = None,
+    ) -> None:
+        await self._pool.execute(
+            """INSERT INTO notifications
+               (cluster_id, sent_at, embed_content, success, error_message)
+               VALUES ($1, now(), $2, $3, $4)""",
+            cluster_id,
+            json.dumps(embed_content),
+            success,
+            error_message,
+        )
+
+    async def get_notified_cluster_report_ids(self, cluster_id: int) -> set[int]:
+        """Get IDs of reports that were already part of a cluster when it was notified."""
+        rows = await self._pool.fetch(
+            "SELECT id FROM raw_reports WHERE cluster_id = $1 AND notified",
+            cluster_id,
+        )
+        return {row["id"] for row in rows}
+
+    async def get_active_clusters(
+        self, max_age_hours: float = 6.0, now: datetime | None = None
+    ) -> list[dict]:
+        """Get notified clusters that are still active (within max_age_hours).
+
+        Read from the database rather than process memory, so clusters
+        notified by another process are matched too.
+        """
+        now = _utc(now or datetime.now(timezone.utc))
+        rows = await self._pool.fetch(
+            f"""SELECT {ACTIVE_CLUSTER_COLUMNS} FROM clusters
+                WHERE notified AND latest_report >= $1""",
+            now - timedelta(hours=max_age_hours),
+        )
+        return [_cluster_row(row) for row in rows]
+
+    async def expire_due(
+        self, now: datetime | None = None, batch_size: int = 200
+    ) -> tuple[int, int]:
+        """Apply the expirations whose deadline has passed.
+
+        Reports a correlation window past collection are marked expired
+        unless notified; notified clusters whose latest report is
+        ``cluster_expiry_hours`` old are deleted. Each batch of
+        ``batch_size`` rows is found through the partial indexes and
+        locked with SKIP LOCKED, so processes expiring at the same time
+        split the work. Returns ``(expired reports, deleted clusters)``.
+        """
+        now = _utc(now or datetime.now(timezone.utc))
+        expired = deleted = 0
+        while True:
+            count = _rowcount(await self._pool.execute(
+                """UPDATE raw_reports SET expired = TRUE
+                   WHERE id IN (
+                       SELECT id FROM raw_reports
+                       WHERE NOT notified AND NOT expired AND collected_at < $1
+                       LIMIT $2
+                       FOR UPDATE SKIP LOCKED
+                   )""",
+                now - self._report_ttl, batch_size,
+            ))
+            expired += count
+            if count < batch_size:
+                break
+        while True:
+            count = _rowcount(await self._pool.execute(
+                """DELETE FROM clusters
+                   WHERE id IN (
+                       SELECT id FROM clusters
+                       WHERE notified AND latest_report < $1
+                       LIMIT $2
+                       FOR UPDATE SKIP LOCKED
+                   )""",
+                now - self._cluster_ttl, batch_size,
+            ))
+            deleted += count
+            if count < batch_size:
+                break
+        return expired, deleted
+
+    async def purge_old_data(self, days: int = 7) -> None:
+        """Delete reports, clusters and notifications older than N days."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute("DELETE FROM raw_reports WHERE created_at < $1", cutoff)
+            await conn.execute("DELETE FROM clusters WHERE created_at < $1", cutoff)
+            await conn.execute("DELETE FROM notifications WHERE sent_at < $1", cutoff)
+        await self._load_registry()
+        logger.info("Purged data older than %d days", days)
+
+    async def maintain(self, vacuum_pages: int = 512) -> dict | None:
+        """Nothing to do: autovacuum reclaims space and checkpoints are the server's."""
+        return None
@@ -0,0 +1,60 @@
+"""Pool of read-only connections.
+
+aiosqlite runs every call of a connection on that connection's own
+thread, one at a time, so reads sharing a connection queue behind each
+other. Under WAL any number of readers can run alongside the single
+writer, each on its own snapshot; the pool hands out one connection per
+concurrent read. Every connection sets ``query_only``, so a write sent to
+the wrong connection fails instead of bypassing the writer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+class ReaderPool:
+    def __init__(
+        self, path: str, uri: bool = False, size: int = 4, read_uncommitted: bool = False
+    ) -> None:
+        self.path = path
+        self.uri = uri
+        self.size = max(size, 1)
+        # Shared-cache (in-memory) readers would otherwise fail on the
+        # writer's table locks, which busy_timeout does not wait for. They
+        # then read the writer's open batch, including intents that are
+        # later rolled back to their savepoint, so only file databases
+        # read committed data alone
+        self.read_uncommitted = read_uncommitted
+        self._connections: list[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.path, uri=self.uri)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA busy_timeout=5000")
+            await conn.execute("PRAGMA query_only=1")
+            if self.read_uncommitted:
+                await conn.execute("PRAGMA read_uncommitted=1")
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
+        self._connections = []
+        self._idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for the duration of the ``async with`` block."""
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
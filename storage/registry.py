@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+
+class ClusterRegistry:
+    """Write-through copy of the rows the correlator reads every cycle.
+
+    Holds the notified clusters (rows shaped like ``get_active_clusters``
+    results, timestamps as ISO strings) and the ``(source_type,
+    source_id)`` keys of every notified report. The database loads it once
+    at startup and updates it after each committed write, so correlation
+    cycles never rescan ``clusters`` or the notified rows of
+    ``raw_reports``.
+    """
+
+    def __init__(self) -> None:
+        self.clusters: dict[int, dict] = {}
+        # source_type -> notified source_ids; source types are few, so
+        # this avoids building one "type:id" string per report
+        self._notified: dict[str, set[str]] = {}
+
+    def load(self, clusters: list[dict], notified: list[tuple[str, str]]) -> None:
+        self.clusters = {c["id"]: c for c in clusters}
+        self._notified = {}
+        for source_type, source_id in notified:
+            self.add_notified(source_type, source_id)
+
+    def active_clusters(self, cutoff_ms: int) -> list[dict]:
+        """Notified clusters whose latest report is at or after ``cutoff_ms``."""
+        return [
+            dict(c) for c in self.clusters.values() if c["latest_report_ms"] >= cutoff_ms
+        ]
+
+    def put_cluster(self, cluster: dict) -> None:
+        self.clusters[cluster["id"]] = cluster
+
+    def update_cluster(self, cluster_id: int, **fields) -> None:
+        cluster = self.clusters.get(cluster_id)
+        if cluster is not None:
+            cluster.update(fields)
+
+    def drop_clusters_before(self, cutoff_ms: int) -> None:
+        self.clusters = {
+            cid: c for cid, c in self.clusters.items() if c["latest_report_ms"] >= cutoff_ms
+        }
+
+    def drop_clusters(self, cluster_ids: list[int]) -> None:
+        for cluster_id in cluster_ids:
+            self.clusters.pop(cluster_id, None)
+
+    def add_notified(self, source_type: str, source_id: str) -> None:
+        self._notified.setdefault(source_type, set()).add(source_id)
+
+    def discard_notified(self, keys: list[tuple[str, str]]) -> None:
+        for source_type, source_id in keys:
+            self._notified.get(source_type, set()).discard(source_id)
+
+    def is_notified(self, source_type: str, source_id: str) -> bool:
+        return source_id in self._notified.get(source_type, ())
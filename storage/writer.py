@@ -0,0 +1,181 @@
+"""Single-writer task with group commit.
+
+Every write is an *intent*: a function that runs its statements on the
+writer's ``sqlite3`` connection without committing. ``Writer`` queues
+intents from any task and applies them on one dedicated thread: it opens a
+transaction, runs each intent inside its own SAVEPOINT and commits the
+batch once, so a batch costs one thread hop and one fsync however many
+writes it holds. Intents queue up while the previous batch commits; a
+batch closes at ``max_batch`` intents, optionally after waiting
+``linger`` seconds for more. Callers await a future that resolves with
+their intent's result after the commit. An intent that raises is rolled
+back to its savepoint alone and its caller gets the exception, while the
+rest of the batch still commits.
+
+Intents submitted with ``transactional=False`` (schema setup, VACUUM,
+checkpoints) run on their own, between batches, outside any transaction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+
+@dataclass
+class _Intent:
+    op: WriteOp
+    future: asyncio.Future
+    transactional: bool = True
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: BaseException | None = None) -> None:
+    if future.done():
+        return  # Caller was cancelled
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class Writer:
+    """Owns the write connection and applies intents in group-committed batches."""
+
+    def __init__(
+        self,
+        path: str,
+        uri: bool = False,
+        max_batch: int = 200,
+        linger: float = 0.0,
+    ) -> None:
+        self.path = path
+        self.uri = uri
+        self.max_batch = max(max_batch, 1)
+        self.linger = linger
+        self._conn: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._intents: deque[_Intent] = deque()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task: asyncio.Task | None = None
+        # Committed batches and intents, for logging throughput
+        self.batches = 0
+        self.committed = 0
+
+    @property
+    def idle(self) -> bool:
+        """Whether no intents are waiting to be applied."""
+        return not self._intents
+
+    async def start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._conn = await self._in_thread(self._open)
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="db-writer")
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode: the writer issues BEGIN / COMMIT itself
+        conn = sqlite3.connect(
+            self.path, uri=self.uri, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    async def stop(self) -> None:
+        """Apply every queued intent, then close the connection."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await self._in_thread(self._conn.close)
+        self._executor.shutdown()
+        self._conn = self._executor = None
+
+    async def submit(self, op: WriteOp, transactional: bool = True) -> Any:
+        """Queue ``op`` and wait until it is committed. Returns its result."""
+        if self._task is None or self._closing:
+            raise RuntimeError("Database writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._intents.append(_Intent(op, future, transactional))
+        self._wakeup.set()
+        return await future
+
+    async def _in_thread(self, fn, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._intents:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if not self._intents[0].transactional:
+                intent = self._intents.popleft()
+                if not intent.future.done():
+                    try:
+                        result = await self._in_thread(intent.op, self._conn)
+                    except Exception as e:
+                        _resolve(intent.future, error=e)
+                    else:
+                        _resolve(intent.future, result)
+                continue
+            if self.linger > 0 and len(self._intents) < self.max_batch:
+                await asyncio.sleep(self.linger)
+            batch = []
+            while (
+                self._intents
+                and len(batch) < self.max_batch
+                and self._intents[0].transactional
+            ):
+                intent = self._intents.popleft()
+                if not intent.future.done():
+                    batch.append(intent)
+            if not batch:
+                continue
+            try:
+                outcomes = await self._in_thread(self._apply, [i.op for i in batch])
+            except Exception as e:
+                # BEGIN or COMMIT itself failed: nothing in the batch was written
+                logger.exception("Write batch of %d failed", len(batch))
+                for intent in batch:
+                    _resolve(intent.future, error=e)
+                continue
+            self.batches += 1
+            self.committed += len(batch)
+            for intent, (result, error) in zip(batch, outcomes):
+                _resolve(intent.future, result, error)
+
+    def _apply(self, ops: list[WriteOp]) -> list[tuple[Any, Exception | None]]:
+        """Run ``ops`` in one transaction, each in its own savepoint."""
+        conn = self._conn
+        outcomes: list[tuple[Any, Exception | None]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op in ops:
+                conn.execute("SAVEPOINT intent")
+                try:
+                    outcomes.append((op(conn), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO intent")
+                    outcomes.append((None, e))
+                conn.execute("RELEASE intent")
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return outcomes
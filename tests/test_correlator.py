@@ -0,0 +1,427 @@
+"""Tests for the incremental correlation engine."""
+import dataclasses
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from config import Config
+from processing.location_extractor import haversine_km
+from correlation.blocking import candidate_pairs
+from correlation import correlator as correlator_module
+from correlation.correlator import Correlator
+from correlation.density import density_clusters
+from correlation.jobs import run_scoring_job
+from correlation.scoring import ReportArrays, geo_scores
+from correlation.state import CorrelationWindow
+from correlation.summary import ClusterSummary, content_vectors
+from storage.database import Database
+from storage.models import ProcessedReport, RawReport
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def db():
+    database = Database(Config(db_path=":memory:"))
+    await database.connect()
+    yield database
+    await database.close()
+
+
+@pytest.fixture
+def correlator(db):
+    return Correlator(Config(db_path=":memory:"), db)
+
+
+async def add_report(
+    db, source_type, source_id, text, minutes_ago=5, author=None,
+    lat=44.9486, lon=-93.2620, neighborhood="Powderhorn", city="minneapolis",
+):
+    ts = NOW - timedelta(minutes=minutes_ago)
+    row_id = await db.insert_raw_report(RawReport(
+        source_type=source_type,
+        source_id=source_id,
+        source_url="",
+        author=author or f"{source_type}-{source_id}",
+        text=text,
+        timestamp=ts,
+        collected_at=ts,
+    ))
+    await db.update_report_processing(
+        report_id=row_id,
+        cleaned_text=text.lower(),
+        is_relevant=True,
+        primary_neighborhood=neighborhood,
+        latitude=lat,
+        longitude=lon,
+        keywords_matched=["ice agents"],
+        city=city,
+    )
+    return row_id
+
+
+async def test_corroborated_pair_becomes_incident(db, correlator):
+    await add_report(db, "bluesky", "1", "ICE agents detaining a man at Lake Street and Chicago Ave")
+    await add_report(db, "reddit", "2", "saw ice agents detain someone on lake street by chicago ave")
+
+    incidents = await correlator.run_cycle()
+
+    assert len(incidents) == 1
+    assert incidents[0].notification_type == "new"
+    assert incidents[0].source_count == 2
+    assert all(r.cluster_id == incidents[0].cluster_id for r in incidents[0].reports)
+    # Nothing new arrived, so the next cycle does no work
+    assert await correlator.run_cycle() == []
+
+
+async def test_only_scored_and_notified_reports_load_texts(db, correlator):
+    await add_report(db, "iceout", "1", "ICE checkpoint reported on Lake Street")
+    await add_report(db, "bluesky", "2", "quiet chicago report", city="chicago")
+
+    [incident] = await correlator.run_cycle()
+
+    # The single-source alert reaches the notifier with its text; the lone
+    # Chicago report never reached content scoring
+    assert incident.reports[0].original_text == "ICE checkpoint reported on Lake Street"
+    [chicago] = correlator.window.unclustered("chicago")
+    assert not chicago.text_loaded
+
+
+async def test_fts_candidates_limit_what_arrivals_are_scored_against(db):
+    correlator = Correlator(Config(db_path=":memory:", correlation_fts_candidates=5), db)
+    # Same author, so these two never link with each other
+    await add_report(db, "bluesky", "1", "Unmarked vans near Cedar-Riverside",
+                     lat=44.97, lon=-93.25, author="a")
+    await add_report(db, "bluesky", "2", "Quiet morning, coffee downtown",
+                     lat=44.97, lon=-93.25, author="a")
+    assert await correlator.run_cycle() == []
+
+    await add_report(db, "reddit", "3", "unmarked vans spotted near cedar riverside",
+                     lat=44.97, lon=-93.25)
+    [incident] = await correlator.run_cycle()
+
+    # The unrelated report shares no words with the arrival, so it was
+    # never scored against it
+    assert sorted(r.source_id for r in incident.reports) == ["1", "3"]
+    assert correlator.traces.snapshot()[-1]["pairs_evaluated"] == 1
+
+
+async def test_only_new_arrivals_are_scored(db, correlator, monkeypatch):
+    await add_report(db, "bluesky", "1", "Unmarked vans near Cedar-Riverside", lat=44.97, lon=-93.25)
+    await add_report(db, "bluesky", "2", "Quiet night at the Mercado", lat=45.15, lon=-93.50,
+                     neighborhood="Northeast")
+    assert await correlator.run_cycle() == []
+    assert len(correlator.window) == 2
+
+    calls = []
+
+    def spy(job):
+        calls.append((len(job.texts), job.start))
+        return run_scoring_job(job)
+
+    monkeypatch.setattr(correlator_module, "run_scoring_job", spy)
+    await add_report(db, "reddit", "3", "ICE vans at cedar riverside right now", lat=44.97, lon=-93.25)
+    incidents = await correlator.run_cycle()
+
+    assert calls == [(3, 2)]
+    assert len(incidents) == 1
+    assert {r.source_id for r in incidents[0].reports} == {"1", "3"}
+
+
+async def test_new_report_updates_notified_cluster(db, correlator):
+    await add_report(db, "bluesky", "1", "ICE raid at the Karmel Mall, black SUVs")
+    await add_report(db, "twitter", "2", "ICE raiding the Karmel Mall now, black suvs outside")
+    [incident] = await correlator.run_cycle()
+    await db.mark_cluster_notified(incident.cluster_id)
+
+    await add_report(db, "iceout", "3", "ICE raid reported at Karmel Mall. Black SUVs on scene.")
+    [update] = await correlator.run_cycle()
+
+    assert update.notification_type == "update"
+    assert update.cluster_id == incident.cluster_id
+    assert [r.source_id for r in update.new_reports] == ["3"]
+    assert update.source_count == 3
+
+
+async def test_older_report_joins_through_member_added_last_cycle(db, correlator, monkeypatch):
+    # Reports join only through the member named in ``links``
+    links = {}
+
+    def match_cluster(self, cluster_id, members, candidates, vector, trace):
+        member_ids = {m.id for m in members}
+        matches = [
+            c for c in candidates if c.cluster_id is None and links.get(c.id) in member_ids
+        ]
+        return self._cluster_summary(cluster_id, members), matches
+
+    await add_report(db, "bluesky", "1", "ICE raid at the Karmel Mall, black SUVs")
+    await add_report(db, "twitter", "2", "ICE raiding the Karmel Mall now, black suvs outside")
+    [incident] = await correlator.run_cycle()
+    await db.mark_cluster_notified(incident.cluster_id)
+    monkeypatch.setattr(Correlator, "_match_cluster", match_cluster)
+
+    older = await add_report(db, "reddit", "3", "checkpoint on hiawatha", author="carol")
+    assert await correlator.run_cycle() == []
+    newer = await add_report(db, "iceout", "4", "agents still at the mall", author="carol")
+    links[newer] = incident.reports[0].id
+    links[older] = newer
+    [joined] = await correlator.run_cycle()
+    assert [r.id for r in joined.new_reports] == [newer]
+
+    # No arrivals, but the cluster grew: the older report is checked again
+    [update] = await correlator.run_cycle()
+    assert [r.id for r in update.new_reports] == [older]
+    assert update.source_count == 4
+
+
+async def test_same_author_reports_do_not_corroborate(db, correlator):
+    await add_report(db, "bluesky", "1", "ICE at Powderhorn Park", author="alice")
+    await add_report(db, "bluesky", "2", "ICE still at Powderhorn Park", author="alice")
+    assert await correlator.run_cycle() == []
+    assert correlator.window.pair_scores == {}
+
+
+async def test_worker_pool_matches_inline(db):
+    await add_report(db, "bluesky", "1", "ICE agents detaining a man at Lake Street and Chicago Ave")
+    await add_report(db, "reddit", "2", "saw ice agents detain someone on lake street by chicago ave")
+    await add_report(db, "bluesky", "3", "ICE vans outside Central High School", city="stpaul",
+                     lat=44.95, lon=-93.11, neighborhood="Summit-University")
+    await add_report(db, "twitter", "4", "ice vans at central high school right now", city="stpaul",
+                     lat=44.95, lon=-93.11, neighborhood="Summit-University")
+    correlator = Correlator(Config(db_path=":memory:", correlation_workers=2), db)
+    try:
+        incidents = await correlator.run_cycle()
+    finally:
+        correlator.close()
+
+    assert sorted(i.city for i in incidents) == ["minneapolis", "stpaul"]
+    assert all(i.source_count == 2 for i in incidents)
+
+
+async def test_late_scoring_job_is_retried(db, correlator, monkeypatch):
+    await add_report(db, "bluesky", "1", "ICE raid at the Karmel Mall, black SUVs")
+    await add_report(db, "twitter", "2", "ICE raiding the Karmel Mall now, black suvs outside")
+
+    async def missed_deadline(jobs):
+        return {city: None for city in jobs}
+
+    monkeypatch.setattr(correlator, "_run_scoring_jobs", missed_deadline)
+    assert await correlator.run_cycle() == []
+    assert [r.id for r in correlator._deferred["minneapolis"]] == [1, 2]
+
+    monkeypatch.undo()
+    [incident] = await correlator.run_cycle()
+    assert incident.source_count == 2
+    assert correlator._deferred == {}
+
+
+async def test_city_over_budget_catches_up(db):
+    correlator = Correlator(Config(db_path=":memory:", correlation_city_budget=2), db)
+    for n in range(3):
+        await add_report(db, "bluesky", f"m{n}", f"quiet report {n}", lat=44.9 + n, author=f"a{n}")
+    await add_report(db, "reddit", "c1", "quiet chicago report", city="chicago")
+
+    await correlator.run_cycle()
+    assert sorted(r.source_id for r in correlator.window.reports.values()) == ["c1", "m0", "m1"]
+    await correlator.run_cycle()
+    assert len(correlator.window) == 4
+
+
+def test_window_evicts_in_collection_order():
+    window = CorrelationWindow()
+    for report_id, minutes_ago in [(1, 200), (2, 10), (3, 190)]:
+        ts = NOW - timedelta(minutes=minutes_ago)
+        window.add(ProcessedReport(
+            id=report_id, source_type="bluesky", source_id=str(report_id),
+            source_url="", author="", original_text="", cleaned_text="",
+            timestamp=ts, collected_at=ts, city="minneapolis", seq=report_id,
+        ))
+    window.link(1, 2, 0.5)
+    window.link(2, 3, 0.6)
+
+    evicted = window.evict(NOW - timedelta(minutes=180))
+
+    assert [r.id for r in evicted] == [1, 3]
+    assert list(window.reports) == [2]
+    assert window.pair_scores == {}
+    assert window.last_seqs == {"minneapolis": 3}
+
+
+def random_reports(n, seed, no_coords_rate=0.3):
+    """Reports scattered over ~60 km and 8 hours, some without coordinates."""
+    rng = random.Random(seed)
+    words = ["ice", "agents", "van", "lake", "street", "raid", "park", "mall",
+             "detained", "suv", "corner", "market", "school", "bus", "north"]
+    reports = []
+    for i in range(n):
+        ts = NOW - timedelta(minutes=rng.uniform(0, 480))
+        located = rng.random() > no_coords_rate
+        reports.append(ProcessedReport(
+            id=i + 1,
+            source_type=rng.choice(["bluesky", "reddit", "iceout", "twitter"]),
+            source_id=str(i),
+            source_url="",
+            author=rng.choice(["a", "b", "c", "d", "e"]),
+            original_text="",
+            cleaned_text=" ".join(rng.sample(words, 4)),
+            timestamp=ts,
+            collected_at=ts,
+            primary_neighborhood=rng.choice([None, "Powderhorn", "Phillips"]),
+            latitude=44.98 + rng.uniform(-0.3, 0.3) if located else None,
+            longitude=-93.26 + rng.uniform(-0.4, 0.4) if located else None,
+            city="minneapolis",
+        ))
+    return reports
+
+
+def reference_score(config, ri, rj, content):
+    """The original per-pair scorer, kept as the parity reference."""
+    if ri.author == rj.author and ri.source_type == rj.source_type:
+        return None
+    window = config.correlation_window_seconds
+    time_diff = abs((ri.timestamp - rj.timestamp).total_seconds())
+    if time_diff > window:
+        return None
+    temporal = 1.0 - (time_diff / window)
+
+    if None not in (ri.latitude, ri.longitude, rj.latitude, rj.longitude):
+        dist = haversine_km(ri.latitude, ri.longitude, rj.latitude, rj.longitude)
+        if dist <= config.geo_proximity_km:
+            geo = 1.0
+        elif dist <= config.geo_proximity_km * 3:
+            geo = 0.5
+        else:
+            geo = 0.2
+    elif ri.primary_neighborhood and rj.primary_neighborhood:
+        geo = 1.0 if ri.primary_neighborhood == rj.primary_neighborhood else 0.5
+    else:
+        geo = 0.3
+    return 0.30 * temporal + 0.35 * geo + 0.35 * content
+
+
+@pytest.mark.parametrize("start", [0, 60])
+def test_vectorized_scoring_matches_reference(start):
+    correlator = Correlator(Config(db_path=":memory:"), db=None)
+    reports = random_reports(80, seed=start)
+
+    scored = correlator._score_pairs(reports, start=start)
+
+    sim = correlator.similarity.compute_sparse(
+        [r.cleaned_text for r in reports], start=start
+    )
+    expected = {}
+    for j in range(start, len(reports)):
+        for i in range(j):
+            score = reference_score(correlator.config, reports[i], reports[j], sim[i, j])
+            if score is not None and score >= 0.40:
+                expected[(i, j)] = score
+    assert scored.keys() == expected.keys()
+    # Epoch floats vs timedelta arithmetic differ in the last few ulps
+    assert all(abs(scored[k] - expected[k]) < 1e-9 for k in scored)
+
+
+def test_geo_scores_match_reference():
+    config = Config(db_path=":memory:")
+    reports = random_reports(60, seed=11)
+    arrays = ReportArrays.from_reports(reports)
+    I, J = np.triu_indices(len(reports), k=1)
+
+    geo = geo_scores(arrays, I, J, config.geo_proximity_km)
+
+    for k, (i, j) in enumerate(zip(I.tolist(), J.tolist())):
+        # Same time, distinct author and no content: only geo varies
+        rj = dataclasses.replace(reports[j], author="other", timestamp=reports[i].timestamp)
+        ref = reference_score(config, reports[i], rj, 0.0)
+        assert abs(0.30 + 0.35 * geo[k] - ref) < 1e-12
+
+
+def test_blocking_skips_distant_pairs():
+    reports = random_reports(200, seed=3, no_coords_rate=0.0)
+    I, J = candidate_pairs(ReportArrays.from_reports(reports), window_seconds=10800, cell_km=9.0)
+    assert np.all(I < J)
+    assert len(I) < 200 * 199 // 2 / 2
+
+
+async def test_cycle_trace_records_stages(db, correlator, tmp_path):
+    await add_report(db, "bluesky", "1", "ICE agents detaining a man at Lake Street and Chicago Ave")
+    await add_report(db, "reddit", "2", "saw ice agents detain someone on lake street by chicago ave")
+    await correlator.run_cycle()
+    await correlator.run_cycle()
+
+    first, second = correlator.traces.snapshot()
+    assert first["reports_fetched"] == 2
+    assert first["pairs_evaluated"] == 1 and first["pairs_kept"] == 1
+    assert first["incidents"] == 1
+    assert all(first["stages"][s] > 0 for s in ("fetch", "vectorize", "scoring", "writeback"))
+    assert second["reports_fetched"] == 0 and second["pairs_evaluated"] == 0
+
+    path = tmp_path / "traces.jsonl"
+    assert correlator.traces.dump(path) == 2
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_cluster_summary_bounds_hold_for_hashing_backend():
+    correlator = Correlator(Config(db_path=":memory:", similarity_backend="hashing"), db=None)
+    reports = random_reports(120, seed=5, no_coords_rate=0.2)
+    rng = random.Random(5)
+    for _ in range(40):
+        members = rng.sample(reports, rng.randint(1, 12))
+        summary = ClusterSummary.build(members)
+        for report in rng.sample(reports, 10):
+            lower, upper = summary.bounds(
+                report,
+                content_vectors([report]),
+                correlator.config.correlation_window_seconds,
+                correlator.config.geo_proximity_km,
+            )
+            score = correlator._score_against_cluster(report, members)
+            assert lower - 1e-9 <= score <= upper + 1e-9
+
+
+def test_cluster_summary_folds_members_incrementally():
+    reports = random_reports(20, seed=8)
+    built = ClusterSummary.build(reports)
+    folded = ClusterSummary.build(reports[:5])
+    for r in reports[5:]:
+        folded.add(r, content_vectors([r]))
+
+    assert folded.member_ids == built.member_ids
+    assert (folded.vec_sum - built.vec_sum).nnz == 0
+    assert (folded.vec_max != built.vec_max).nnz == 0
+    assert folded.centroid() == pytest.approx(built.centroid())
+    assert folded.spread_km >= built.spread_km - 1e-9
+    assert (folded.t_min, folded.t_max, folded.authors) == (built.t_min, built.t_max, built.authors)
+
+
+@pytest.mark.parametrize("engine, expected", [("linkage", {"1", "2", "3"}), ("density", {"1", "2"})])
+async def test_density_engine_does_not_chain_unrelated_reports(db, engine, expected):
+    await add_report(db, "bluesky", "1", "ICE agents detaining a man at Lake Street and Chicago Ave",
+                     lat=44.9486, lon=-93.2620)
+    await add_report(db, "reddit", "2", "ice agents detaining someone at lake street and chicago ave",
+                     lat=44.9606, lon=-93.2620)
+    # Near report 2 in space and time, but about something else
+    await add_report(db, "twitter", "3", "Farmers market opening day, great strawberries",
+                     lat=44.9756, lon=-93.2620)
+    config = Config(db_path=":memory:", clustering_engine=engine)
+
+    [incident] = await Correlator(config, db).run_cycle()
+
+    assert {r.source_id for r in incident.reports} == expected
+
+
+def test_density_clusters_cores_and_borders():
+    # 0-1-2 form a dense core with border 3; the pair 4-5 is too sparse
+    I = np.array([0, 0, 1, 2, 4])
+    J = np.array([1, 2, 2, 3, 5])
+    clusters = density_clusters(6, I, J, min_samples=3)
+    assert [c.tolist() for c in clusters] == [[0, 1, 2, 3]]
+    # With min_samples=2 every linked report is a core, like single linkage
+    clusters = density_clusters(6, I, J, min_samples=2)
+    assert [c.tolist() for c in clusters] == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_unknown_clustering_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown clustering engine"):
+        Correlator(Config(db_path=":memory:", clustering_engine="kmeans"), db=None)
@@ -0,0 +1,545 @@
+"""Tests for the SQLite storage layer."""
+import asyncio
+import sqlite3
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import Config
+from storage.backend import create_database
+from storage.database import Database, epoch_ms
+from storage.expiry import ExpiryScheduler
+from storage.models import ClusterUpdate, CorrelationWrites, NewCluster, RawReport
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def db():
+    database = Database(Config(db_path=":memory:"))
+    await database.connect()
+    yield database
+    await database.close()
+
+
+async def insert_reports(db, count, city="minneapolis", source_type="bluesky", minutes_ago=5):
+    ids = []
+    for n in range(count):
+        ts = NOW - timedelta(minutes=minutes_ago)
+        row_id = await db.insert_raw_report(RawReport(
+            source_type=source_type,
+            source_id=f"{city}-{source_type}-{minutes_ago}-{n}",
+            source_url="",
+            author=f"author{n}",
+            text=f"ICE agents report {n}",
+            timestamp=ts,
+            collected_at=ts,
+        ))
+        await db.update_report_processing(
+            report_id=row_id,
+            cleaned_text=f"ice agents report {n}",
+            is_relevant=True,
+            primary_neighborhood=None,
+            latitude=None,
+            longitude=None,
+            keywords_matched=[],
+            city=city,
+        )
+        ids.append(row_id)
+    return ids
+
+
+def new_cluster(report_ids, unique_source_types=("bluesky",)):
+    return NewCluster(
+        primary_location="Powderhorn",
+        latitude=None,
+        longitude=None,
+        confidence_score=0.7,
+        source_count=len(report_ids),
+        unique_source_types=list(unique_source_types),
+        earliest_report=NOW,
+        latest_report=NOW,
+        report_ids=report_ids,
+        city="minneapolis",
+    )
+
+
+async def fetch_all(db, sql, params=()):
+    async with db._readers.connection() as conn:
+        cursor = await conn.execute(sql, params)
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+async def test_apply_correlation_writes_in_one_transaction(db):
+    ids = await insert_reports(db, 4)
+    [first] = await db.apply_correlation_writes(
+        CorrelationWrites(new_clusters=[new_cluster(ids[:2])])
+    )
+
+    [second] = await db.apply_correlation_writes(CorrelationWrites(
+        new_clusters=[new_cluster(ids[2:3])],
+        updates=[ClusterUpdate(
+            cluster_id=first,
+            confidence_score=0.9,
+            source_count=3,
+            unique_source_types=["bluesky", "reddit"],
+            latest_report=NOW,
+            new_report_ids=[ids[3]],
+        )],
+    ))
+
+    rows = await fetch_all(db, "SELECT id, cluster_id, notified FROM raw_reports ORDER BY id")
+    assert rows == [
+        (ids[0], first, 1), (ids[1], first, 1), (ids[2], second, 1), (ids[3], first, 1),
+    ]
+    assert await fetch_all(db, "SELECT source_count FROM clusters WHERE id = ?", (first,)) == [(3,)]
+
+
+async def test_failed_write_back_leaves_nothing(db):
+    ids = await insert_reports(db, 2)
+    writes = CorrelationWrites(new_clusters=[new_cluster(ids[:1]), new_cluster(ids[1:])])
+    # A set is not JSON serializable, so the second insert fails
+    writes.new_clusters[1].unique_source_types = {"bluesky"}
+
+    with pytest.raises(TypeError):
+        await db.apply_correlation_writes(writes)
+
+    assert await fetch_all(db, "SELECT COUNT(*) FROM clusters") == [(0,)]
+    assert await fetch_all(db, "SELECT COUNT(*) FROM raw_reports WHERE notified = 1") == [(0,)]
+
+
+async def test_recent_relevant_is_fetched_per_city(db):
+    surge = await insert_reports(db, 5, city="minneapolis")
+    [quiet] = await insert_reports(db, 1, city="chicago")
+    since = NOW - timedelta(hours=1)
+
+    assert sorted(await db.get_correlation_cities(since)) == ["chicago", "minneapolis"]
+    first = [r.id async for r in db.iter_recent_relevant(since, "minneapolis", limit=3)]
+    rest = [
+        r.id async for r in db.iter_recent_relevant(since, "minneapolis", after_seq=first[-1])
+    ]
+    assert first + rest == surge
+    assert [r.id async for r in db.iter_recent_relevant(since, "chicago", limit=3)] == [quiet]
+
+
+async def test_texts_are_loaded_on_demand(db):
+    ids = await insert_reports(db, 3)
+    since = NOW - timedelta(hours=1)
+    reports = [r async for r in db.iter_recent_relevant(since, "minneapolis")]
+    assert [r.id for r in reports] == ids
+    assert not any(r.text_loaded or r.original_text or r.cleaned_text for r in reports)
+    assert reports[0].timestamp == NOW - timedelta(minutes=5)
+
+    await db.load_report_texts(reports[:2])
+    assert [r.text_loaded for r in reports] == [True, True, False]
+    assert reports[1].original_text == "ICE agents report 1"
+    assert reports[1].cleaned_text == "ice agents report 1"
+    assert reports[1].keywords_matched == []
+
+
+# Hot queries, the index each must use, and whether it must be covering
+QUERY_PLANS = [
+    (
+        """SELECT * FROM raw_reports
+           WHERE city = ? AND is_relevant = 1 AND expired = 0
+             AND collected_at_ms >= ? AND id > ?
+           ORDER BY id LIMIT ?""",
+        ("minneapolis", 0, 0, 500),
+        "idx_raw_reports_live_city", False,
+    ),
+    (
+        """SELECT DISTINCT city FROM raw_reports
+           WHERE is_relevant = 1 AND expired = 0 AND collected_at_ms >= ?""",
+        (0,),
+        "idx_raw_reports_live_city", True,
+    ),
+    (
+        "SELECT id, collected_at_ms FROM raw_reports WHERE notified = 0 AND expired = 0",
+        (),
+        "idx_raw_reports_pending", True,
+    ),
+    (
+        """UPDATE raw_reports SET expired = 1
+           WHERE notified = 0 AND expired = 0 AND collected_at_ms < ?""",
+        (0,),
+        "idx_raw_reports_pending", False,
+    ),
+    (
+        "SELECT source_type, source_id FROM raw_reports WHERE notified = 1",
+        (),
+        "idx_raw_reports_notified_keys", True,
+    ),
+    (
+        "SELECT id FROM raw_reports WHERE cluster_id = ? AND notified = 1",
+        (1,),
+        "idx_raw_reports_cluster", True,
+    ),
+    (
+        "UPDATE raw_reports SET notified = 1 WHERE cluster_id = ?",
+        (1,),
+        "idx_raw_reports_cluster", False,
+    ),
+    (
+        "DELETE FROM clusters WHERE notified = 1 AND latest_report_ms < ?",
+        (0,),
+        "idx_clusters_notified", False,
+    ),
+    (
+        "SELECT DISTINCT collected_at_ms / ? FROM raw_reports WHERE collected_at_ms < ?",
+        (86_400_000, 0),
+        "idx_raw_reports_collected", True,
+    ),
+    (
+        "DELETE FROM notifications WHERE sent_at_ms < ?",
+        (0,),
+        "idx_notifications_sent", False,
+    ),
+]
+
+
+@pytest.mark.parametrize("sql, params, index, covering", QUERY_PLANS)
+async def test_hot_queries_use_their_indexes(db, sql, params, index, covering):
+    plan = [row[-1] for row in await fetch_all(db, "EXPLAIN QUERY PLAN " + sql, params)]
+    expected = f"USING COVERING INDEX {index}" if covering else f"INDEX {index}"
+    assert any(expected in step for step in plan), plan
+
+
+async def test_registry_tracks_writes_without_rescans(db):
+    ids = await insert_reports(db, 3)
+    [cluster_id] = await db.apply_correlation_writes(
+        CorrelationWrites(new_clusters=[new_cluster(ids[:2])])
+    )
+    assert db.is_source_notified("bluesky", "minneapolis-bluesky-5-0")
+    assert not db.is_source_notified("bluesky", "minneapolis-bluesky-5-2")
+    # Un-notified clusters are not active yet
+    assert await db.get_active_clusters() == []
+
+    await db.mark_cluster_notified(cluster_id)
+    await db.apply_correlation_writes(CorrelationWrites(updates=[ClusterUpdate(
+        cluster_id=cluster_id,
+        confidence_score=0.8,
+        source_count=3,
+        unique_source_types=["bluesky"],
+        latest_report=NOW,
+        new_report_ids=[ids[2]],
+    )]))
+    cached = await db.get_active_clusters()
+
+    # A reload from the tables gives the same view
+    await db._load_registry()
+    assert await db.get_active_clusters() == cached
+    assert cached[0]["source_count"] == 3
+    assert db.is_source_notified("bluesky", "minneapolis-bluesky-5-2")
+
+
+def test_expiry_scheduler_skips_superseded_cluster_deadlines():
+    now, minute = epoch_ms(NOW), 60_000
+    scheduler = ExpiryScheduler()
+    scheduler.schedule_cluster(1, now - 5 * minute)
+    scheduler.schedule_cluster(2, now - minute)
+    # Cluster 1 got a later report; its first deadline no longer counts
+    scheduler.schedule_cluster(1, now + 5 * minute)
+    scheduler.schedule_report(7, now - minute)
+    scheduler.schedule_report(8, now + minute)
+
+    assert scheduler.due_clusters(now, limit=10) == [2]
+    assert scheduler.due_reports(now, limit=10) == [7]
+    assert scheduler.due_clusters(now + 10 * minute, limit=10) == [1]
+    assert len(scheduler) == 1
+
+
+async def test_expire_due_applies_deadlines_in_batches(db):
+    stale = await insert_reports(db, 5, minutes_ago=db._report_ttl_ms / 60_000 + 10)
+    fresh = await insert_reports(db, 2)
+    [cluster_id] = await db.apply_correlation_writes(
+        CorrelationWrites(new_clusters=[new_cluster(stale[:2])])
+    )
+    await db.mark_cluster_notified(cluster_id)
+
+    # Notified reports are skipped; the cluster's latest report is recent
+    assert await db.expire_due(batch_size=2) == (3, 0)
+    assert await fetch_all(db, "SELECT id FROM raw_reports WHERE expired = 1") == [
+        (i,) for i in stale[2:]
+    ]
+    assert await db.expire_due() == (0, 0)
+
+    later = NOW + timedelta(milliseconds=db._cluster_ttl_ms, minutes=1)
+    assert await db.expire_due(now=later) == (len(fresh), 1)
+    assert await fetch_all(db, "SELECT id FROM clusters") == []
+    assert await db.get_active_clusters(now=later) == []
+
+
+async def test_expiry_is_seeded_at_connect(tmp_path):
+    config = Config(db_path=str(tmp_path / "reports.db"))
+    db = Database(config)
+    await db.connect()
+    ids = await insert_reports(db, 2, minutes_ago=config.correlation_window_seconds / 60 + 10)
+    await db.close()
+
+    db = Database(config)
+    await db.connect()
+    try:
+        assert len(db.expiry) == 2
+        assert await db.expire_due() == (2, 0)
+        assert await fetch_all(db, "SELECT id FROM raw_reports WHERE expired = 1") == [
+            (i,) for i in ids
+        ]
+    finally:
+        await db.close()
+
+
+def raw_report(source_id):
+    return RawReport(
+        source_type="bluesky",
+        source_id=source_id,
+        source_url="",
+        author="author",
+        text="ICE agents seen",
+        timestamp=NOW,
+        collected_at=NOW,
+    )
+
+
+async def test_concurrent_writes_are_group_committed(db):
+    # The duplicate fails inside the shared transaction without taking
+    # the other writes in its batch down with it
+    ids = await asyncio.gather(*(
+        db.insert_raw_report(raw_report(f"post-{n % 40}")) for n in range(41)
+    ))
+    assert ids[40] is None
+    assert len(set(ids[:40])) == 40
+    assert db._writer.batches < 41
+    assert await fetch_all(db, "SELECT COUNT(*) FROM raw_reports") == [(40,)]
+
+
+async def test_reader_sees_committed_writes(tmp_path):
+    db = Database(Config(db_path=str(tmp_path / "reports.db")))
+    await db.connect()
+    try:
+        ids = await insert_reports(db, 2)
+        since = NOW - timedelta(hours=1)
+        assert [r.id async for r in db.iter_recent_relevant(since, "minneapolis")] == ids
+    finally:
+        await db.close()
+
+
+async def test_pooled_reads_run_concurrently_and_reject_writes(tmp_path):
+    db = Database(Config(db_path=str(tmp_path / "reports.db"), db_read_connections=2))
+    await db.connect()
+    try:
+        await insert_reports(db, 2)
+        async with db._readers.connection() as conn:
+            # The other connection stays available while this one is held
+            assert await fetch_all(db, "SELECT COUNT(*) FROM raw_reports") == [(2,)]
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                await conn.execute("DELETE FROM raw_reports")
+    finally:
+        await db.close()
+
+
+async def test_epoch_columns_are_added_and_backfilled(tmp_path):
+    path = tmp_path / "old.db"
+    old = sqlite3.connect(path)
+    old.executescript(
+        """CREATE TABLE raw_reports (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               source_type TEXT NOT NULL, source_id TEXT NOT NULL,
+               source_url TEXT, author TEXT, original_text TEXT NOT NULL,
+               cleaned_text TEXT, timestamp TEXT NOT NULL,
+               collected_at TEXT NOT NULL, raw_metadata TEXT,
+               is_relevant INTEGER DEFAULT 0, primary_neighborhood TEXT,
+               latitude REAL, longitude REAL, keywords_matched TEXT,
+               cluster_id INTEGER, notified INTEGER DEFAULT 0,
+               expired INTEGER DEFAULT 0,
+               created_at TEXT DEFAULT (datetime('now')),
+               UNIQUE(source_type, source_id));
+           CREATE INDEX idx_raw_reports_correlation
+               ON raw_reports(is_relevant, notified, expired, collected_at);"""
+    )
+    posted = NOW - timedelta(minutes=20)
+    old.execute(
+        """INSERT INTO raw_reports (source_type, source_id, original_text,
+               timestamp, collected_at, is_relevant)
+           VALUES ('reddit', 'r1', 'ICE at the corner', ?, ?, 1)""",
+        (posted.isoformat(), NOW.isoformat()),
+    )
+    old.commit()
+    old.close()
+
+    db = Database(Config(db_path=str(path)))
+    await db.connect()
+    try:
+        rows = await fetch_all(db, "SELECT timestamp_ms, collected_at_ms FROM raw_reports")
+        assert rows == [(epoch_ms(posted), epoch_ms(NOW))]
+        indexes = {name for (name,) in await fetch_all(
+            db, "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )}
+        assert "idx_raw_reports_correlation" not in indexes
+        assert "idx_raw_reports_live_city" in indexes
+        since = NOW - timedelta(minutes=5)
+        assert await db.get_correlation_cities(since) == [""]
+    finally:
+        await db.close()
+
+
+async def test_maintain_vacuums_incrementally_and_truncates_wal(tmp_path):
+    path = tmp_path / "reports.db"
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE legacy (x)")
+    old.commit()
+    old.close()
+
+    config = replace(Config(db_path=str(path)), db_wal_truncate_mb=0.0)
+    db = Database(config)
+    await db.connect()
+    try:
+        # An existing database is converted to incremental auto-vacuum
+        assert await fetch_all(db, "PRAGMA auto_vacuum") == [(2,)]
+        await insert_reports(db, 300)
+        await db._execute_write("DELETE FROM raw_reports")
+        assert (await db.storage_stats())["freelist_count"] > 0
+
+        stats = await db.maintain(vacuum_pages=1_000_000)
+        assert stats["vacuumed_pages"] > 0
+        assert stats["freelist_count"] == 0
+        assert stats["checkpoint"] == "TRUNCATE"
+        assert stats["wal_bytes"] == 0
+    finally:
+        await db.close()
+
+
+async def test_cold_reports_move_to_daily_archive_partitions(tmp_path):
+    config = replace(
+        Config(db_path=str(tmp_path / "reports.db")),
+        db_archive_dir=str(tmp_path / "archive"),
+    )
+    db = Database(config)
+    await db.connect()
+    try:
+        cold = await insert_reports(db, 3, minutes_ago=2 * 24 * 60)
+        hot = await insert_reports(db, 2)
+
+        assert await db.archive_old_reports() == 3
+        assert await db.archive_old_reports() == 0
+        assert await fetch_all(db, "SELECT id FROM raw_reports") == [(i,) for i in hot]
+        [(day, path)] = db.archive.partitions()
+        assert day == (NOW - timedelta(days=2)).date()
+
+        archived = [
+            r async for r in db.iter_archived_reports(NOW - timedelta(days=3), NOW)
+        ]
+        assert [r.id for r in archived] == cold
+        assert archived[0].city == "minneapolis"
+
+        # Retention deletes whole partitions
+        await db.purge_old_data(days=1)
+        assert db.archive.partitions() == []
+        assert not path.exists()
+    finally:
+        await db.close()
+
+
+async def test_purge_only_drops_purged_entries_from_registry(tmp_path):
+    db = Database(Config(db_path=str(tmp_path / "reports.db")))
+    await db.connect()
+    try:
+        cold = await insert_reports(db, 2, minutes_ago=2 * 24 * 60)
+        hot = await insert_reports(db, 2)
+        old_cluster, new_cluster_id = await db.apply_correlation_writes(CorrelationWrites(
+            new_clusters=[new_cluster(cold), new_cluster(hot)]
+        ))
+        await db.mark_cluster_notified(old_cluster)
+        await db.mark_cluster_notified(new_cluster_id)
+        await db._execute_write(
+            "UPDATE clusters SET created_at_ms = ? WHERE id = ?",
+            (epoch_ms(NOW - timedelta(days=2)), old_cluster),
+        )
+        # A write-through update the tables would not show a reload yet
+        pending = dict(db.registry.clusters[new_cluster_id], id=10_000)
+        db.registry.put_cluster(pending)
+
+        await db.purge_old_data(days=1)
+
+        assert set(db.registry.clusters) == {new_cluster_id, 10_000}
+        assert not db.is_source_notified("bluesky", "minneapolis-bluesky-2880-0")
+        assert db.is_source_notified("bluesky", "minneapolis-bluesky-5-0")
+    finally:
+        await db.close()
+
+
+async def test_full_text_index_follows_report_changes(db):
+    [first, second] = await insert_reports(db, 2)
+    [irrelevant] = await insert_reports(db, 1, source_type="reddit")
+    await db._execute_write(
+        "UPDATE raw_reports SET is_relevant = 0 WHERE id = ?", (irrelevant,)
+    )
+    since = NOW - timedelta(hours=1)
+
+    async def search(query):
+        return sorted(r.id for r in await db.search_reports(query, since))
+
+    assert await search("agents") == [first, second]
+    assert await search('"report 1"') == [second]
+    await db._execute_write(
+        "UPDATE raw_reports SET cleaned_text = 'vans on lake street' WHERE id = ?", (first,)
+    )
+    assert await search("agents") == [second]
+    assert await search("lake") == [first]
+    await db._execute_write("DELETE FROM raw_reports WHERE id = ?", (second,))
+    assert await search("agents") == []
+    assert await db.search_reports("lake", since, city="chicago") == []
+
+
+async def test_text_candidates_rank_the_window_by_bm25(db):
+    ids = await insert_reports(db, 5)
+    await db._execute_write(
+        "UPDATE raw_reports SET cleaned_text = 'unmarked vans outside the courthouse' "
+        "WHERE id IN (?, ?)",
+        (ids[0], ids[3]),
+    )
+    since = NOW - timedelta(hours=1)
+    [report] = [r async for r in db.iter_recent_relevant(since, "minneapolis", limit=1)]
+    await db.load_report_texts([report])
+
+    assert await db.text_candidates([report], since, limit=1) == {ids[0], ids[3]}
+    assert await db.text_candidates([report], since + timedelta(hours=2)) == set()
+
+
+async def test_archived_reports_are_searchable_and_index_is_backfilled(tmp_path):
+    path = tmp_path / "reports.db"
+    config = replace(Config(db_path=str(path)), db_archive_dir=str(tmp_path / "archive"))
+    db = Database(config)
+    await db.connect()
+    try:
+        cold = await insert_reports(db, 2, minutes_ago=2 * 24 * 60)
+        hot = await insert_reports(db, 1)
+        await db.archive_old_reports()
+        since = NOW - timedelta(days=3)
+        found = await db.search_reports("agents", since)
+        assert sorted(r.id for r in found) == cold + hot
+        assert found[0].original_text.startswith("ICE agents report")
+    finally:
+        await db.close()
+
+    # A database from before the index gets it, with its reports, on connect
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """DROP TRIGGER raw_reports_fts_insert;
+           DROP TRIGGER raw_reports_fts_delete;
+           DROP TRIGGER raw_reports_fts_update;
+           DROP TABLE raw_reports_fts;"""
+    )
+    conn.close()
+    db = Database(config)
+    await db.connect()
+    try:
+        assert [r.id for r in await db.search_reports("agents", NOW - timedelta(hours=1))] == hot
+    finally:
+        await db.close()
+
+
+def test_backend_is_chosen_by_config():
+    assert isinstance(create_database(Config(db_path=":memory:")), Database)
+    with pytest.raises(ValueError, match="mysql"):
+        create_database(Config(db_backend="mysql"))
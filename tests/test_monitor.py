@@ -0,0 +1,50 @@
+"""Tests for the monitor's report processing loop."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import Config
+from main import ICEMonitor
+from storage.models import RawReport
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def monitor():
+    app = ICEMonitor(Config(db_path=":memory:"))
+    app._get_location_extractor = lambda: None  # spaCy is not needed here
+    await app.db.connect()
+    yield app
+    await app.db.close()
+
+
+def raw(source_id, source_type="iceout", text="ICE agents on Lake Street", hours_ago=0.0):
+    ts = NOW - timedelta(hours=hours_ago)
+    return RawReport(
+        source_type=source_type,
+        source_id=source_id,
+        source_url="",
+        author=f"user-{source_id}",
+        text=text,
+        timestamp=ts,
+        collected_at=ts,
+    )
+
+
+async def test_queued_reports_share_group_commits(monitor):
+    reports = [raw(str(n)) for n in range(20)]
+    reports += [raw("3"), raw("stale", hours_ago=12), raw("chatter", "bluesky", "great tacos tonight")]
+    writer = monitor.db._writer
+    batches = writer.batches
+
+    await monitor._process_reports(reports)
+
+    # One commit for the inserts, one for the processed fields
+    assert writer.batches - batches == 2
+    async with monitor.db._readers.connection() as db:
+        cursor = await db.execute(
+            "SELECT source_id, is_relevant, cleaned_text IS NOT NULL FROM raw_reports ORDER BY id"
+        )
+        rows = [tuple(row) for row in await cursor.fetchall()]
+    assert rows == [(str(n), 1, 1) for n in range(20)] + [("chatter", 0, 1)]
@@ -0,0 +1,160 @@
+"""Tests for the PostgreSQL storage backend.
+
+Run against a local Postgres container (see "PostgreSQL" in the README);
+skipped unless asyncpg is installed and TEST_DATABASE_URL is set.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+asyncpg = pytest.importorskip("asyncpg")
+
+from config import Config
+from correlation.correlator import Correlator
+from storage.backend import create_database
+from storage.models import CorrelationWrites, NewCluster, RawReport
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+async def db():
+    conn = await asyncpg.connect(DATABASE_URL)
+    await conn.execute("DROP TABLE IF EXISTS raw_reports, clusters, notifications")
+    await conn.close()
+    database = create_database(Config(db_backend="postgres", database_url=DATABASE_URL))
+    await database.connect()
+    yield database
+    await database.close()
+
+
+async def add_report(db, source_type, source_id, text, minutes_ago=5, city="minneapolis"):
+    ts = NOW - timedelta(minutes=minutes_ago)
+    row_id = await db.insert_raw_report(RawReport(
+        source_type=source_type,
+        source_id=source_id,
+        source_url=f"https://example.com/{source_id}",
+        author=f"{source_type}-{source_id}",
+        text=text,
+        timestamp=ts,
+        collected_at=ts,
+    ))
+    if row_id is not None:
+        await db.update_report_processing(
+            report_id=row_id,
+            cleaned_text=text.lower(),
+            is_relevant=True,
+            primary_neighborhood="Powderhorn",
+            latitude=44.9486,
+            longitude=-93.2620,
+            keywords_matched=["ice agents"],
+            city=city,
+        )
+    return row_id
+
+
+async def test_duplicates_are_dropped_and_texts_load_on_demand(db):
+    first = await add_report(db, "bluesky", "1", "ICE agents on Lake Street")
+    assert await add_report(db, "bluesky", "1", "ICE agents on Lake Street") is None
+    quiet = await add_report(db, "reddit", "2", "quiet chicago report", city="chicago")
+
+    since = NOW - timedelta(hours=1)
+    assert sorted(await db.get_correlation_cities(since)) == ["chicago", "minneapolis"]
+    [report] = [r async for r in db.iter_recent_relevant(since, "minneapolis")]
+    assert report.id == first and not report.text_loaded
+    assert report.timestamp == NOW - timedelta(minutes=5)
+
+    await db.load_report_texts([report])
+    assert report.original_text == "ICE agents on Lake Street"
+    assert report.keywords_matched == ["ice agents"]
+    [chicago] = [r async for r in db.iter_recent_relevant(since, "chicago")]
+    assert chicago.id == quiet
+    assert [r async for r in db.iter_recent_relevant(since, "chicago", after_seq=chicago.seq)] == []
+
+
+async def test_watermark_does_not_skip_reports_processed_late(db):
+    ts = NOW - timedelta(minutes=5)
+    raw = [
+        RawReport(source_type="bluesky", source_id=str(n), source_url="", author=f"a{n}",
+                  text=f"ICE agents report {n}", timestamp=ts, collected_at=ts)
+        for n in range(3)
+    ]
+    early, late, pending = [await db.insert_raw_report(r) for r in raw]
+    since = NOW - timedelta(hours=1)
+
+    async def process(report_id):
+        await db.update_report_processing(
+            report_id, "ice agents", True, None, None, None, [], "minneapolis"
+        )
+
+    async def fetch(after_seq):
+        return [r async for r in db.iter_recent_relevant(since, "minneapolis", after_seq=after_seq)]
+
+    # Another ingest process processes the later insert first
+    await process(late)
+    [first] = await fetch(0)
+    assert first.id == late
+
+    # A transaction still running holds back every report processed after it
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        async with conn.transaction():
+            await conn.execute(
+                """UPDATE raw_reports
+                   SET is_relevant = TRUE, city = 'minneapolis',
+                       processed_xid = pg_current_xact_id()
+                   WHERE id = $1""",
+                pending,
+            )
+            await process(early)
+            assert await fetch(first.seq) == []
+    finally:
+        await conn.close()
+
+    assert sorted(r.id for r in await fetch(first.seq)) == [early, pending]
+
+
+async def test_correlation_writes_and_expiry(db):
+    ids = [await add_report(db, "bluesky", str(n), f"ICE agents report {n}") for n in range(3)]
+    [cluster_id] = await db.apply_correlation_writes(CorrelationWrites(new_clusters=[NewCluster(
+        primary_location="Powderhorn",
+        latitude=None,
+        longitude=None,
+        confidence_score=0.7,
+        source_count=2,
+        unique_source_types=["bluesky"],
+        earliest_report=NOW,
+        latest_report=NOW,
+        report_ids=ids[:2],
+        city="minneapolis",
+    )]))
+    await db.mark_cluster_notified(cluster_id)
+    await db.log_notification(cluster_id, {"title": "test"}, success=True)
+
+    assert db.is_source_notified("bluesky", "0")
+    assert not db.is_source_notified("bluesky", "2")
+    assert await db.get_notified_cluster_report_ids(cluster_id) == set(ids[:2])
+    [active] = await db.get_active_clusters(now=NOW)
+    assert active["id"] == cluster_id
+    assert active["latest_report_ms"] == round(NOW.timestamp() * 1000)
+
+    # A day later the un-notified report is expired and the cluster deleted
+    assert await db.expire_due(NOW + timedelta(days=1), batch_size=1) == (1, 1)
+    assert await db.get_active_clusters(now=NOW) == []
+
+
+async def test_correlator_runs_on_postgres(db):
+    await add_report(db, "bluesky", "1", "ICE agents detaining a man at Lake Street and Chicago Ave")
+    await add_report(db, "reddit", "2", "saw ice agents detain someone on lake street by chicago ave")
+    correlator = Correlator(Config(db_backend="postgres", database_url=DATABASE_URL), db)
+
+    [incident] = await correlator.run_cycle()
+
+    assert incident.source_count == 2
+    assert all(r.original_text for r in incident.reports)
+    assert await correlator.run_cycle() == []
@@ -0,0 +1,100 @@
+"""Tests for the sparse similarity engine."""
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from processing.similarity import (
+    SIMILARITY_BACKENDS,
+    SimilarityEngine,
+    top_k_neighbors,
+)
+
+TEXTS = [
+    "ICE agents detaining people at Lake Street and Chicago Ave",
+    "ice agents seen detaining someone on lake street near chicago ave",
+    "Unmarked vans parked outside the courthouse downtown",
+    "vans outside downtown courthouse, agents going in",
+    "Community meeting tonight about tenant rights",
+]
+
+
+def test_compute_sparse_matches_dense_cosine():
+    engine = SimilarityEngine()
+    sim = engine.compute_sparse(TEXTS)
+    dense = cosine_similarity(engine.vectorize(TEXTS))
+
+    assert sim.shape == (len(TEXTS), len(TEXTS))
+    # Only the strict upper triangle is stored
+    coo = sim.tocoo()
+    assert np.all(coo.row < coo.col)
+    for i in range(len(TEXTS)):
+        for j in range(i + 1, len(TEXTS)):
+            assert abs(sim[i, j] - dense[i][j]) < 1e-9
+
+
+def test_threshold_drops_weak_pairs():
+    engine = SimilarityEngine()
+    sim = engine.compute_sparse(TEXTS, threshold=0.3)
+    assert sim.nnz > 0
+    assert np.all(sim.data >= 0.3)
+
+
+def test_blocked_product_matches_single_block():
+    engine = SimilarityEngine()
+    matrix = engine.vectorize(TEXTS)
+    whole = engine.backend.pairwise(matrix, len(TEXTS))
+    blocked = engine.backend.pairwise(matrix, len(TEXTS), block_size=2)
+    assert abs(whole - blocked).max() < 1e-12
+
+
+def test_top_k_orders_neighbors():
+    engine = SimilarityEngine()
+    indices, scores = engine.top_k(TEXTS, k=2)
+    assert indices.shape == (len(TEXTS), 2)
+    assert indices[0, 0] == 1
+    assert indices[2, 0] == 3
+    assert np.all(scores[:, 0] >= scores[:, 1])
+
+
+def test_top_k_pads_missing_neighbors():
+    engine = SimilarityEngine()
+    indices, scores = top_k_neighbors(engine.compute_sparse(["alpha", "beta"]), k=3)
+    assert (indices == -1).all()
+    assert (scores == 0.0).all()
+
+
+def test_empty_vocabulary_scores_zero():
+    engine = SimilarityEngine()
+    assert engine.compute_sparse(["the", "and"]).nnz == 0
+    assert engine.score("the", "a") == 0.0
+
+
+@pytest.mark.parametrize("backend", sorted(SIMILARITY_BACKENDS))
+def test_backends_rank_same_incident_highest(backend):
+    engine = SimilarityEngine(backend)
+    sim = engine.compute_sparse(TEXTS)
+    assert sim[0, 1] > sim[0, 2]
+    assert sim[2, 3] > sim[2, 4]
+    assert np.all((sim.data > 0.0) & (sim.data <= 1.0 + 1e-9))
+
+
+@pytest.mark.parametrize("backend", ["hashing", "shingles", "minhash"])
+def test_stateless_rows_compare_across_calls(backend):
+    engine = SimilarityEngine(backend)
+    assert engine.stateless
+    old = engine.vectorize(TEXTS[:2])
+    new = engine.vectorize(TEXTS[2:])
+    cross = engine.backend.cross(new, 3, old, 2)
+    together = engine.compute_sparse(TEXTS)
+    assert abs(cross[1, 0] - together[0, 3]) < 1e-9
+
+
+def test_minhash_approximates_shingle_jaccard():
+    exact = SimilarityEngine("shingles").compute_sparse(TEXTS)
+    approx = SimilarityEngine("minhash").compute_sparse(TEXTS)
+    assert abs(exact[0, 1] - approx[0, 1]) < 0.2
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError, match="Unknown similarity backend"):
+        SimilarityEngine("word2vec")
@@ -0,0 +1,31 @@
+"""Tests for the storage benchmark's scratch fill and timing pass."""
+from datetime import datetime, timezone
+
+from benchmarks.storage_bench import fill, file_sizes, measure, summarize
+from config import Config
+from storage.database import Database
+
+
+async def test_fill_and_measure_cover_every_public_method(tmp_path):
+    config = Config(db_path=str(tmp_path / "bench.db"))
+    db = Database(config)
+    await db.connect()
+    await db.close()
+
+    counts = fill(config.db_path, 2000, config, datetime.now(timezone.utc))
+    assert counts["reports"] == 2000
+    assert counts["clusters"] == counts["notifications"] > 0
+    assert file_sizes(config)["db"] > 0
+
+    result = await measure(config, repeats=3, producers=2, rate=0)
+
+    public = {
+        name for name in vars(Database)
+        if not name.startswith("_") and callable(getattr(Database, name))
+    }
+    assert public <= set(result["samples"])
+    assert result["ingest_rate"] > 0
+    assert file_sizes(config)["archive"] > 0
+    rows = {s["method"]: s for s in summarize(result["samples"])}
+    assert rows["insert_raw_report"]["n"] == 3
+    assert rows["archive_old_reports"]["n"] == 1
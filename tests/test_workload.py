@@ -0,0 +1,54 @@
+"""Tests for the synthetic correlation workload and its benchmark."""
+from dataclasses import replace
+
+from benchmarks.correlation_bench import cluster_quality, replay, summarize
+from benchmarks.workload import NOISE, WorkloadConfig, generate
+from config import Config
+
+
+def test_workload_is_deterministic_and_labeled():
+    config = WorkloadConfig(cities=("minneapolis", "houston"), incidents_per_city=5,
+                            noise_per_city=4, burst_size=(3, 3))
+    first, second = generate(config), generate(config)
+
+    assert [lr.report.original_text for lr in first] == [lr.report.original_text for lr in second]
+    assert len(first) == 2 * (5 * 3 + 4)
+    assert sum(lr.label == NOISE for lr in first) == 8
+    times = [lr.report.collected_at for lr in first]
+    assert times == sorted(times)
+    assert len({(lr.report.source_type, lr.report.source_id) for lr in first}) == len(first)
+
+
+def test_workload_knobs():
+    config = WorkloadConfig(cities=("chicago",), no_coords_rate=1.0, near_duplicate_rate=1.0,
+                            burst_size=(4, 4), noise_per_city=0)
+    reports = generate(config)
+
+    assert all(lr.report.latitude is None for lr in reports)
+    # Every report after the first of an incident reposts its text
+    texts_by_label = {}
+    for lr in reports:
+        texts_by_label.setdefault(lr.label, set()).add(lr.report.original_text)
+    assert all(len(texts) == 1 for texts in texts_by_label.values())
+
+
+def test_cluster_quality():
+    labels = {1: 0, 2: 0, 3: 0, 4: 1, 5: NOISE}
+    quality = cluster_quality(labels, {1: 10, 2: 10, 3: 11, 5: 12})
+    assert quality["pair_precision"] == 1.0
+    assert quality["pair_recall"] == 1 / 3
+    assert quality["incident_recall"] == 0.5
+    assert quality["false_alerts"] == 1
+
+
+async def test_replay_runs_correlator_on_stream():
+    workload = generate(WorkloadConfig(cities=("minneapolis",), incidents_per_city=3,
+                                       noise_per_city=2, duration_seconds=1800))
+    config = replace(Config(db_path=":memory:"), correlation_check_interval=300)
+
+    result = await replay(workload, config)
+    summary = summarize(result)
+
+    assert len(result["labels"]) == len(workload)
+    assert summary["cycles"] == len(result["traces"])
+    assert summary["incident_recall"] > 0